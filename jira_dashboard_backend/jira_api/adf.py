@@ -0,0 +1,35 @@
+# jira_api/adf.py
+# Helpers for Atlassian Document Format (the rich-text JSON Jira v3 returns).
+
+
+def adf_to_text(node):
+    """Flatten an ADF document (or plain string) into plain text"""
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        return "".join(adf_to_text(child) for child in node)
+
+    if node.get("type") == "text":
+        return node.get("text", "")
+    if node.get("type") == "hardBreak":
+        return "\n"
+
+    text = adf_to_text(node.get("content"))
+    # Block-level nodes end with a line break so words from adjacent blocks don't merge
+    if node.get("type") in ("paragraph", "heading", "listItem", "codeBlock", "blockquote"):
+        text += "\n"
+    return text
+
+
+def text_to_adf(text):
+    """Wrap plain text in a minimal ADF document, one paragraph per line"""
+    return {
+        "type": "doc",
+        "version": 1,
+        "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": line}] if line else []}
+            for line in text.split("\n")
+        ]
+    }
@@ -1,3 +1,38 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IssueDeletion, OutboxEntry, WorkflowPlan, WorkflowRun, WorkflowStep
+
+
+class WorkflowStepInline(admin.TabularInline):
+    model = WorkflowStep
+    extra = 0
+    readonly_fields = ('name', 'status', 'result', 'error', 'created_at')
+
+
+@admin.register(WorkflowRun)
+class WorkflowRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'requirement', 'status', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('requirement',)
+    inlines = [WorkflowStepInline]
+
+
+@admin.register(WorkflowPlan)
+class WorkflowPlanAdmin(admin.ModelAdmin):
+    list_display = ('id', 'requirement', 'status', 'revision', 'run', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('requirement',)
+
+
+@admin.register(OutboxEntry)
+class OutboxEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'operation', 'project_key', 'status', 'attempts', 'run', 'next_attempt_at', 'updated_at')
+    list_filter = ('status', 'operation')
+    readonly_fields = ('result', 'claimed_by', 'claimed_until', 'created_at', 'updated_at')
+
+
+@admin.register(IssueDeletion)
+class IssueDeletionAdmin(admin.ModelAdmin):
+    list_display = ('issue_key', 'project_key', 'deleted_at')
+    list_filter = ('project_key',)
+    search_fields = ('issue_key',)
@@ -0,0 +1,129 @@
+# jira_api/analytics.py
+# Project aggregates computed over the columnar IssueStore.
+import threading
+import time
+
+import numpy as np
+
+from .fastjson import dumps
+
+WEEK = 7 * 24 * 3600
+DAY = 24 * 3600
+
+METRICS = ("status", "throughput", "cycle-time", "assignees")
+
+_results = {}
+_results_lock = threading.Lock()
+
+
+def project_analytics(store, weeks=12):
+    """Return all aggregates for a store, reusing the cached result until the store changes"""
+    version, result, encoded = _cached_analytics(store, weeks)[1]
+    return result
+
+
+def project_analytics_json(store, weeks=12):
+    """The aggregates as serialised JSON bytes, encoded once per store version"""
+    cache_key, entry = _cached_analytics(store, weeks)
+    version, result, encoded = entry
+    if encoded is None:
+        encoded = dumps(result)
+        with _results_lock:
+            if _results.get(cache_key) is entry:
+                _results[cache_key] = (version, result, encoded)
+    return encoded
+
+
+def _cached_analytics(store, weeks):
+    cache_key = (store.project_key, weeks)
+    with _results_lock:
+        cached = _results.get(cache_key)
+        if cached is not None and cached[0] == store.version:
+            return cache_key, cached
+
+    with store.lock:
+        version = store.version
+        result = compute_analytics(store, weeks)
+
+    entry = (version, result, None)
+    with _results_lock:
+        _results[cache_key] = entry
+    return cache_key, entry
+
+
+def compute_analytics(store, weeks=12, now=None):
+    """Compute every aggregate in one pass over the store's columns"""
+    now = time.time() if now is None else now
+    size = store.size
+    alive = store.alive[:size]
+
+    return {
+        "project": store.project_key,
+        "issue_count": int(alive.sum()),
+        "last_sync": store.last_sync,
+        "status": status_distribution(store, alive),
+        "throughput": weekly_throughput(store, alive, weeks, now),
+        "cycle-time": cycle_time(store, alive),
+        "assignees": assignee_load(store, alive),
+    }
+
+
+def _count_by(codes, names):
+    counts = np.bincount(codes[codes >= 0], minlength=len(names))
+    return {name: int(count) for name, count in zip(names, counts) if count}
+
+
+def status_distribution(store, alive):
+    """Issues per status name and per status category"""
+    size = store.size
+    return {
+        "by_status": _count_by(store.status[:size][alive], store.statuses.names),
+        "by_category": _count_by(store.status_category[:size][alive], store.status_categories.names),
+        "by_type": _count_by(store.issue_type[:size][alive], store.issue_types.names),
+    }
+
+
+def _weekly_counts(timestamps, weeks, now):
+    timestamps = timestamps[~np.isnan(timestamps)]
+    age_in_weeks = ((now - timestamps) // WEEK).astype(np.int64)
+    recent = age_in_weeks[(age_in_weeks >= 0) & (age_in_weeks < weeks)]
+    # Oldest week first
+    return np.bincount(recent, minlength=weeks)[::-1]
+
+
+def weekly_throughput(store, alive, weeks, now):
+    """Issues created and resolved per week for the last `weeks` weeks"""
+    size = store.size
+    created = _weekly_counts(store.created[:size][alive], weeks, now)
+    resolved = _weekly_counts(store.resolved[:size][alive], weeks, now)
+    return [{
+        "week_start": time.strftime("%Y-%m-%d", time.gmtime(now - (weeks - i) * WEEK)),
+        "created": int(created[i]),
+        "resolved": int(resolved[i]),
+    } for i in range(weeks)]
+
+
+def cycle_time(store, alive):
+    """Created-to-resolved time in days for resolved issues"""
+    size = store.size
+    durations = (store.resolved[:size][alive] - store.created[:size][alive]) / DAY
+    durations = durations[~np.isnan(durations)]
+    if not len(durations):
+        return {"resolved_issues": 0}
+    p50, p85, p95 = np.percentile(durations, [50, 85, 95])
+    return {
+        "resolved_issues": int(len(durations)),
+        "mean_days": round(float(durations.mean()), 2),
+        "median_days": round(float(p50), 2),
+        "p85_days": round(float(p85), 2),
+        "p95_days": round(float(p95), 2),
+    }
+
+
+def assignee_load(store, alive):
+    """Open (not done) issues per assignee, busiest first"""
+    size = store.size
+    done = store.status_categories.codes.get("done", -2)
+    open_issues = alive & (store.status_category[:size] != done)
+    load = _count_by(store.assignee[:size][open_issues], store.assignees.names)
+    return dict(sorted(load.items(), key=lambda item: item[1], reverse=True))
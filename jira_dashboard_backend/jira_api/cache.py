@@ -0,0 +1,392 @@
+# jira_api/cache.py
+# Service-layer cache shared by JiraService, GeminiService and the views.
+#
+# Backends (chosen with settings.SERVICE_CACHE['BACKEND']):
+#   memory - per-process LRU dict
+#   sqlite - single SQLite file shared by every worker process on the host
+#   django - any Django cache framework alias (locmem, file, memcached, redis...)
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Serialised values start with a one-byte format marker
+_RAW = b"\x00"
+_COMPRESSED = b"\x01"
+COMPRESS_THRESHOLD = 1024
+MAX_KEY_LENGTH = 200
+
+_MISSING = object()
+
+
+def serialize(value):
+    """Pickle a value, zlib-compressing it when that pays off"""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= COMPRESS_THRESHOLD:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return _COMPRESSED + compressed
+    return _RAW + data
+
+
+def deserialize(data):
+    """Reverse serialize()"""
+    data = bytes(data)
+    if data[:1] == _COMPRESSED:
+        return pickle.loads(zlib.decompress(data[1:]))
+    return pickle.loads(data[1:])
+
+
+def make_key(namespace, key):
+    """Build a namespaced key, hashing keys that are too long to store as-is"""
+    key = f"{namespace}:{key}" if namespace else str(key)
+    if len(key) > MAX_KEY_LENGTH:
+        prefix = f"{namespace}:" if namespace else ""
+        key = prefix + hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return key
+
+
+class BaseCache:
+    """Common cache interface with single-flight get_or_set"""
+
+    # How long a process may hold a recompute lock before others take over
+    LOCK_TIMEOUT = 60
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, default_ttl=300, max_entries=10000, max_value_size=1024 * 1024):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_value_size = max_value_size
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def namespace(self, name):
+        """Return a view of this cache whose keys are prefixed with name"""
+        return NamespacedCache(self, name)
+
+    def get_or_set(self, key, func, ttl=None):
+        """Return the cached value for key, computing it with func on a miss.
+
+        Only one caller computes a missing value; concurrent callers in this
+        process (and, for shared backends, other processes) wait for it
+        instead of stampeding the upstream service.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._local_lock(key):
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            deadline = time.monotonic() + self.LOCK_TIMEOUT
+            while not self._acquire_lock(key):
+                time.sleep(self.LOCK_POLL_INTERVAL)
+                value = self.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                if time.monotonic() > deadline:
+                    logger.warning(f"Cache lock for {key} timed out, recomputing")
+                    break
+
+            try:
+                value = func()
+                self.set(key, value, ttl)
+                return value
+            finally:
+                self._release_lock(key)
+
+    def _local_lock(self, key):
+        with self._key_locks_guard:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+                if len(self._key_locks) > self.max_entries:
+                    # Drop idle locks so the table does not grow without bound
+                    for idle_key in [k for k, l in self._key_locks.items() if not l.locked() and k != key]:
+                        del self._key_locks[idle_key]
+            return lock
+
+    def _acquire_lock(self, key):
+        """Take the cross-process recompute lock; in-process backends need none"""
+        return True
+
+    def _release_lock(self, key):
+        pass
+
+    def _encode(self, key, value):
+        """Serialise a value, or return None if it is too large to cache"""
+        data = serialize(value)
+        if self.max_value_size and len(data) > self.max_value_size:
+            logger.debug(f"Not caching {key}: {len(data)} bytes exceeds max_value_size")
+            return None
+        return data
+
+    def _expiry(self, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        return None if not ttl else time.time() + ttl
+
+
+class NamespacedCache:
+    """Prefixes every key with a namespace before delegating to a backend"""
+
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.name = name
+
+    def get(self, key, default=None):
+        return self.backend.get(make_key(self.name, key), default)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(make_key(self.name, key), value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(make_key(self.name, key))
+
+    def get_or_set(self, key, func, ttl=None):
+        return self.backend.get_or_set(make_key(self.name, key), func, ttl)
+
+
+class MemoryCache(BaseCache):
+    """Per-process LRU cache; values are stored serialised to bound their size"""
+
+    def __init__(self, default_ttl=300, max_entries=10000, max_value_size=1024 * 1024):
+        super().__init__(default_ttl, max_entries, max_value_size)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        key = make_key(None, key)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            data, expires = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return deserialize(data)
+
+    def set(self, key, value, ttl=None):
+        key = make_key(None, key)
+        data = self._encode(key, value)
+        if data is None:
+            return
+        with self._lock:
+            self._data[key] = (data, self._expiry(ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(make_key(None, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def dump_state(self):
+        """Unexpired entries as (key, serialised value, expiry), least recently used first"""
+        now = time.time()
+        with self._lock:
+            return [(key, data, expires) for key, (data, expires) in self._data.items()
+                    if expires is None or expires >= now]
+
+    def load_state(self, entries):
+        """Add entries saved by dump_state(), skipping those that have expired since"""
+        now = time.time()
+        with self._lock:
+            for key, data, expires in entries:
+                if (expires is None or expires >= now) and key not in self._data:
+                    self._data[key] = (data, expires)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SQLiteCache(BaseCache):
+    """Cache stored in a local SQLite file, shared by all processes on the host"""
+
+    # Cull expired and excess entries every N writes rather than on each one
+    CULL_EVERY = 100
+
+    def __init__(self, location, default_ttl=300, max_entries=10000, max_value_size=1024 * 1024):
+        super().__init__(default_ttl, max_entries, max_value_size)
+        self.location = str(location)
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entry (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires REAL
+            );
+            CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires);
+            CREATE TABLE IF NOT EXISTS cache_lock (
+                key TEXT PRIMARY KEY,
+                expires REAL NOT NULL
+            );
+        """)
+
+    def _connection(self):
+        # One connection per thread and per process (connections must not cross a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.location, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, default=None):
+        row = self._connection().execute(
+            "SELECT value, expires FROM cache_entry WHERE key = ?", (make_key(None, key),)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return deserialize(row[0])
+
+    def set(self, key, value, ttl=None):
+        key = make_key(None, key)
+        data = self._encode(key, value)
+        if data is None:
+            return
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(data), self._expiry(ttl))
+        )
+        self._writes += 1
+        if self._writes % self.CULL_EVERY == 0:
+            self._cull()
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache_entry WHERE key = ?", (make_key(None, key),))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entry")
+
+    def _cull(self):
+        """Drop expired entries, then the soonest-expiring ones above max_entries"""
+        conn = self._connection()
+        conn.execute("DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache_entry WHERE key IN "
+                "(SELECT key FROM cache_entry ORDER BY COALESCE(expires, 1e18) LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def _acquire_lock(self, key):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("DELETE FROM cache_lock WHERE key = ? AND expires < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO cache_lock (key, expires) VALUES (?, ?)", (key, now + self.LOCK_TIMEOUT)
+        )
+        return cursor.rowcount == 1
+
+    def _release_lock(self, key):
+        self._connection().execute("DELETE FROM cache_lock WHERE key = ?", (key,))
+
+
+class DjangoCache(BaseCache):
+    """Adapter over a Django cache framework alias"""
+
+    def __init__(self, alias="default", default_ttl=300, max_entries=10000, max_value_size=1024 * 1024):
+        super().__init__(default_ttl, max_entries, max_value_size)
+        from django.core.cache import caches
+        self._cache = caches[alias]
+
+    def get(self, key, default=None):
+        data = self._cache.get(make_key(None, key))
+        return default if data is None else deserialize(data)
+
+    def set(self, key, value, ttl=None):
+        key = make_key(None, key)
+        data = self._encode(key, value)
+        if data is None:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        self._cache.set(key, data, ttl or None)
+
+    def delete(self, key):
+        self._cache.delete(make_key(None, key))
+
+    def clear(self):
+        self._cache.clear()
+
+    def _acquire_lock(self, key):
+        # cache.add() is atomic on the shared backends, which makes it a lock
+        return self._cache.add(make_key("lock", key), 1, self.LOCK_TIMEOUT)
+
+    def _release_lock(self, key):
+        self._cache.delete(make_key("lock", key))
+
+
+BACKENDS = {
+    "memory": MemoryCache,
+    "sqlite": SQLiteCache,
+    "django": DjangoCache,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_cache(config):
+    """Instantiate a cache backend from a SERVICE_CACHE-style dict"""
+    backend = config.get("BACKEND", "memory")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown service cache backend: {backend}")
+    options = {
+        "default_ttl": config.get("DEFAULT_TTL", 300),
+        "max_entries": config.get("MAX_ENTRIES", 10000),
+        "max_value_size": config.get("MAX_VALUE_SIZE", 1024 * 1024),
+    }
+    if backend == "sqlite":
+        options["location"] = config["LOCATION"]
+    elif backend == "django":
+        options["alias"] = config.get("ALIAS", "default")
+    return BACKENDS[backend](**options)
+
+
+def get_cache(namespace=None):
+    """Return the process-wide service cache, optionally scoped to a namespace"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = build_cache(settings.SERVICE_CACHE)
+                if isinstance(cache, MemoryCache):
+                    # The other backends already outlive the process
+                    from .snapshot import restore
+                    state = restore("cache")
+                    if state:
+                        cache.load_state(state)
+                _cache = cache
+    return _cache.namespace(namespace) if namespace else _cache
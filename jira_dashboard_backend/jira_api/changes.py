@@ -0,0 +1,69 @@
+# jira_api/changes.py
+# The issue change feed behind /api/issues/changes/, and the Jira webhook that records deletions.
+from datetime import datetime, timedelta, timezone as dt_timezone
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .conditional import invalidate_validators, issue_project
+from .dedup import issue_indexes
+from .models import IssueDeletion
+from .store import issue_stores
+
+logger = logging.getLogger(__name__)
+
+DELETED_EVENT = "jira:issue_deleted"
+
+
+def issue_changes(jira, project_keys, since):
+    """Issues created or updated and keys of issues deleted in the projects since a Unix timestamp.
+    
+    More than ISSUE_CHANGES_LIMIT changed issues sets truncated: the client
+    is better off reloading its list than applying the change.
+    """
+    issues, truncated = [], False
+    for project_key in project_keys:
+        changed, truncated = jira.for_project(project_key).fetch_changes(
+            since, settings.ISSUE_CHANGES_LIMIT - len(issues))
+        issues += changed
+        if truncated:
+            break
+
+    deleted = list(dict.fromkeys(IssueDeletion.objects.filter(
+        project_key__in=project_keys, deleted_at__gte=datetime.fromtimestamp(since, dt_timezone.utc)
+    ).values_list("issue_key", flat=True)))
+    gone = set(deleted)
+    return {"issues": [issue for issue in issues if issue["key"] not in gone], "deleted": deleted,
+            "truncated": truncated}
+
+
+def valid_signature(body, signature):
+    """Check a webhook body against its X-Hub-Signature header ("sha256=<hex HMAC>")"""
+    expected = hmac.new(settings.JIRA_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature or "")
+
+
+def record_deletion(event):
+    """Record the issue of a jira:issue_deleted event and drop it from the local caches; returns its key"""
+    issue = event.get("issue") or {}
+    issue_key = issue.get("key")
+    if not issue_key:
+        return None
+    project_key = ((issue.get("fields") or {}).get("project") or {}).get("key") or issue_project(issue_key)
+    IssueDeletion.objects.create(project_key=project_key, issue_key=issue_key)
+    # Nobody can ask for changes older than that any more
+    cutoff = timezone.now() - timedelta(seconds=settings.ISSUE_CHANGES_MAX_AGE)
+    IssueDeletion.objects.filter(deleted_at__lt=cutoff).delete()
+
+    store = issue_stores().get(project_key)
+    if store is not None:
+        store.remove([issue_key])
+    index = issue_indexes().get(project_key)
+    if index is not None:
+        index.remove([issue_key])
+    invalidate_validators([project_key])
+    logger.info(f"Recorded deletion of {issue_key}")
+    return issue_key
@@ -0,0 +1,112 @@
+# jira_api/conditional.py
+# Validators (ETag / Last-Modified) for conditional GETs on the issue API.
+from datetime import datetime
+import hashlib
+import time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_cache
+
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_jira_datetime(value):
+    """Parse a Jira timestamp such as 2024-01-31T10:15:00.000+0000"""
+    if not value:
+        return None
+    try:
+        # fromisoformat is far faster and accepts Jira's format on Python 3.11+
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, JIRA_DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def issue_validators(issues):
+    """Compute a strong ETag and Last-Modified timestamp from issues' updated fields"""
+    digest = hashlib.sha1()
+    last_modified = None
+    for issue in issues:
+        updated = (issue.get("fields") or {}).get("updated") or ""
+        digest.update(f"{issue.get('key')}:{updated};".encode("utf-8"))
+        parsed = parse_jira_datetime(updated)
+        if parsed is not None:
+            timestamp = int(parsed.timestamp())
+            if last_modified is None or timestamp > last_modified:
+                last_modified = timestamp
+    return f'"{digest.hexdigest()}"', last_modified
+
+
+class ValidatorCache:
+    """Remembers the last validators served per resource for a short time.
+
+    While an entry is fresh, a matching conditional request can be answered
+    with 304 without fetching anything from Jira. Entries live in the shared
+    service cache, so any worker can answer a revalidation. Each entry is
+    stored under its projects' current generations; a write to a project
+    bumps its generation, which retires every entry for it at once.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.ISSUE_VALIDATOR_TTL if ttl is None else ttl
+        self.cache = get_cache("validators")
+
+    def get(self, resource, project_keys):
+        """Return (etag, last_modified) for a resource of the given projects if still fresh"""
+        if self.ttl <= 0:
+            return None
+        return self.cache.get(self._versioned(resource, project_keys))
+
+    def set(self, resource, project_keys, etag, last_modified):
+        """Store validators for a resource of the given projects"""
+        if self.ttl <= 0:
+            return
+        self.cache.set(self._versioned(resource, project_keys), (etag, last_modified), self.ttl)
+
+    def invalidate(self, project_keys):
+        """Forget the validators of every resource of the given projects"""
+        if self.ttl <= 0:
+            return
+        generation = time.time_ns()
+        for project_key in project_keys:
+            # Outlives every entry stored under the previous generation
+            self.cache.set(f"generation:{project_key}", generation, self.ttl * 2)
+
+    def _versioned(self, resource, project_keys):
+        generations = ",".join(str(self.cache.get(f"generation:{key}", 0)) for key in sorted(project_keys))
+        return f"{resource}@{generations}"
+
+
+def issue_project(issue_key):
+    """The project key of an issue key such as PROJ-123"""
+    return issue_key.rpartition("-")[0]
+
+
+def invalidate_validators(project_keys=(), issue_keys=()):
+    """Stop answering revalidations for projects (and issues) that were just written to"""
+    project_keys = set(project_keys) | {issue_project(key) for key in issue_keys if key}
+    if project_keys:
+        ValidatorCache().invalidate(project_keys)
+
+
+def conditional_response(request, etag, last_modified):
+    """Return a 304 response if the request's preconditions match, otherwise None"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validator_headers(response, etag, last_modified)
+    return response
+
+
+def set_validator_headers(response, etag, last_modified):
+    """Attach validators and force the browser to revalidate before reuse"""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "no-cache"
+    return response
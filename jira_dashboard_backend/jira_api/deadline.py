@@ -0,0 +1,144 @@
+# jira_api/deadline.py
+# Per-request time budgets, carried through service calls (and into worker threads) by a context variable.
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+import threading
+import time
+import logging
+
+import requests
+from django.conf import settings
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+# Clients may ask for a shorter budget (in seconds) than the server default, never a longer one
+DEADLINE_HEADER = "X-Request-Timeout"
+
+_deadline = ContextVar("request_deadline", default=None)
+# Idents of the worker threads currently running propagate()d calls for a request, while tracked
+_threads = ContextVar("request_threads", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The request's time budget ran out; the work left was not started"""
+
+
+@contextmanager
+def deadline(seconds):
+    """Run the block with at most seconds left; an enclosing, earlier deadline still applies"""
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left before the current deadline (negative once it has passed), or None without one"""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(what="the next call"):
+    """Raise DeadlineExceeded once the deadline has passed"""
+    if expired():
+        raise DeadlineExceeded(f"Request deadline exceeded before {what}")
+
+
+def timeout(default, what="the next call"):
+    """The timeout for one call: default, or whatever is left of the deadline if that is less"""
+    check(what)
+    left = remaining()
+    return default if left is None else min(default, left)
+
+
+def pause(seconds):
+    """Sleep for seconds, or only until the deadline if that comes first"""
+    left = remaining()
+    time.sleep(seconds if left is None else max(0.0, min(seconds, left)))
+
+
+def propagate(func):
+    """Wrap func so calls from worker threads run in (a copy of) the caller's context: deadline and priority"""
+    context = copy_context()
+    threads = context.get(_threads)
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call gets its own copy
+        if threads is None:
+            return context.copy().run(func, *args, **kwargs)
+        ident = threading.get_ident()
+        threads.add(ident)
+        try:
+            return context.copy().run(func, *args, **kwargs)
+        finally:
+            threads.discard(ident)
+    return run
+
+
+@contextmanager
+def track_threads():
+    """Yield a set that holds the idents of the threads running this block's propagate()d calls"""
+    threads = set()
+    token = _threads.set(threads)
+    try:
+        yield threads
+    finally:
+        _threads.reset(token)
+
+
+def iterate(iterable):
+    """Iterate in the current context, so a streamed response keeps the view's deadline"""
+    # Captured now: a generator's body would only run once the response is being sent
+    context = copy_context()
+    iterator = iter(iterable)
+
+    def items():
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    return items()
+
+
+def request_budget(request, default):
+    """default seconds, or the shorter budget the client sent in X-Request-Timeout"""
+    try:
+        asked = float(request.headers.get(DEADLINE_HEADER, ""))
+    except ValueError:
+        return default
+    return min(default, asked) if asked > 0 else default
+
+
+def with_deadline(setting="REQUEST_DEADLINE"):
+    """View decorator: run the view under the deadline configured in the named setting.
+
+    An error response produced after the deadline has passed is reported
+    as 504 Gateway Timeout rather than 500.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            with deadline(request_budget(request, getattr(settings, setting))):
+                try:
+                    response = view(request, *args, **kwargs)
+                except DeadlineExceeded as e:
+                    logger.error(f"Deadline exceeded in {view.__name__}: {e}")
+                    return JsonResponse({"error": str(e)}, status=504)
+                if response.status_code == 500 and expired():
+                    response.status_code = 504
+                return response
+        return wrapped
+    return decorator
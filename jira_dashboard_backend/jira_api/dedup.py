@@ -0,0 +1,334 @@
+# jira_api/dedup.py
+# Near-duplicate detection for AI-generated tasks and test cases, and
+# against issues that already exist in Jira.
+from array import array
+import re
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from .adf import adf_to_text
+from .snapshot import restore as restore_snapshot
+
+# Texts are embedded as TF-IDF weighted, hashed character n-grams
+NGRAM_SIZE = 3
+VECTOR_DIMS = 2 ** 14
+# The existing-issue index hashes word shingles into a larger, sparser space
+INDEX_DIMS = 2 ** 22
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text):
+    """Lowercase and collapse punctuation/whitespace so formatting never matters"""
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+def ngram_ids(text, n=NGRAM_SIZE, dims=VECTOR_DIMS):
+    """Hash a text's character n-grams into column ids (stable across processes)"""
+    text = f" {normalize_text(text)} "
+    if len(text) < n:
+        return []
+    return [zlib.crc32(text[i:i + n].encode("utf-8")) % dims for i in range(len(text) - n + 1)]
+
+
+def shingle_ids(text, dims=INDEX_DIMS):
+    """Hash a text's words and word pairs into ids (sparser than character n-grams)"""
+    words = normalize_text(text).split()
+    shingles = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(shingle.encode("utf-8")) % dims for shingle in shingles]
+
+
+def ngram_matrix(token_ids, dims=VECTOR_DIMS):
+    """Build a raw term-count matrix from per-text lists of hashed n-gram ids"""
+    rows = np.repeat(np.arange(len(token_ids)), [len(ids) for ids in token_ids])
+    cols = np.fromiter((i for ids in token_ids for i in ids), dtype=np.int64, count=len(rows))
+    counts = np.bincount(rows * dims + cols, minlength=len(token_ids) * dims)
+    return counts.reshape(len(token_ids), dims).astype(np.float32)
+
+
+def normalize_rows(matrix):
+    """Scale rows to unit length so dot products are cosine similarities"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def tfidf_vectors(texts, dims=VECTOR_DIMS):
+    """Embed texts as L2-normalised TF-IDF vectors over hashed n-grams"""
+    counts = ngram_matrix([ngram_ids(text, dims=dims) for text in texts], dims)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+    return normalize_rows(counts * idf.astype(np.float32))
+
+
+def find_duplicates(texts, threshold, groups=None):
+    """Find near-duplicate texts with one batched similarity computation.
+
+    Returns {duplicate_index: (kept_index, similarity)}; the earliest text of
+    each cluster is kept. With groups, texts are only compared to others in
+    the same group.
+    """
+    if len(texts) < 2 or threshold > 1:
+        return {}
+
+    vectors = tfidf_vectors(texts)
+    similarity = vectors @ vectors.T
+    candidates = np.triu(similarity >= threshold, k=1)
+    if groups is not None:
+        groups = np.asarray(groups)
+        candidates &= groups[:, None] == groups[None, :]
+
+    duplicates = {}
+    for kept, duplicate in zip(*np.nonzero(candidates)):
+        kept, duplicate = int(kept), int(duplicate)
+        # Skip pairs whose "kept" side was itself pruned by an earlier text
+        if kept in duplicates or duplicate in duplicates:
+            continue
+        duplicates[duplicate] = (kept, float(similarity[kept, duplicate]))
+    return duplicates
+
+
+def dedupe(items, text, threshold, label=None, groups=None):
+    """Split items into (kept, pruned) using find_duplicates.
+
+    text maps an item to the string compared; label maps an item to the name
+    reported for pruned entries. kept is a list of (original_index, item) so
+    callers can keep index-based identifiers stable.
+    """
+    label = label or text
+    duplicates = find_duplicates([text(item) for item in items], threshold, groups)
+    kept = [(i, item) for i, item in enumerate(items) if i not in duplicates]
+    pruned = [{
+        "item": label(items[i]),
+        "duplicate_of": label(items[kept_index]),
+        "similarity": round(score, 3)
+    } for i, (kept_index, score) in sorted(duplicates.items())]
+    return kept, pruned
+
+
+class IssueSimilarityIndex:
+    """Inverted index over existing issues' summary and description n-grams.
+
+    Each issue is stored as its set of hashed word shingles, and the
+    postings list of every shingle holds the rows containing it. Lookups
+    only touch the postings of the query's rarest shingles plus a binary
+    search per shingle, so they stay sub-millisecond as the project grows.
+    Issues are added or replaced incrementally; replaced rows are
+    tombstoned rather than rewritten, and re-indexing an unchanged issue is
+    a no-op. Once tombstones make up COMPACT_SHARE of the rows the index
+    is rebuilt from its live rows.
+    """
+
+    COMPACT_SHARE = 0.5
+    # Small indexes are cheap to scan, so are not compacted below this many rows
+    COMPACT_MIN_ROWS = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._keys = []
+        self._summaries = []
+        self._sizes = array("f")
+        self._alive = array("b")
+        self._rows = {}
+        # Checksum of each live issue's indexed text, to skip unchanged re-indexes
+        self._fingerprints = {}
+        self._dead = 0
+        self.synced = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, key, summary, description=""):
+        """Index (or re-index) one issue"""
+        text = f"{summary} {description}"
+        fingerprint = zlib.crc32(text.encode("utf-8"))
+        with self._lock:
+            if key in self._rows and self._fingerprints.get(key) == fingerprint:
+                return
+        ids = set(shingle_ids(text))
+        with self._lock:
+            previous = self._rows.get(key)
+            if previous is not None:
+                self._alive[previous] = 0
+                self._dead += 1
+            row = len(self._keys)
+            self._rows[key] = row
+            self._fingerprints[key] = fingerprint
+            self._keys.append(key)
+            self._summaries.append(summary)
+            self._sizes.append(len(ids))
+            self._alive.append(1)
+            for ngram in ids:
+                postings = self._postings.get(ngram)
+                if postings is None:
+                    postings = self._postings[ngram] = array("I")
+                postings.append(row)
+            self._maybe_compact()
+
+    def remove(self, keys):
+        """Stop matching deleted issues"""
+        with self._lock:
+            for key in keys:
+                row = self._rows.pop(key, None)
+                if row is not None:
+                    self._alive[row] = 0
+                    self._fingerprints.pop(key, None)
+                    self._dead += 1
+            self._maybe_compact()
+
+    @property
+    def size(self):
+        """Number of stored rows, tombstones included"""
+        return len(self._keys)
+
+    def _maybe_compact(self):
+        # Caller holds the lock
+        if len(self._keys) >= self.COMPACT_MIN_ROWS and self._dead > self.COMPACT_SHARE * len(self._keys):
+            self._compact()
+
+    def _compact(self):
+        """Drop tombstoned rows and renumber the live ones in order (caller holds the lock)"""
+        live = np.flatnonzero(np.frombuffer(self._alive, dtype=np.int8))
+        renumber = np.full(len(self._keys), -1, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        postings = {}
+        for ngram, rows in self._postings.items():
+            rows = renumber[np.frombuffer(rows, dtype=np.uint32)]
+            rows = rows[rows >= 0]
+            if len(rows):
+                # Renumbering keeps the order, so postings stay sorted
+                postings[ngram] = array("I", rows.astype(np.uint32).tobytes())
+        self._postings = postings
+        self._keys = [self._keys[row] for row in live]
+        self._summaries = [self._summaries[row] for row in live]
+        self._sizes = array("f", np.frombuffer(self._sizes, dtype=np.float32)[live].tobytes())
+        self._alive = array("b", bytes([1]) * len(live))
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._dead = 0
+
+    def update(self, issues):
+        """Index issues from a Jira search or issue response"""
+        for issue in issues:
+            fields = issue.get("fields") or {}
+            if issue.get("key") and "summary" in fields:
+                self.add(issue["key"], fields.get("summary") or "", adf_to_text(fields.get("description")))
+
+    def dump_state(self):
+        """Copy of the index for a cache snapshot, or None while it is empty"""
+        with self._lock:
+            if not self._rows:
+                return None
+            if self._dead:
+                self._compact()
+            return {
+                "synced": self.synced,
+                "fingerprints": [self._fingerprints.get(key) for key in self._keys],
+                "keys": list(self._keys),
+                "summaries": list(self._summaries),
+                "sizes": self._sizes.tobytes(),
+                "alive": self._alive.tobytes(),
+                "ngrams": np.fromiter(self._postings, dtype=np.uint32, count=len(self._postings)),
+                "lengths": np.fromiter(map(len, self._postings.values()), dtype=np.uint32,
+                                       count=len(self._postings)),
+                "postings": b"".join(postings.tobytes() for postings in self._postings.values()),
+            }
+
+    def load_state(self, state):
+        """Replace the index's contents with a dump_state() snapshot"""
+        postings = {}
+        data = memoryview(state["postings"])
+        ends = np.cumsum(state["lengths"], dtype=np.int64) * array("I").itemsize
+        start = 0
+        for ngram, end in zip(state["ngrams"].tolist(), ends.tolist()):
+            rows = postings[ngram] = array("I")
+            rows.frombytes(data[start:end])
+            start = end
+        sizes, alive = array("f"), array("b")
+        sizes.frombytes(state["sizes"])
+        alive.frombytes(state["alive"])
+
+        with self._lock:
+            self._postings = postings
+            self._keys = list(state["keys"])
+            self._summaries = list(state["summaries"])
+            self._sizes = sizes
+            self._alive = alive
+            # Re-indexed issues leave tombstoned rows behind; only live rows are looked up by key
+            self._rows = {key: row for row, key in enumerate(self._keys) if alive[row]}
+            fingerprints = state.get("fingerprints") or [None] * len(self._keys)
+            self._fingerprints = {key: fingerprints[row] for key, row in self._rows.items()
+                                  if fingerprints[row] is not None}
+            self._dead = len(self._keys) - len(self._rows)
+            self.synced = state["synced"]
+
+    def find(self, summary, description="", threshold=None, exclude=()):
+        """Return the best matching existing issue as a dict, or None"""
+        threshold = settings.DUPLICATE_TICKET_THRESHOLD if threshold is None else threshold
+        ids = set(shingle_ids(f"{summary} {description}"))
+        if not ids or threshold > 1:
+            return None
+
+        with self._lock:
+            postings = sorted(
+                (np.frombuffer(self._postings[i], dtype=np.uint32) for i in ids if i in self._postings),
+                key=len
+            )
+            if not postings:
+                return None
+
+            # Prefix filter: a match at cosine >= t must share at least one of the
+            # query's (1 - t^2)|q| + 1 rarest n-grams, so only their postings
+            # produce candidates. Postings are sorted, so the exact overlap of each
+            # candidate is then counted with a binary search per n-gram.
+            prefix = int((1 - max(threshold, 0) ** 2) * len(ids)) + 1
+            candidates = np.unique(np.concatenate(postings[:prefix]))
+            if len(candidates) * 8 > len(self._keys):
+                # Unselective query: one bincount over all postings is cheaper
+                overlap = np.bincount(np.concatenate(postings), minlength=len(self._keys)).astype(np.float32)
+                candidates = np.arange(len(self._keys))
+            else:
+                overlap = np.zeros(len(candidates), dtype=np.float32)
+                for posting in postings:
+                    positions = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                    overlap += posting[positions] == candidates
+
+            sizes = np.frombuffer(self._sizes, dtype=np.float32)[candidates]
+            alive = np.frombuffer(self._alive, dtype=np.int8)[candidates]
+            # Cosine similarity between binary n-gram sets
+            scores = overlap / np.sqrt(np.maximum(sizes, 1.0) * len(ids))
+            scores[alive == 0] = 0.0
+            excluded = [self._rows[key] for key in exclude if key in self._rows]
+            if excluded:
+                scores[np.isin(candidates, excluded)] = 0.0
+
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            row = int(candidates[best])
+            return {"key": self._keys[row], "summary": self._summaries[row], "similarity": round(float(scores[best]), 3)}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_issue_index(project_key):
+    """Return the process-wide similarity index for a project"""
+    with _indexes_lock:
+        index = _indexes.get(project_key)
+        if index is None:
+            index = _indexes[project_key] = IssueSimilarityIndex()
+            state = restore_snapshot(f"index:{project_key}")
+            if state is not None:
+                index.load_state(state)
+        return index
+
+
+def issue_indexes():
+    """Every similarity index created by this process, by project"""
+    with _indexes_lock:
+        return dict(_indexes)
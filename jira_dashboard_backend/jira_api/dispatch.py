@@ -0,0 +1,156 @@
+# jira_api/dispatch.py
+# Spreads concurrent Gemini calls across every configured API key.
+from contextlib import contextmanager
+import threading
+import time
+import logging
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+from django.conf import settings
+
+from . import metrics
+from .deadline import expired as deadline_expired
+
+logger = logging.getLogger(__name__)
+
+
+class NoKeyAvailable(Exception):
+    """No API key can take the call (all excluded, or the wait timed out)"""
+
+
+class GeminiKey:
+    """One API key with its own client, so calls never touch genai.configure's global state"""
+
+    def __init__(self, index, api_key, model_name, max_concurrency):
+        self.index = index
+        self.api_key = api_key
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"GeminiKey({self.index}, in_flight={self.in_flight})"
+
+    @property
+    def model(self):
+        """GenerativeModel bound to this key's private client.
+
+        genai has no public way to give one model its own client: a
+        GenerativeModel sends through its _client attribute when it is set.
+        That is true of the google-generativeai version pinned in
+        requirements.txt, and tests.test_dispatch checks it.
+        """
+        with self._model_lock:
+            if self._model is None:
+                model = genai.GenerativeModel(self.model_name)
+                if not hasattr(model, "_client"):
+                    raise RuntimeError(f"google-generativeai {genai.__version__} has no GenerativeModel._client; "
+                                       f"install the version pinned in requirements.txt")
+                model._client = glm.GenerativeServiceClient(client_options={"api_key": self.api_key})
+                self._model = model
+            return self._model
+
+    def available(self, now):
+        return self.in_flight < self.max_concurrency and now >= self.cooldown_until
+
+
+class KeyDispatcher:
+    """Hands out API keys to concurrent callers.
+
+    Each call takes the least-loaded healthy key that still has a free slot
+    (ties rotate round-robin), so N keys serve up to N times the
+    concurrency of one. Keys that fail are cooled down for a while; callers
+    wait when every key is busy or cooling down.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+        self._condition = threading.Condition()
+        self._turn = 0
+
+    def acquire(self, exclude=(), timeout=None):
+        """Reserve a slot on the best available key, waiting for one if necessary"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        usable = [key for key in self.keys if key not in exclude]
+        if not usable:
+            raise NoKeyAvailable("Every API key is excluded for this call")
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                candidates = [key for key in usable if key.available(now)]
+                if candidates:
+                    self._turn += 1
+                    key = min(candidates, key=lambda k: (k.in_flight / k.max_concurrency,
+                                                         (k.index - self._turn) % len(self.keys)))
+                    key.in_flight += 1
+                    return key
+
+                # Sleep until a slot is released or the first cooldown ends
+                wait = min((key.cooldown_until - now for key in usable if key.cooldown_until > now), default=None)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise NoKeyAvailable("Timed out waiting for a free API key")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def release(self, key, error=None):
+        """Return a key's slot; a failed call puts the key into cooldown"""
+        with self._condition:
+            key.in_flight -= 1
+            if error is None:
+                key.failures = 0
+            else:
+                key.failures += 1
+                quota = "429" in str(error) or "quota" in str(error).lower()
+                base = settings.GEMINI_QUOTA_COOLDOWN if quota else settings.GEMINI_ERROR_COOLDOWN
+                cooldown = min(base * 2 ** (key.failures - 1), settings.GEMINI_MAX_COOLDOWN)
+                key.cooldown_until = time.monotonic() + cooldown
+                logger.warning(f"Gemini key {key.index} cooling down for {cooldown:.1f}s after: {error}")
+            self._condition.notify_all()
+        metrics.increment("gemini_requests_total", key=str(key.index), outcome="error" if error else "success")
+
+    @contextmanager
+    def slot(self, exclude=(), timeout=None):
+        """Context manager around acquire/release; errors raised inside count as key failures"""
+        key = self.acquire(exclude, timeout)
+        error = None
+        try:
+            yield key
+        except Exception as e:
+            # A call cut short by the request's own deadline says nothing about the key
+            error = None if deadline_expired() else e
+            raise
+        finally:
+            # Also runs when a streaming caller is closed mid-stream (GeneratorExit)
+            self.release(key, error)
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def configured_api_keys():
+    """Every configured Gemini API key, without duplicates"""
+    keys = [key for key in (settings.GEMINI_API_KEY1, settings.GEMINI_API_KEY2) if key]
+    keys += [key.strip() for key in settings.GEMINI_API_KEYS.split(",") if key.strip()]
+    return list(dict.fromkeys(keys))
+
+
+def get_dispatcher(api_keys=None, model_name=None):
+    """Return the process-wide dispatcher for a set of keys and a model"""
+    api_keys = tuple(configured_api_keys() if api_keys is None else api_keys) or (None,)
+    model_name = model_name or settings.GEMINI_MODEL
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get((api_keys, model_name))
+        if dispatcher is None:
+            keys = [GeminiKey(i, api_key, model_name, settings.GEMINI_KEY_CONCURRENCY)
+                    for i, api_key in enumerate(api_keys)]
+            dispatcher = _dispatchers[(api_keys, model_name)] = KeyDispatcher(keys)
+        return dispatcher
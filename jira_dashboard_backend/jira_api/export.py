@@ -0,0 +1,82 @@
+# jira_api/export.py
+# Row formatting for the streaming issue export.
+import csv
+import json
+
+from .adf import adf_to_text
+
+
+def _name(field):
+    return lambda fields: (fields.get(field) or {}).get("name", "")
+
+
+def _person(field):
+    return lambda fields: (fields.get(field) or {}).get("displayName", "")
+
+
+def _value(field):
+    return lambda fields: fields.get(field) or ""
+
+
+# Exportable column -> (Jira field to request, extractor over issue["fields"])
+EXPORT_FIELDS = {
+    "summary": ("summary", _value("summary")),
+    "status": ("status", _name("status")),
+    "status_category": ("status", lambda fields: ((fields.get("status") or {}).get("statusCategory") or {}).get("name", "")),
+    "issuetype": ("issuetype", _name("issuetype")),
+    "priority": ("priority", _name("priority")),
+    "assignee": ("assignee", _person("assignee")),
+    "reporter": ("reporter", _person("reporter")),
+    "created": ("created", _value("created")),
+    "updated": ("updated", _value("updated")),
+    "resolutiondate": ("resolutiondate", _value("resolutiondate")),
+    "labels": ("labels", lambda fields: ",".join(fields.get("labels") or [])),
+    "parent": ("parent", lambda fields: (fields.get("parent") or {}).get("key", "")),
+    "description": ("description", lambda fields: adf_to_text(fields.get("description")).strip()),
+}
+
+DEFAULT_EXPORT_FIELDS = ["key", "summary", "status", "issuetype", "priority", "assignee", "created", "updated"]
+
+
+def parse_export_fields(value):
+    """Turn a comma-separated ?fields= value into a validated column list"""
+    if not value:
+        return list(DEFAULT_EXPORT_FIELDS)
+    columns = [column.strip() for column in value.split(",") if column.strip()]
+    unknown = [column for column in columns if column != "key" and column not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown)}. "
+                         f"Available: key, {', '.join(EXPORT_FIELDS)}")
+    return columns
+
+
+def jira_fields(columns):
+    """Jira field list needed to produce the given columns"""
+    return ",".join(sorted({EXPORT_FIELDS[column][0] for column in columns if column != "key"})) or "summary"
+
+
+def export_row(issue, columns):
+    """Flatten one Jira issue into the requested columns"""
+    fields = issue.get("fields") or {}
+    return [issue.get("key", "") if column == "key" else EXPORT_FIELDS[column][1](fields) for column in columns]
+
+
+class _Echo:
+    """File-like object whose write() returns the value, so csv.writer yields strings"""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(pages, columns):
+    """Yield CSV text: a header, then one chunk per page of issues"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for page in pages:
+        yield "".join(writer.writerow(export_row(issue, columns)) for issue in page)
+
+
+def ndjson_chunks(pages, columns):
+    """Yield newline-delimited JSON, one chunk per page of issues"""
+    for page in pages:
+        yield "".join(json.dumps(dict(zip(columns, export_row(issue, columns)))) + "\n" for issue in page)
@@ -0,0 +1,79 @@
+# jira_api/fastjson.py
+# JSON encoding and decoding on orjson when it is installed, with DRF renderer/parser classes.
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+# DRF's encoder formats what neither encoder handles natively (datetimes the DRF
+# way, decimals, UUIDs, lazy strings, querysets...)
+_drf_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def orjson_enabled():
+    return orjson is not None and settings.JSON_BACKEND != "stdlib"
+
+
+def loads(data):
+    """Decode JSON from bytes or str"""
+    if orjson_enabled():
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value):
+    """Encode to compact UTF-8 JSON bytes, producing what DRF's JSONRenderer would"""
+    if orjson_enabled():
+        return orjson.dumps(value, default=_drf_encoder.default, option=ORJSON_OPTIONS)
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class RawJSON:
+    """Already-serialised JSON (an upstream body or cached bytes) that FastJSONRenderer sends as is"""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson and passes RawJSON through without re-encoding.
+
+    Requests for indented output (Accept: application/json; indent=4) go to
+    the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, RawJSON):
+            return data.content
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if not orjson_enabled() or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,115 @@
+# jira_api/health.py
+# Background reachability probes for Jira and Gemini, served from memory by /api/health/.
+import threading
+import time
+import logging
+
+import google.ai.generativelanguage as glm
+from django.conf import settings
+
+from .dispatch import get_dispatcher
+from .services import get_jira_service
+from .transport import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+STATUS_STARTING = "starting"
+STATUS_OK = "ok"
+STATUS_DEGRADED = "degraded"
+STATUS_DOWN = "down"
+
+
+class HealthProber:
+    """Keeps a recent snapshot of Jira and Gemini reachability and latency.
+
+    The first get() starts a daemon thread that probes every
+    HEALTH_CHECK_INTERVAL seconds; callers only ever read the last result,
+    so health checks cost nothing upstream however often they arrive.
+    Jira being unreachable makes the service "down"; Gemini only
+    "degraded", since issue browsing still works without it.
+    """
+
+    def __init__(self, jira=None, interval=None, timeout=None):
+        self.jira = jira or get_jira_service()
+        self.interval = settings.HEALTH_CHECK_INTERVAL if interval is None else interval
+        self.timeout = settings.HEALTH_CHECK_TIMEOUT if timeout is None else timeout
+        # One attempt with a short timeout: a probe reports, it does not retry
+        self.retry_policy = RetryPolicy(max_retries=0, budget=self.timeout, timeout=self.timeout)
+        self._result = None
+        self._model_client = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self):
+        """The latest probe result, or None before the first probe has finished"""
+        self._ensure_started()
+        with self._lock:
+            return self._result
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            result = self.probe()
+            with self._lock:
+                self._result = result
+            time.sleep(self.interval)
+
+    def probe(self):
+        """Run every check once"""
+        checks = {"jira": self._check(self._probe_jira), "gemini": self._check(self._probe_gemini)}
+        if not checks["jira"]["ok"]:
+            status = STATUS_DOWN
+        else:
+            status = STATUS_OK if checks["gemini"]["ok"] else STATUS_DEGRADED
+        return {"status": status, "checked_at": time.time(), "checks": checks}
+
+    def _check(self, probe):
+        started = time.monotonic()
+        try:
+            result = {"ok": True, **(probe() or {})}
+        except Exception as e:
+            logger.warning(f"Health probe {probe.__name__} failed: {e}")
+            result = {"ok": False, "error": str(e)}
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return result
+
+    def _probe_jira(self):
+        url = f"{self.jira.base_url}/rest/api/3/myself"
+        # Past the outbound scheduler: a probe queued behind busy workers would time out and
+        # report Jira down when it is only this process that is saturated
+        response = self.jira.request("GET", url, "health", retry_policy=self.retry_policy, scheduled=False)
+        response.raise_for_status()
+
+    def _probe_gemini(self):
+        """Fetch the model's metadata: proves the key and endpoint work without spending generation quota"""
+        if settings.GEMINI_BACKEND == "stub":
+            return {"backend": "stub"}
+        dispatcher = get_dispatcher()
+        key = dispatcher.keys[0]
+        if not key.api_key:
+            raise Exception("No Gemini API key is configured")
+        if self._model_client is None:
+            self._model_client = glm.ModelServiceClient(client_options={"api_key": key.api_key})
+        name = key.model_name if key.model_name.startswith("models/") else f"models/{key.model_name}"
+        self._model_client.get_model(name=name, timeout=self.timeout)
+        now = time.monotonic()
+        return {"keys": len(dispatcher.keys),
+                "keys_cooling_down": sum(1 for k in dispatcher.keys if k.cooldown_until > now)}
+
+
+_prober = None
+_prober_lock = threading.Lock()
+
+
+def get_prober():
+    """Return the process-wide health prober"""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            _prober = HealthProber()
+        return _prober
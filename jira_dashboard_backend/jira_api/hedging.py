@@ -0,0 +1,172 @@
+# jira_api/hedging.py
+# Hedged Gemini calls: a slow call gets a duplicate on another key or model.
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
+import random
+import threading
+import time
+import logging
+
+from django.conf import settings
+
+from . import metrics
+from .deadline import propagate
+
+logger = logging.getLogger(__name__)
+
+# Latency of single attempts that ran to completion; the hedge threshold comes from these
+ATTEMPT_LATENCY = "gemini_attempt_seconds"
+# End-to-end latency of hedged-mode calls, and of the held-out calls that are never hedged
+CALL_LATENCY = "gemini_call_seconds"
+UNHEDGED_LATENCY = "gemini_unhedged_seconds"
+
+
+class Hedger:
+    """Decides when to hedge and keeps hedging within budget.
+
+    A call is hedged once its primary attempt has been running longer than
+    the configured percentile of recent attempt latencies. At most
+    GEMINI_HEDGE_BUDGET of calls (as a fraction) may send a hedge, which
+    bounds the extra quota used to that fraction, and hedges run on their
+    own GEMINI_HEDGE_WORKERS threads. A GEMINI_HEDGE_HOLDOUT fraction of
+    calls is never hedged, so what hedging gains is measured against them.
+    """
+
+    def __init__(self, percentile=None, budget=None, min_delay=None, initial_delay=None, min_samples=None,
+                 workers=None, holdout=None):
+        self.percentile = settings.GEMINI_HEDGE_PERCENTILE if percentile is None else percentile
+        self.budget = settings.GEMINI_HEDGE_BUDGET if budget is None else budget
+        self.min_delay = settings.GEMINI_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.initial_delay = settings.GEMINI_HEDGE_INITIAL_DELAY if initial_delay is None else initial_delay
+        self.min_samples = settings.GEMINI_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.workers = settings.GEMINI_HEDGE_WORKERS if workers is None else workers
+        self.holdout = settings.GEMINI_HEDGE_HOLDOUT if holdout is None else holdout
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+        self._hedge_slots = threading.BoundedSemaphore(self.workers)
+        self._primary_executor = None
+        self._hedge_executor = None
+
+    def threshold(self):
+        """Seconds to wait for the primary attempt before hedging"""
+        observed = metrics.percentile(ATTEMPT_LATENCY, self.percentile, minimum_samples=self.min_samples)
+        return max(self.min_delay, self.initial_delay if observed is None else observed)
+
+    def try_hedge(self):
+        """Spend one hedge from the budget if there is one left and a hedge worker is free"""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls or not self._hedge_slots.acquire(blocking=False):
+                metrics.increment("gemini_hedges_denied_total")
+                return False
+            self.hedges += 1
+        metrics.increment("gemini_hedges_total")
+        return True
+
+    def _executors(self):
+        with self._lock:
+            if self._primary_executor is None:
+                self._primary_executor = ThreadPoolExecutor(thread_name_prefix="gemini-primary")
+                # A hedge only runs once a worker is free for it, so it never queues behind other calls
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gemini-hedge")
+            return self._primary_executor, self._hedge_executor
+
+    def run(self, primary, hedge):
+        """Run primary(cancelled, keys); if it is slow, race hedge(cancelled, keys) against it.
+
+        Both callables get a threading.Event that is set once the call has
+        been answered, so the loser stops consuming its stream, and a list
+        they can append their key to (so the hedge avoids the primary's key).
+        The first successful result wins; if both fail, the last error is raised.
+        """
+        with self._lock:
+            self.calls += 1
+        metrics.increment("gemini_hedged_mode_calls_total")
+        started = time.monotonic()
+        cancelled = threading.Event()
+        primary_keys = []
+        if random.random() < self.holdout:
+            # Held out: never hedged, so these calls measure the latency without hedging
+            metrics.increment("gemini_hedge_holdout_calls_total")
+            text = primary(cancelled, primary_keys)
+            metrics.observe(UNHEDGED_LATENCY, time.monotonic() - started)
+            return text
+
+        primary_executor, hedge_executor = self._executors()
+        began = threading.Event()
+
+        def timed_primary(*args):
+            began.set()
+            return primary(*args)
+        primary_future = primary_executor.submit(propagate(timed_primary), cancelled, primary_keys)
+
+        # The hedge delay runs from when the primary starts, not from when it was queued
+        began.wait()
+        try:
+            text = primary_future.result(timeout=self.threshold())
+            self._record(started, started, winner="primary")
+            return text
+        except FuturesTimeout:
+            pass
+        if not self.try_hedge():
+            text = primary_future.result()
+            self._record(started, started, winner="primary")
+            return text
+
+        hedge_started = time.monotonic()
+        hedge_future = hedge_executor.submit(propagate(hedge), cancelled, primary_keys)
+        hedge_future.add_done_callback(lambda future: self._hedge_slots.release())
+        pending = {primary_future: "primary", hedge_future: "hedge"}
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                role = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                cancelled.set()
+                self._record(started, hedge_started, winner=role)
+                return text
+        raise error
+
+    def _record(self, started, hedge_started, winner):
+        """Record end-to-end latency and which attempt answered"""
+        now = time.monotonic()
+        metrics.observe(CALL_LATENCY, now - started)
+        if winner == "hedge":
+            metrics.increment("gemini_hedge_wins_total")
+            logger.info(f"Hedged Gemini call answered by the hedge after {now - started:.2f}s "
+                        f"(hedged at {hedge_started - started:.2f}s)")
+
+    def stats(self):
+        """Hedge rate and the p99 latency hedging saved, measured against the held-out calls"""
+        with self._lock:
+            calls, hedges = self.calls, self.hedges
+        p99 = metrics.percentile(CALL_LATENCY, 99, minimum_samples=self.min_samples)
+        p99_unhedged = metrics.percentile(UNHEDGED_LATENCY, 99, minimum_samples=self.min_samples)
+        return {
+            "calls": calls,
+            "hedges": hedges,
+            "hedge_rate": round(hedges / calls, 4) if calls else 0.0,
+            "hedge_wins": metrics.value("gemini_hedge_wins_total"),
+            "holdout_calls": metrics.value("gemini_hedge_holdout_calls_total"),
+            "threshold_seconds": round(self.threshold(), 3),
+            "p99_seconds": p99,
+            "p99_unhedged_seconds": p99_unhedged,
+            "p99_gained_seconds": round(p99_unhedged - p99, 3) if None not in (p99, p99_unhedged) else None,
+        }
+
+
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger():
+    """Return the process-wide hedger (the hedge budget is shared by every call)"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
@@ -0,0 +1,36 @@
+# jira_api/management/commands/benchmark_gemini_keys.py
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand
+
+from jira_api.services import GeminiService
+from jira_api.stubs import StubGenerativeModel
+
+
+class Command(BaseCommand):
+    help = "Measure Gemini call throughput as keys are added to the dispatcher (stub models, no network)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', default="1,2,4", help="Comma-separated key counts to compare")
+        parser.add_argument('--calls', type=int, default=64, help="Calls per run")
+        parser.add_argument('--clients', type=int, default=32, help="Concurrent callers")
+        parser.add_argument('--per-key', type=int, default=2, help="Concurrent calls allowed per key")
+        parser.add_argument('--latency', type=float, default=0.2, help="Stub model latency (s)")
+
+    def handle(self, *args, **options):
+        baseline = None
+        for count in [int(c) for c in options['keys'].split(",")]:
+            gemini = GeminiService(api_keys=[f"benchmark-{count}-{i}" for i in range(count)])
+            for key in gemini.dispatcher.keys:
+                key._model = StubGenerativeModel(options['latency'])
+                key.max_concurrency = options['per_key']
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+                list(pool.map(lambda i: gemini._generate_uncached(f"prompt {i}"), range(options['calls'])))
+            throughput = options['calls'] / (time.perf_counter() - start)
+
+            baseline = baseline or throughput / count
+            self.stdout.write(f"{count} key(s): {throughput:6.1f} calls/s "
+                              f"({throughput / baseline:.2f}x a single key)")
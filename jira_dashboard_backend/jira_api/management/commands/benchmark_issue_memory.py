@@ -0,0 +1,136 @@
+# jira_api/management/commands/benchmark_issue_memory.py
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from jira_api.records import IssueRecord
+from jira_api.store import IssueStore
+
+SITE = "https://example.atlassian.net"
+STATUSES = [("To Do", "new", "blue-gray"), ("In Progress", "indeterminate", "yellow"), ("Done", "done", "green")]
+ISSUE_TYPES = ["Task", "Bug", "Story", "Subtask"]
+PRIORITIES = ["Highest", "High", "Medium", "Low"]
+
+
+def _user(n):
+    account = f"5b10a2844c20165700ede{n:03d}"
+    return {
+        "self": f"{SITE}/rest/api/3/user?accountId={account}",
+        "accountId": account,
+        "emailAddress": f"user{n}@example.com",
+        "avatarUrls": {size: f"https://avatar-management.example.net/{account}/{size}.png"
+                       for size in ("48x48", "24x24", "16x16", "32x32")},
+        "displayName": f"User {n}",
+        "active": True,
+        "timeZone": "Europe/London",
+        "accountType": "atlassian",
+    }
+
+
+def jira_issue(number, rng):
+    """An issue shaped like a /rest/api/3/search result with the dashboard's fields"""
+    status, category, color = rng.choice(STATUSES)
+    issue_type = rng.choice(ISSUE_TYPES)
+    priority = rng.choice(PRIORITIES)
+    words = " ".join(rng.choice(("login", "page", "api", "cache", "report", "export", "user", "flow"))
+                     for _ in range(8))
+    return {
+        "expand": "operations,versionedRepresentations,editmeta,changelog,renderedFields",
+        "id": str(10000 + number),
+        "self": f"{SITE}/rest/api/3/issue/{10000 + number}",
+        "key": f"BENCH-{number}",
+        "fields": {
+            "summary": f"Issue {number}: {words}",
+            "status": {
+                "self": f"{SITE}/rest/api/3/status/{category}",
+                "description": "",
+                "iconUrl": f"{SITE}/images/icons/statuses/generic.png",
+                "name": status,
+                "id": str(STATUSES.index((status, category, color)) + 1),
+                "statusCategory": {"self": f"{SITE}/rest/api/3/statuscategory/{category}", "id": 2,
+                                   "key": category, "colorName": color, "name": status},
+            },
+            "issuetype": {
+                "self": f"{SITE}/rest/api/3/issuetype/{issue_type}",
+                "id": str(ISSUE_TYPES.index(issue_type) + 10001),
+                "description": f"A {issue_type.lower()}",
+                "iconUrl": f"{SITE}/rest/api/2/universal_avatar/view/type/issuetype/avatar/10318?size=medium",
+                "name": issue_type,
+                "subtask": issue_type == "Subtask",
+                "avatarId": 10318,
+                "hierarchyLevel": -1 if issue_type == "Subtask" else 0,
+            },
+            "priority": {"self": f"{SITE}/rest/api/3/priority/{priority}",
+                         "iconUrl": f"{SITE}/images/icons/priorities/{priority.lower()}.svg",
+                         "name": priority, "id": str(PRIORITIES.index(priority) + 1)},
+            "assignee": _user(rng.randrange(50)) if rng.random() < 0.8 else None,
+            "reporter": _user(rng.randrange(50)),
+            "created": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:15:{rng.randint(0, 59):02d}.000+0000",
+            "updated": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T16:40:{rng.randint(0, 59):02d}.000+0000",
+            "description": {"type": "doc", "version": 1, "content": [
+                {"type": "paragraph", "content": [{"type": "text", "text": f"As a user I want {words}."}]},
+                {"type": "paragraph", "content": [{"type": "text", "text": "Acceptance: works as described."}]},
+            ]},
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure the per-issue memory of raw Jira JSON, IssueRecord and the columnar IssueStore"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100000, help="Issues to hold in memory")
+        parser.add_argument('--page-size', type=int, default=100, help="Issues per search page")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        count, page_size = options['issues'], options['page_size']
+        rng = random.Random(options['seed'])
+        # Serialised pages, so every representation is parsed from fresh JSON like a real response
+        pages = [json.dumps({"issues": [jira_issue(n, rng) for n in range(start, min(start + page_size, count))]})
+                 for start in range(0, count, page_size)]
+        self.stdout.write(f"{count} issues, {sum(map(len, pages)) / count:.0f} bytes of JSON each")
+
+        def raw():
+            return {issue["key"]: issue for page in pages for issue in json.loads(page)["issues"]}
+
+        def records():
+            return {issue["key"]: IssueRecord.from_jira(issue) for page in pages for issue in json.loads(page)["issues"]}
+
+        def store():
+            issue_store = IssueStore("BENCH")
+            for page in pages:
+                issue_store.upsert(json.loads(page)["issues"])
+            return issue_store
+
+        results = {}
+        for label, build in (("raw dicts", raw), ("IssueRecord", records), ("IssueStore", store)):
+            size = results[label] = self._measure(build)
+            self.stdout.write(f"{label:>12}: {size / count:8.0f} bytes/issue  {size / 2 ** 20:8.1f} MiB total")
+
+        parsed = [issue for page in pages for issue in json.loads(page)["issues"]]
+        started = time.perf_counter()
+        for issue in parsed:
+            IssueRecord.from_jira(issue)
+        self.stdout.write(f"IssueRecord.from_jira: {(time.perf_counter() - started) / count * 1e6:.1f} us/issue")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"IssueRecord holds issues in {results['IssueRecord'] / results['raw dicts']:.1%} of the raw JSON "
+            f"memory ({results['raw dicts'] / results['IssueRecord']:.1f}x smaller)"))
+
+    def _measure(self, build):
+        """Memory retained by build()'s result, excluding parsing garbage"""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = build()
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del result
+        return size
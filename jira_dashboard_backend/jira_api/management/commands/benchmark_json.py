@@ -0,0 +1,56 @@
+# jira_api/management/commands/benchmark_json.py
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from jira_api import fastjson
+from jira_api.fastjson import FastJSONRenderer, RawJSON
+from jira_api.management.commands.benchmark_issue_memory import jira_issue
+
+
+class Command(BaseCommand):
+    help = "Compare stdlib JSON with DRF, orjson with FastJSONRenderer, and raw pass-through on issue payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,100,5000', help="Comma-separated issues per payload")
+        parser.add_argument('--rounds', type=int, default=0,
+                            help="Repetitions per payload (default: about 50k issues' worth)")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if fastjson.orjson is None:
+            raise CommandError("orjson is not installed (pip install orjson)")
+        rng = random.Random(options['seed'])
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+
+        for size in (int(s) for s in options['sizes'].split(',')):
+            # A Jira response body exactly as it arrives from upstream
+            body = json.dumps({"startAt": 0, "maxResults": size, "total": size,
+                               "issues": [jira_issue(n, rng) for n in range(size)]}).encode()
+            rounds = options['rounds'] or max(3, 50000 // size)
+            self.stdout.write(f"\n{size} issues, {len(body) / 1024:.0f} KiB, {rounds} rounds")
+
+            def pass_through():
+                # Still decoded for pagination and validators, but never re-encoded
+                fastjson.orjson.loads(body)
+                return fast.render(RawJSON(body))
+
+            paths = (
+                ("stdlib json + JSONRenderer", lambda: stock.render(json.loads(body))),
+                ("orjson + FastJSONRenderer", lambda: fast.render(fastjson.orjson.loads(body))),
+                ("orjson + raw pass-through", pass_through),
+                ("cached bytes", lambda: fast.render(RawJSON(body))),
+            )
+            baseline = None
+            for label, run in paths:
+                assert json.loads(run()) == json.loads(body)
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    run()
+                elapsed = (time.perf_counter() - started) / rounds
+                baseline = baseline or elapsed
+                self.stdout.write(f"{label:>28}: {elapsed * 1000:9.3f} ms/payload  "
+                                  f"{len(body) / elapsed / 2 ** 20:9.0f} MiB/s  {baseline / elapsed:7.1f}x")
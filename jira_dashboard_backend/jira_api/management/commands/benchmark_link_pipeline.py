@@ -0,0 +1,53 @@
+# jira_api/management/commands/benchmark_link_pipeline.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from jira_api.services import AutomationService
+from jira_api.stubs import StubJiraService, StubGeminiService
+
+
+class Command(BaseCommand):
+    help = "Compare inline issue linking with the background link pipeline on a stub Jira"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5, help="Development tasks per workflow")
+        parser.add_argument('--tests', type=int, default=3, help="Test cases per development task")
+        parser.add_argument('--latency', type=float, default=0.05, help="Stub Jira create latency (s)")
+        parser.add_argument('--link-latency', type=float, default=0.3, help="Stub Jira link latency (s)")
+        parser.add_argument('--workers', type=int, default=4, help="Link pipeline workers")
+        parser.add_argument('--runs', type=int, default=3, help="Workflow runs per mode")
+
+    def handle(self, *args, **options):
+        results = {}
+        for label, workers in (("inline", 0), ("pipeline", options['workers'])):
+            timings = []
+            for i in range(options['runs']):
+                timings.append(self._run_workflow(workers, f"benchmark {label} {i}", options))
+            results[label] = statistics.median(timings)
+            self.stdout.write(f"{label:>8}: median {results[label]:.3f}s over {options['runs']} runs "
+                              f"(workers={workers})")
+
+        saved = results["inline"] - results["pipeline"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Link pipeline removed {saved:.3f}s ({saved / results['inline']:.0%}) from the workflow critical path"))
+
+    def _run_workflow(self, workers, requirement, options):
+        """Run one workflow against fresh stubs, rolling back its checkpoints"""
+        jira = StubJiraService(latency=options['latency'], link_latency=options['link_latency'])
+        gemini = StubGeminiService(task_count=options['tasks'], test_count=options['tests'])
+        automation = AutomationService(jira=jira, gemini=gemini)
+        automation.DEV_TASK_DELAY = automation.TEST_CASE_DELAY = automation.CREATE_DELAY = 0
+
+        with override_settings(JIRA_LINK_WORKERS=workers), transaction.atomic():
+            start = time.perf_counter()
+            result = automation.create_automated_workflow(requirement)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        if result["errors"]:
+            self.stderr.write(f"Workflow reported errors: {result['errors']}")
+        return elapsed
@@ -0,0 +1,45 @@
+# jira_api/management/commands/flush_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jira_api.models import OutboxEntry
+from jira_api.outbox import OutboxFlusher, outbox_stats
+
+
+class Command(BaseCommand):
+    help = "Send the Jira creates and links waiting in the outbox, then report what is left"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Queue permanently failed entries (and their dependents) again first")
+        parser.add_argument('--now', action='store_true', help="Ignore retry backoff and send every pending entry")
+        parser.add_argument('--wait', type=float, default=0,
+                            help="Keep flushing for up to this many seconds until nothing is pending")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = OutboxEntry.objects.filter(status=OutboxEntry.STATUS_FAILED).update(
+                status=OutboxEntry.STATUS_PENDING, attempts=0, error="", next_attempt_at=timezone.now())
+            self.stdout.write(f"Queued {requeued} failed entries again")
+
+        if options['now']:
+            OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING).update(next_attempt_at=timezone.now())
+
+        flusher = OutboxFlusher()
+        deadline = time.monotonic() + options['wait']
+        sent = 0
+        while True:
+            attempted = flusher.flush()
+            sent += attempted
+            if attempted:
+                continue
+            if not OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING).exists() \
+                    or time.monotonic() >= deadline:
+                break
+            time.sleep(min(flusher.interval, max(0.0, deadline - time.monotonic())))
+
+        stats = outbox_stats()
+        self.stdout.write(f"Attempted {sent} entries: {stats['pending']} pending, {stats['failed']} failed, "
+                          f"{stats['sent']} sent")
@@ -0,0 +1,350 @@
+# jira_api/management/commands/loadtest.py
+import collections
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jira_api.stubs import StubJiraServer
+
+# Endpoint name -> (method, path); {key} is filled with an existing issue key
+ENDPOINTS = {
+    "issues": ("GET", "/api/issues/"),
+    "detail": ("GET", "/api/issues/{key}/"),
+    "test": ("GET", "/api/test/"),
+    "generate-tasks": ("POST", "/api/automation/generate-tasks/"),
+    "generate-tests": ("POST", "/api/automation/generate-tests/"),
+    "workflow": ("POST", "/api/automation/workflow/"),
+}
+
+DEFAULT_MIX = "issues=40,detail=30,test=10,generate-tasks=8,generate-tests=8,workflow=4"
+
+PERCENTILES = (50, 90, 95, 99)
+
+# A stage is past saturation when it adds under 10% throughput, doubles the
+# first stage's p95, or fails more than 1% of requests
+SATURATION_MIN_GAIN = 0.10
+SATURATION_P95_FACTOR = 2.0
+SATURATION_MAX_ERROR_RATE = 0.01
+
+
+def parse_mix(value):
+    """Parse 'issues=40,detail=30,...' into {endpoint: weight}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint {name!r} in --mix. Available: {', '.join(ENDPOINTS)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight for {name} in --mix: {weight!r}")
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def failure(response):
+    """Why a response counts as failed, or None: an error status, a 207, or a JSON body listing errors"""
+    if response.status_code >= 400 or response.status_code == 207:
+        return f"HTTP {response.status_code}"
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            body = response.json()
+        except ValueError:
+            return f"HTTP {response.status_code} with an invalid JSON body"
+        if isinstance(body, dict) and body.get("errors"):
+            return f"HTTP {response.status_code} with errors"
+    return None
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles, error rate and throughput for a list of (latency, ok) samples"""
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    errors = sum(1 for _, ok in samples if not ok)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+    }
+    if len(samples):
+        for percentile, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            summary[f"p{percentile}"] = float(value)
+        summary["max"] = float(latencies.max())
+    return summary
+
+
+class Command(BaseCommand):
+    help = ("Load test the API endpoints against a stub Jira/Gemini and report latency percentiles, "
+            "error rates and the saturation point, for WSGI (gunicorn) and/or ASGI (uvicorn) deployments")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=['wsgi', 'asgi', 'both'], default='both',
+                            help="Deployment(s) to start and test")
+        parser.add_argument('--target', help="Test an already running deployment at this URL instead "
+                                             "(it must be configured against a stub or test Jira)")
+        parser.add_argument('--workers', type=int, default=2, help="Server worker processes")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per gunicorn worker")
+        parser.add_argument('--concurrency', default="1,4,16,32",
+                            help="Comma-separated concurrent clients, one stage each")
+        parser.add_argument('--rate', type=float, default=0,
+                            help="Requests/s offered per stage (0 = each client sends as fast as it can)")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per stage")
+        parser.add_argument('--mix', default=DEFAULT_MIX, help="Endpoint weights, e.g. issues=3,detail=1")
+        parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout (s)")
+        parser.add_argument('--jira-latency', type=float, default=0.05, help="Stub Jira latency per call (s)")
+        parser.add_argument('--gemini-latency', type=float, default=0.5, help="Stub Gemini latency per call (s)")
+        parser.add_argument('--seed-issues', type=int, default=500, help="Issues the stub Jira starts with")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        try:
+            stages = [int(c) for c in options['concurrency'].split(",") if c.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        if not stages or min(stages) < 1:
+            raise CommandError("--concurrency needs at least one positive value")
+
+        if options['target']:
+            self._test_deployment(options['target'].rstrip("/"), "target", stages, mix, options)
+            return
+
+        stub = StubJiraServer(latency=options['jira_latency'], seed_issues=options['seed_issues']).start()
+        self.stdout.write(f"Stub Jira listening on {stub.url} with {options['seed_issues']} issues")
+        try:
+            kinds = ['wsgi', 'asgi'] if options['server'] == 'both' else [options['server']]
+            reports = {}
+            for kind in kinds:
+                with tempfile.TemporaryDirectory(prefix=f"loadtest-{kind}-") as workdir:
+                    process, url = self._start_server(kind, stub, workdir, options)
+                    try:
+                        reports[kind] = self._test_deployment(url, kind, stages, mix, options)
+                    finally:
+                        process.terminate()
+                        try:
+                            process.wait(timeout=10)
+                        except subprocess.TimeoutExpired:
+                            process.kill()
+            if len(reports) > 1:
+                self._compare(reports)
+        finally:
+            stub.stop()
+
+    def _server_env(self, stub, workdir, options):
+        """Environment for a deployment wired to the stubs, with its own database and cache"""
+        env = dict(os.environ)
+        env.update({
+            "DJANGO_SETTINGS_MODULE": "jira_dashboard.settings",
+            "DATABASE_PATH": os.path.join(workdir, "db.sqlite3"),
+            "SERVICE_CACHE_LOCATION": os.path.join(workdir, "service_cache.sqlite3"),
+            # Never restore the deployment's cache snapshot into the test, or overwrite it with stub data
+            "CACHE_SNAPSHOT_PATH": "",
+            "JIRA_URL": stub.url,
+            "JIRA_EMAIL": "loadtest@example.com",
+            "JIRA_API_TOKEN": "stub",
+            "PROJECT_KEY": stub.project_key,
+            "GEMINI_BACKEND": "stub",
+            "GEMINI_STUB_LATENCY": str(options['gemini_latency']),
+            "AUTOMATION_PACING_SCALE": "0",
+        })
+        return env
+
+    def _start_server(self, kind, stub, workdir, options):
+        """Migrate a scratch database, start gunicorn or uvicorn on it and wait until it answers"""
+        env = self._server_env(stub, workdir, options)
+        migrate = subprocess.run([sys.executable, "manage.py", "migrate", "--noinput"], cwd=settings.BASE_DIR,
+                                 env=env, capture_output=True, text=True)
+        if migrate.returncode != 0:
+            raise CommandError(f"Migrating the load test database failed:\n{migrate.stderr}")
+
+        port = free_port()
+        if kind == 'wsgi':
+            command = [sys.executable, "-m", "gunicorn", "jira_dashboard.wsgi:application",
+                       "--bind", f"127.0.0.1:{port}", "--workers", str(options['workers']),
+                       "--threads", str(options['threads']), "--timeout", str(int(options['timeout']) + 30),
+                       "--log-level", "warning"]
+        else:
+            command = [sys.executable, "-m", "uvicorn", "jira_dashboard.asgi:application",
+                       "--host", "127.0.0.1", "--port", str(port), "--workers", str(options['workers']),
+                       "--log-level", "warning"]
+
+        log_path = os.path.join(workdir, "server.log")
+        log = open(log_path, "w")
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        log.close()
+
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                with open(log_path) as output:
+                    raise CommandError(f"{kind} server exited with {process.returncode}:\n{output.read()}")
+            try:
+                requests.get(f"{url}/api/automation/status/", timeout=1)
+                self.stdout.write(f"Started {kind} server ({' '.join(command[2:4])}) on {url}")
+                return process, url
+            except requests.exceptions.RequestException:
+                time.sleep(0.2)
+        process.kill()
+        raise CommandError(f"{kind} server did not start within 30s")
+
+    def _issue_keys(self, url):
+        """Keys to request from the detail endpoint, taken from the first page of issues"""
+        try:
+            response = requests.get(f"{url}/api/issues/", params={"page_size": 100}, timeout=30)
+            response.raise_for_status()
+            keys = [issue["key"] for issue in response.json().get("issues", [])]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise CommandError(f"Could not list issues from {url}: {e}")
+        if not keys:
+            raise CommandError(f"{url}/api/issues/ returned no issues to request details for")
+        return keys
+
+    def _request(self, name, rng, keys):
+        """Build (method, path, json body) for one request to an endpoint"""
+        method, path = ENDPOINTS[name]
+        path = path.format(key=rng.choice(keys))
+        # Unique text so Gemini caching and duplicate detection don't short-circuit the work
+        unique = uuid.uuid4().hex[:12]
+        if name in ("generate-tasks", "workflow"):
+            return method, path, {"requirement": f"Load test requirement {unique}: export reports as PDF"}
+        if name == "generate-tests":
+            return method, path, {"task_description": f"Load test task {unique}: render the report header"}
+        return method, path, None
+
+    def _run_stage(self, url, concurrency, mix, keys, options):
+        """Drive the deployment with `concurrency` clients for one stage; return per-endpoint samples"""
+        names, weights = list(mix), list(mix.values())
+        rate, timeout = options['rate'], options['timeout']
+        samples = {name: [] for name in names}
+        errors = collections.Counter()
+        tickets = itertools.count()
+        tickets_lock = threading.Lock()
+        start = time.perf_counter()
+        deadline = start + options['duration']
+
+        def client(seed):
+            rng = random.Random(seed)
+            session = requests.Session()
+            while True:
+                if rate:
+                    # Open loop: requests are due on a fixed schedule and latency is
+                    # measured from when they were due, so queueing is not hidden
+                    with tickets_lock:
+                        ticket = next(tickets)
+                    due = start + ticket / rate
+                    if due >= deadline:
+                        break
+                    time.sleep(max(0.0, due - time.perf_counter()))
+                else:
+                    due = time.perf_counter()
+                    if due >= deadline:
+                        break
+                name = rng.choices(names, weights)[0]
+                method, path, body = self._request(name, rng, keys)
+                try:
+                    response = session.request(method, f"{url}{path}", json=body, timeout=timeout)
+                    reason = failure(response)
+                except requests.exceptions.RequestException as e:
+                    reason = type(e).__name__
+                samples[name].append((time.perf_counter() - due, reason is None))
+                if reason is not None:
+                    # Counter updates are not atomic across threads
+                    with tickets_lock:
+                        errors[(name, reason)] += 1
+
+        threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, errors, time.perf_counter() - start
+
+    def _test_deployment(self, url, label, stages, mix, options):
+        """Run every stage against one deployment, print the results and find the saturation point"""
+        keys = self._issue_keys(url)
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}: {url}"))
+        report = []
+        for concurrency in stages:
+            samples, errors, elapsed = self._run_stage(url, concurrency, mix, keys, options)
+            overall = summarize([sample for endpoint in samples.values() for sample in endpoint], elapsed)
+            endpoints = {name: summarize(endpoint, elapsed) for name, endpoint in samples.items() if endpoint}
+            report.append({"concurrency": concurrency, "overall": overall, "endpoints": endpoints,
+                           "failures": errors.most_common(5)})
+            self._print_stage(concurrency, overall, endpoints, errors)
+
+        saturation = self._saturation(report, options['rate'])
+        if saturation:
+            stage, reason = saturation
+            self.stdout.write(self.style.WARNING(
+                f"{label} saturates at concurrency {stage['concurrency']}: {reason}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{label} did not saturate up to concurrency {stages[-1]}"))
+        best = max(report, key=lambda stage: stage["overall"]["throughput"])
+        self.stdout.write(f"{label} peak throughput: {best['overall']['throughput']:.1f} req/s "
+                          f"at concurrency {best['concurrency']}")
+        return {"stages": report, "saturation": saturation, "peak": best}
+
+    def _print_stage(self, concurrency, overall, endpoints, errors):
+        self.stdout.write(f"\nconcurrency {concurrency}: {overall['requests']} requests, "
+                          f"{overall['throughput']:.1f} req/s, {overall['error_rate']:.1%} errors")
+        header = f"  {'endpoint':<15}{'reqs':>7}{'err%':>7}{'req/s':>8}" + \
+                 "".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'max':>9}"
+        self.stdout.write(header + "  (ms)")
+        for name, summary in list(endpoints.items()) + [("all", overall)]:
+            if not summary["requests"]:
+                continue
+            self.stdout.write(
+                f"  {name:<15}{summary['requests']:>7}{summary['error_rate']:>7.1%}{summary['throughput']:>8.1f}" +
+                "".join(f"{summary[f'p{p}']:>9.0f}" for p in PERCENTILES) + f"{summary['max']:>9.0f}")
+        for (name, reason), count in errors.most_common(5):
+            self.stdout.write(f"  failed: {name} {reason} x{count}")
+
+    def _saturation(self, report, rate):
+        """Return (first saturated stage, reason), or None if every stage scaled"""
+        if not report[0]["overall"]["requests"]:
+            return None
+        baseline_p95 = report[0]["overall"]["p95"]
+        for previous, stage in zip([None] + report, report):
+            overall = stage["overall"]
+            if overall["error_rate"] > SATURATION_MAX_ERROR_RATE:
+                return stage, f"{overall['error_rate']:.1%} of requests failed"
+            if previous is None or not overall["requests"] or not previous["overall"]["requests"]:
+                continue
+            if overall["p95"] > baseline_p95 * SATURATION_P95_FACTOR:
+                return stage, f"p95 {overall['p95']:.0f}ms is over {SATURATION_P95_FACTOR:g}x " \
+                              f"the {baseline_p95:.0f}ms baseline"
+            # With a fixed offered rate throughput can't grow with concurrency
+            gain = overall["throughput"] / previous["overall"]["throughput"] - 1
+            if not rate and gain < SATURATION_MIN_GAIN:
+                return stage, f"throughput grew only {gain:.0%} over concurrency {previous['concurrency']}"
+        return None
+
+    def _compare(self, reports):
+        self.stdout.write(self.style.MIGRATE_HEADING("\nWSGI vs ASGI"))
+        for kind, report in reports.items():
+            saturation = report["saturation"]
+            saturated_at = saturation[0]["concurrency"] if saturation else "-"
+            peak = report["peak"]
+            self.stdout.write(f"  {kind}: peak {peak['overall']['throughput']:.1f} req/s at concurrency "
+                              f"{peak['concurrency']} (p95 {peak['overall'].get('p95', 0):.0f}ms), "
+                              f"saturates at {saturated_at}")
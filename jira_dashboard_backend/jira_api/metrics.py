@@ -0,0 +1,69 @@
+# jira_api/metrics.py
+# Process-local counters and latency windows for the service layer, exposed at /api/metrics/.
+from collections import Counter, deque
+import os
+import threading
+
+import numpy as np
+
+# Latency percentiles are computed over this many recent observations
+WINDOW_SIZE = 1024
+
+_counters = Counter()
+_windows = {}
+_lock = threading.Lock()
+
+
+def increment(name, amount=1, **labels):
+    """Add amount to the counter identified by name and labels"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += amount
+
+
+def value(name, **labels):
+    """Current value of one counter"""
+    with _lock:
+        return _counters.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def observe(name, seconds, **labels):
+    """Record one latency observation"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        window = _windows.get(key)
+        if window is None:
+            window = _windows[key] = deque(maxlen=WINDOW_SIZE)
+        window.append(seconds)
+
+
+def percentile(name, q, minimum_samples=1, **labels):
+    """q-th percentile of the recent observations, or None with too few samples"""
+    with _lock:
+        window = list(_windows.get((name, tuple(sorted(labels.items()))), ()))
+    if len(window) < max(1, minimum_samples):
+        return None
+    return float(np.percentile(window, q))
+
+
+def snapshot():
+    """All counters and latency summaries of this worker process"""
+    with _lock:
+        counters = sorted(_counters.items())
+        windows = sorted((key, list(window)) for key, window in _windows.items())
+    latencies = []
+    for (name, labels), window in windows:
+        p50, p95, p99 = np.percentile(window, [50, 95, 99])
+        latencies.append({"name": name, "labels": dict(labels), "count": len(window),
+                          "p50": round(float(p50), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4)})
+    return {
+        "pid": os.getpid(),
+        "counters": [{"name": name, "labels": dict(labels), "value": count} for (name, labels), count in counters],
+        "latencies": latencies,
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _windows.clear()
@@ -0,0 +1,146 @@
+# jira_api/middleware.py
+# On-demand profiling of individual requests.
+from collections import Counter
+import cProfile
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .deadline import track_threads
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FORMAT_HEADER = "X-Profile-Format"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# folded: sampled stacks, one "frame;frame;frame count" line each (flamegraph.pl, speedscope);
+#         covers the request thread and the pool workers running its propagate()d calls
+# pstats: deterministic cProfile output (python -m pstats, snakeviz); the request thread only,
+#         so work handed to thread pools shows up as time spent waiting on futures
+PROFILE_FORMATS = {"folded": ".folded", "pstats": ".prof"}
+
+
+class StackSampler:
+    """Samples a thread's Python stack, and those of its worker threads, into folded-stack counts.
+
+    workers is a live set of the idents of threads working for the sampled
+    thread (from deadline.track_threads), so concurrent requests and
+    background threads stay out of the profile. Worker stacks are rooted at
+    their thread name (without its number), so pool workers merge into one tree.
+    """
+
+    def __init__(self, thread_id, interval, workers=()):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.workers = workers
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = None
+            sampled = {self.thread_id, *self.workers}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in sampled:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                if thread_id != self.thread_id:
+                    if names is None:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    stack.append(f"[{re.sub(r'[-_]?[0-9]+$', '', names.get(thread_id, 'thread'))}]")
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """Profile a single request when it carries the profiling token.
+
+    Send the token in the X-Profile header (or ?profile=) and the request is
+    run under a stack sampler that also follows the pool workers running its
+    propagate()d calls, or under cProfile (request thread only) with
+    X-Profile-Format: pstats (or ?profile_format=pstats). The result is
+    written to PROFILE_DIR and its file name returned in X-Profile-Id. Without a
+    configured PROFILING_TOKEN the middleware removes itself from the chain,
+    so ordinary requests pay nothing. Streaming bodies are produced after
+    the profile ends and are not included.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_TOKEN:
+            raise MiddlewareNotUsed("PROFILING_TOKEN is not set")
+        self.get_response = get_response
+        self.token = settings.PROFILING_TOKEN.encode("utf-8")
+        self.directory = str(settings.PROFILE_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __call__(self, request):
+        token = request.headers.get(PROFILE_HEADER) or request.GET.get("profile")
+        if not token or not hmac.compare_digest(token.encode("utf-8"), self.token):
+            return self.get_response(request)
+
+        profile_format = request.headers.get(PROFILE_FORMAT_HEADER) or request.GET.get("profile_format") or "folded"
+        if profile_format not in PROFILE_FORMATS:
+            profile_format = "folded"
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}{PROFILE_FORMATS[profile_format]}"
+        path = os.path.join(self.directory, profile_id)
+
+        started = time.perf_counter()
+        if profile_format == "pstats":
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.get_response, request)
+            profiler.dump_stats(path)
+        else:
+            with track_threads() as workers:
+                sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL, workers)
+                sampler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    sampler.stop()
+            sampler.dump(path)
+        elapsed = time.perf_counter() - started
+
+        logger.info(f"Profiled {request.method} {request.path} in {elapsed:.3f}s -> {path}")
+        self._prune()
+        response[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    def _prune(self):
+        """Keep only the newest PROFILE_MAX_FILES profiles"""
+        try:
+            profiles = sorted(
+                (entry for entry in os.scandir(self.directory)
+                 if entry.is_file() and entry.name.endswith(tuple(PROFILE_FORMATS.values()))),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            for entry in profiles[:max(0, len(profiles) - settings.PROFILE_MAX_FILES)]:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.error(f"Error pruning profiles in {self.directory}: {e}")
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requirement', models.TextField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('committed', 'Committed'), ('failed', 'Failed')], default='draft', max_length=20)),
+                ('tree', models.JSONField(default=dict)),
+                ('revision', models.PositiveIntegerField(default=1)),
+                ('last_result', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='plans', to='jira_api.workflowrun')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jira_api', '0003_outboxentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_key', models.CharField(max_length=32)),
+                ('issue_key', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+                'indexes': [models.Index(fields=['project_key', 'deleted_at'], name='jira_api_is_project_8f6b8a_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,238 @@
-from django.db import models
+from django.db import IntegrityError, models
+from django.utils import timezone
+import hashlib
+import re
 
-# Create your models here.
+# Keys handed out for issues still waiting in the outbox ("PENDING:<entry id>"); Jira keys never contain ':'
+PLACEHOLDER_PATTERN = re.compile(r"PENDING:(\d+)")
+
+
+def workflow_idempotency_key(requirement, step=None):
+    """Derive a stable idempotency key from a requirement and optional step name"""
+    normalized = " ".join(requirement.split()).lower()
+    material = normalized if step is None else f"{normalized}\n{step}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def placeholder_key(entry_id):
+    """The placeholder key for the issue an outbox entry will create"""
+    return f"PENDING:{entry_id}"
+
+
+class WorkflowRun(models.Model):
+    """A single execution of the automation workflow for a requirement"""
+
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    idempotency_key = models.CharField(max_length=64, db_index=True)
+    requirement = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    result = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Workflow {self.pk} ({self.status}): {self.requirement[:50]}"
+
+    @classmethod
+    def for_requirement(cls, requirement, restart=False):
+        """Return (run, resumed): the requirement's latest run if it never completed, or a new run.
+
+        Only running and failed runs are resumed; once a run completes, asking
+        again for the same requirement starts a fresh run instead of replaying it.
+        """
+        key = workflow_idempotency_key(requirement)
+        run = None if restart else cls.objects.filter(idempotency_key=key).first()
+        if run is not None and run.status != cls.STATUS_COMPLETED:
+            return run, True
+        return cls.objects.create(idempotency_key=key, requirement=requirement), False
+
+    def get_checkpoint(self, step):
+        """Return the completed checkpoint for a step, if one exists"""
+        key = workflow_idempotency_key(self.requirement, step)
+        return self.steps.filter(idempotency_key=key, status=WorkflowStep.STATUS_COMPLETED).first()
+
+    def save_checkpoint(self, step, result):
+        """Persist the result of a completed step"""
+        self._write_step(step, status=WorkflowStep.STATUS_COMPLETED, result=result, error="")
+
+    def fail_checkpoint(self, step, error):
+        """Record that a step failed so it is retried on resume"""
+        self._write_step(step, status=WorkflowStep.STATUS_FAILED, result=None, error=str(error))
+
+    def _write_step(self, step, **fields):
+        """Insert or update a step's row with single statements.
+
+        Unlike update_or_create this opens no read-then-write transaction,
+        which SQLite aborts at once (instead of waiting) while another
+        connection, such as the outbox flusher, is writing.
+        """
+        key = workflow_idempotency_key(self.requirement, step)
+        steps = WorkflowStep.objects.filter(run=self, idempotency_key=key)
+        if steps.update(name=step, updated_at=timezone.now(), **fields):
+            return
+        try:
+            WorkflowStep.objects.create(run=self, idempotency_key=key, name=step, **fields)
+        except IntegrityError:
+            # Written concurrently since the update
+            steps.update(name=step, updated_at=timezone.now(), **fields)
+
+
+class WorkflowStep(models.Model):
+    """Checkpoint for one step of a workflow run"""
+
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run = models.ForeignKey(WorkflowRun, related_name='steps', on_delete=models.CASCADE)
+    idempotency_key = models.CharField(max_length=64)
+    name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'idempotency_key'], name='unique_workflow_step'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class WorkflowPlan(models.Model):
+    """A generated task/test tree that can be reviewed, edited and later committed to Jira"""
+
+    STATUS_DRAFT = 'draft'
+    STATUS_COMMITTED = 'committed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_DRAFT, 'Draft'),
+        (STATUS_COMMITTED, 'Committed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    requirement = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
+    tree = models.JSONField(default=dict)
+    revision = models.PositiveIntegerField(default=1)
+    run = models.ForeignKey(WorkflowRun, null=True, blank=True, related_name='plans', on_delete=models.SET_NULL)
+    last_result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Plan {self.pk} r{self.revision} ({self.status}): {self.requirement[:50]}"
+
+    @property
+    def editable(self):
+        """Plans can be edited until part of them has been written to Jira"""
+        return self.run_id is None
+
+    @staticmethod
+    def validate_tree(tree):
+        """Check an edited plan tree; raises ValueError describing the first problem"""
+        if not isinstance(tree, dict):
+            raise ValueError("plan must be an object")
+        tasks = tree.get("development_tasks")
+        if not isinstance(tasks, list) or not tasks:
+            raise ValueError("plan.development_tasks must be a non-empty list")
+        for i, task in enumerate(tasks):
+            if not isinstance(task, dict):
+                raise ValueError(f"development_tasks[{i}] must be an object")
+            for field in ("title", "summary"):
+                if not isinstance(task.get(field), str) or not task[field].strip():
+                    raise ValueError(f"development_tasks[{i}].{field} is required")
+            test_cases = task.get("test_cases", [])
+            if not isinstance(test_cases, list):
+                raise ValueError(f"development_tasks[{i}].test_cases must be a list")
+            for j, tc in enumerate(test_cases):
+                if not isinstance(tc, dict) or not isinstance(tc.get("test_name"), str) or not tc["test_name"].strip():
+                    raise ValueError(f"development_tasks[{i}].test_cases[{j}].test_name is required")
+                if not isinstance(tc.get("steps", []), list):
+                    raise ValueError(f"development_tasks[{i}].test_cases[{j}].steps must be a list")
+        return tree
+
+
+class OutboxEntry(models.Model):
+    """A Jira create or link recorded durably, to be written by the outbox flusher"""
+
+    OPERATION_CREATE = 'create'
+    OPERATION_LINK = 'link'
+    OPERATION_CHOICES = [
+        (OPERATION_CREATE, 'Create issue'),
+        (OPERATION_LINK, 'Link issues'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run = models.ForeignKey(WorkflowRun, null=True, blank=True, related_name='outbox_entries',
+                            on_delete=models.SET_NULL)
+    project_key = models.CharField(max_length=32)
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    payload = models.JSONField()
+    # Outbox entries whose issues must exist first (referenced by placeholder in the payload)
+    depends_on = models.JSONField(default=list, blank=True)
+    idempotency_label = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Lease held by the flusher currently sending the entry
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Outbox {self.pk} {self.operation} ({self.status})"
+
+    @property
+    def placeholder(self):
+        return placeholder_key(self.pk)
+
+
+class IssueDeletion(models.Model):
+    """An issue Jira reported as deleted, kept so /api/issues/changes/ can report it"""
+
+    project_key = models.CharField(max_length=32)
+    issue_key = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [models.Index(fields=['project_key', 'deleted_at'])]
+
+    def __str__(self):
+        return f"{self.issue_key} deleted at {self.deleted_at}"
@@ -0,0 +1,400 @@
+# jira_api/outbox.py
+# Durable write-behind queue for the Jira creates and links made by automation workflows.
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import threading
+import uuid
+import logging
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import PLACEHOLDER_PATTERN, OutboxEntry, WorkflowRun, WorkflowStep
+from .scheduler import BATCH, outbound_priority
+from .services import get_jira_service
+from .transport import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Client errors mean Jira rejected the request itself (bad fields, missing issue, no
+# permission) and resending cannot help - except timeouts and rate limiting
+RETRYABLE_CLIENT_STATUSES = frozenset({408, 429})
+
+
+def permanent(status_code):
+    """Whether Jira's answer means the entry can never be sent as it is"""
+    return 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_STATUSES
+
+
+def substitute(value, keys):
+    """Replace placeholder keys with real ones ({entry id: key}) anywhere in a JSON value"""
+    if isinstance(value, str):
+        return PLACEHOLDER_PATTERN.sub(lambda m: keys.get(int(m.group(1)), m.group(0)), value)
+    if isinstance(value, list):
+        return [substitute(item, keys) for item in value]
+    if isinstance(value, dict):
+        return {substitute(name, keys): substitute(item, keys) for name, item in value.items()}
+    return value
+
+
+def _dependencies(payload):
+    return sorted({int(entry_id) for text in payload.values() if isinstance(text, str)
+                   for entry_id in PLACEHOLDER_PATTERN.findall(text)})
+
+
+class _RunIssueIndex:
+    """The wrapped issue index, with issues this run created through the outbox never matching as existing"""
+
+    def __init__(self, index, run):
+        self.index = index
+        self.run = run
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+    def find(self, summary, description, exclude=()):
+        sent = OutboxEntry.objects.filter(run=self.run, operation=OutboxEntry.OPERATION_CREATE,
+                                          status=OutboxEntry.STATUS_SENT).values_list("result", flat=True)
+        return self.index.find(summary, description, exclude={*exclude, *(result["key"] for result in sent)})
+
+
+class OutboxJiraService:
+    """Stands in for a JiraService inside a workflow run: creates and links go to the outbox.
+
+    Creates return placeholder keys at once. Later creates and links may use
+    them as parents, link ends or inside text; the flusher puts the real keys
+    in once Jira has assigned them. Reads go straight to the wrapped service.
+    """
+
+    def __init__(self, jira, run, flusher=None):
+        self.jira = jira
+        self.run = run
+        self.flusher = flusher or get_flusher()
+        self.issue_index = _RunIssueIndex(jira.issue_index, run)
+
+    def __getattr__(self, name):
+        return getattr(self.jira, name)
+
+    def create_issue(self, summary, description, issue_type="Task", parent_key=None):
+        """Queue an issue; returns {"key": placeholder, "pending": True}"""
+        return self.create_issues_bulk([(summary, description, issue_type, parent_key)])[0]
+
+    def create_issues_bulk(self, issues):
+        """Queue (summary, description, issue_type, parent_key) issues; one placeholder result per issue"""
+        entries = self._enqueue([
+            (OutboxEntry.OPERATION_CREATE, {"summary": summary, "description": description,
+                                            "issue_type": issue_type, "parent_key": parent_key})
+            for summary, description, issue_type, parent_key in issues
+        ])
+        return [{"key": entry.placeholder, "pending": True} for entry in entries]
+
+    def link_issues(self, outward_issue, inward_issue, link_type="Relates"):
+        """Queue a link; always accepted"""
+        self._enqueue([(OutboxEntry.OPERATION_LINK,
+                        {"outward": outward_issue, "inward": inward_issue, "link_type": link_type})])
+        return True
+
+    def pending(self):
+        """Entries of this run not yet written to Jira"""
+        return self.run.outbox_entries.filter(status=OutboxEntry.STATUS_PENDING).count()
+
+    def settle(self):
+        settle_run(self.run)
+
+    def _enqueue(self, mutations):
+        with transaction.atomic():
+            entries = [
+                OutboxEntry.objects.create(
+                    run=self.run, project_key=self.jira.project_key, operation=operation, payload=payload,
+                    depends_on=_dependencies(payload),
+                    idempotency_label=(self.jira._idempotency_label() or "")
+                    if operation == OutboxEntry.OPERATION_CREATE else "",
+                )
+                for operation, payload in mutations
+            ]
+        metrics.increment("jira_outbox_queued_total", amount=len(entries))
+        self.flusher.wake()
+        return entries
+
+
+def settle_run(run):
+    """Once none of a run's entries are pending, swap placeholders for real keys in its results.
+
+    Issues Jira rejected keep their placeholders, are reported in the run's
+    errors and fail the run; their checkpoints are failed too, so resuming
+    the run creates them again.
+    """
+    entries = list(run.outbox_entries.all())
+    if not entries or any(entry.status == OutboxEntry.STATUS_PENDING for entry in entries):
+        return False
+    keys = {entry.pk: entry.result["key"] for entry in entries
+            if entry.status == OutboxEntry.STATUS_SENT and entry.operation == OutboxEntry.OPERATION_CREATE}
+    failed = [entry for entry in entries if entry.status == OutboxEntry.STATUS_FAILED]
+    failed_keys = {entry.placeholder for entry in failed}
+
+    # Plain statements rather than one transaction: settling is idempotent, and
+    # SQLite aborts read-then-write transactions that meet a concurrent writer
+    run.refresh_from_db()
+    result = substitute(run.result, keys)
+    if isinstance(result, dict) and "pending_writes" in result:
+        result["pending_writes"] = 0
+        for entry in failed:
+            message = f"Outbox entry {entry.pk} ({entry.operation} {entry.payload}) failed: {entry.error}"
+            if message not in result["errors"]:
+                result["errors"].append(message)
+    run.result = result
+    if failed:
+        run.status = WorkflowRun.STATUS_FAILED
+    run.save(update_fields=["status", "result", "updated_at"])
+
+    for step in run.steps.all():
+        if isinstance(step.result, dict) and step.result.get("key") in failed_keys:
+            step.status = WorkflowStep.STATUS_FAILED
+            step.error = f"Jira rejected the queued create ({step.result['key']})"
+            step.save(update_fields=["status", "error", "updated_at"])
+        elif step.result is not None:
+            result = substitute(step.result, keys)
+            if result != step.result:
+                step.result = result
+                step.save(update_fields=["result", "updated_at"])
+
+    for plan in run.plans.all():
+        plan.last_result = substitute(plan.last_result, keys)
+        if failed:
+            plan.status = plan.STATUS_FAILED
+        plan.save(update_fields=["status", "last_result", "updated_at"])
+    return True
+
+
+def outbox_stats():
+    """Entry counts by status and the age of the oldest pending entry"""
+    counts = dict(OutboxEntry.objects.values_list("status").annotate(n=Count("id")))
+    oldest = OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING).aggregate(oldest=Min("created_at"))
+    return {
+        "pending": counts.get(OutboxEntry.STATUS_PENDING, 0),
+        "sent": counts.get(OutboxEntry.STATUS_SENT, 0),
+        "failed": counts.get(OutboxEntry.STATUS_FAILED, 0),
+        "oldest_pending_seconds": round((timezone.now() - oldest["oldest"]).total_seconds(), 1)
+        if oldest["oldest"] else None,
+    }
+
+
+class OutboxFlusher:
+    """Writes queued Jira mutations in the background, in dependency order.
+
+    An entry is sent once every issue it references (its parent, a link
+    end, a key in its text) exists in Jira, so parents always precede their
+    subtasks and links. Ready creates go out in bulk requests per project,
+    ready links in parallel. A failed send is retried with exponential
+    backoff until Jira accepts it, so work queued during an outage converges
+    once Jira recovers; requests Jira rejects outright, and entries still
+    failing after max_attempts sends, fail together with whatever depends
+    on them. Entries are leased while being sent, so
+    several processes can flush the same database.
+    """
+
+    def __init__(self, interval=None, lease=None, batch_size=None, link_workers=None, jira_for=None,
+                 max_attempts=None):
+        self.interval = settings.JIRA_OUTBOX_FLUSH_INTERVAL if interval is None else interval
+        self.max_attempts = settings.JIRA_OUTBOX_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.lease = settings.JIRA_OUTBOX_LEASE if lease is None else lease
+        self.batch_size = settings.JIRA_BULK_CREATE_SIZE if batch_size is None else batch_size
+        self.link_workers = max(1, settings.JIRA_LINK_WORKERS if link_workers is None else link_workers)
+        self.retry_policy = RetryPolicy(base_delay=settings.JIRA_OUTBOX_RETRY_BASE_DELAY,
+                                        max_delay=settings.JIRA_OUTBOX_RETRY_MAX_DELAY)
+        self.jira_for = jira_for or get_jira_service
+        self.worker_id = uuid.uuid4().hex
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread (once)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="jira-outbox", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Flush now rather than at the next interval (once started)"""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                sent = self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing the Jira outbox: {e}")
+                sent = 0
+            finally:
+                close_old_connections()
+            if not sent:
+                self._wake.wait(self.interval)
+
+    def flush(self, limit=500):
+        """Send the entries that are ready now; returns how many were attempted or failed"""
+        now = timezone.now()
+        candidates = list(OutboxEntry.objects.filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+            status=OutboxEntry.STATUS_PENDING, next_attempt_at__lte=now,
+        )[:limit])
+        if not candidates:
+            return 0
+
+        keys, failed = self._dependency_state(candidates)
+        ready, broken = [], 0
+        for entry in candidates:
+            failed_dependencies = [entry_id for entry_id in entry.depends_on if entry_id in failed]
+            if failed_dependencies:
+                self._fail(entry, f"Depends on outbox entries that failed: {failed_dependencies}")
+                broken += 1
+            elif all(entry_id in keys for entry_id in entry.depends_on):
+                ready.append(entry)
+        ready = self._claim(ready)
+
+        with outbound_priority(BATCH):
+            creates = [entry for entry in ready if entry.operation == OutboxEntry.OPERATION_CREATE]
+            for project_key in dict.fromkeys(entry.project_key for entry in creates):
+                batch = [entry for entry in creates if entry.project_key == project_key]
+                for start in range(0, len(batch), self.batch_size):
+                    self._send_creates(project_key, batch[start:start + self.batch_size], keys)
+            self._send_links([entry for entry in ready if entry.operation == OutboxEntry.OPERATION_LINK], keys)
+
+        for run in WorkflowRun.objects.filter(pk__in={entry.run_id for entry in candidates if entry.run_id}):
+            if run.status != WorkflowRun.STATUS_RUNNING:
+                settle_run(run)
+        return len(ready) + broken
+
+    def _dependency_state(self, entries):
+        """({entry id: key} for created dependencies, {ids of failed ones})"""
+        ids = {entry_id for entry in entries for entry_id in entry.depends_on}
+        keys, failed = {}, set()
+        for entry_id, entry_status, result in OutboxEntry.objects.filter(pk__in=ids).values_list(
+                "pk", "status", "result"):
+            if entry_status == OutboxEntry.STATUS_SENT:
+                keys[entry_id] = result["key"]
+            elif entry_status == OutboxEntry.STATUS_FAILED:
+                failed.add(entry_id)
+        return keys, failed
+
+    def _claim(self, entries):
+        """Lease entries to this flusher, counting the attempt; returns the ones no other flusher got first"""
+        if not entries:
+            return []
+        now = timezone.now()
+        until = now + timedelta(seconds=self.lease)
+        OutboxEntry.objects.filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+            pk__in=[entry.pk for entry in entries], status=OutboxEntry.STATUS_PENDING,
+        ).update(claimed_by=self.worker_id, claimed_until=until, attempts=F("attempts") + 1)
+        return list(OutboxEntry.objects.filter(pk__in=[entry.pk for entry in entries],
+                                               claimed_by=self.worker_id, claimed_until=until))
+
+    def _send_creates(self, project_key, entries, keys):
+        jira = self.jira_for(project_key)
+        issues = [(substitute(entry.payload["summary"], keys), substitute(entry.payload["description"], keys),
+                   entry.payload["issue_type"], substitute(entry.payload["parent_key"], keys))
+                  for entry in entries]
+        labels = [entry.idempotency_label or None for entry in entries]
+        try:
+            # An earlier attempt may have gone through before its response was lost; don't create those twice
+            resent = [label for entry, label in zip(entries, labels) if entry.attempts > 1 and label]
+            found = jira.find_by_labels(resent) if resent else {}
+            todo = [n for n, label in enumerate(labels) if label not in found]
+            created = jira.create_issues_bulk([issues[n] for n in todo], [labels[n] for n in todo]) if todo else []
+        except Exception as e:
+            for entry in entries:
+                self._retry_or_fail(entry, e)
+            return
+        results = dict(zip(todo, created))
+        for n, entry in enumerate(entries):
+            result = found.get(labels[n]) or results[n]
+            if result.get("key"):
+                self._sent(entry, {"id": result.get("id"), "key": result["key"]})
+            else:
+                self._fail(entry, result.get("error") or "Jira did not create the issue")
+
+    def _send_links(self, entries, keys):
+        def send(entry):
+            outward = substitute(entry.payload["outward"], keys)
+            inward = substitute(entry.payload["inward"], keys)
+            try:
+                if not self.jira_for(entry.project_key).link_issues(outward, inward, entry.payload["link_type"],
+                                                                    raise_errors=True):
+                    raise Exception(f"Jira did not link {outward} to {inward}")
+            except Exception as e:
+                return e
+            return None
+
+        if not entries:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.link_workers, len(entries)),
+                                thread_name_prefix="jira-outbox-link") as pool:
+            errors = list(pool.map(send, entries))
+        for entry, error in zip(entries, errors):
+            if error is None:
+                self._sent(entry, {"linked": True})
+            else:
+                self._retry_or_fail(entry, error)
+
+    def _sent(self, entry, result):
+        entry.status = OutboxEntry.STATUS_SENT
+        entry.result = result
+        entry.error = ""
+        entry.claimed_until = None
+        entry.save(update_fields=["status", "result", "error", "claimed_until", "updated_at"])
+        metrics.increment("jira_outbox_sent_total", operation=entry.operation)
+
+    def _fail(self, entry, error):
+        logger.error(f"Outbox entry {entry.pk} ({entry.operation}) failed permanently: {error}")
+        entry.status = OutboxEntry.STATUS_FAILED
+        entry.error = str(error)
+        entry.claimed_until = None
+        entry.save(update_fields=["status", "error", "claimed_until", "updated_at"])
+        metrics.increment("jira_outbox_failed_total", operation=entry.operation)
+
+    def _retry_or_fail(self, entry, error):
+        response = getattr(error, "response", None)
+        if isinstance(error, requests.exceptions.HTTPError) and response is not None \
+                and permanent(response.status_code):
+            self._fail(entry, error)
+            return
+        if self.max_attempts and entry.attempts >= self.max_attempts:
+            self._fail(entry, f"Gave up after {entry.attempts} attempts: {error}")
+            return
+        delay = self.retry_policy.backoff(entry.attempts)
+        logger.warning(f"Outbox entry {entry.pk} ({entry.operation}) failed, "
+                       f"retry {entry.attempts} in {delay:.1f}s: {error}")
+        entry.error = str(error)
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        entry.claimed_until = None
+        entry.save(update_fields=["error", "next_attempt_at", "claimed_until", "updated_at"])
+        metrics.increment("jira_outbox_retries_total", operation=entry.operation)
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher():
+    """Return the process-wide outbox flusher"""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = OutboxFlusher()
+        return _flusher
+
+
+def start():
+    """Send queued work in the background in this process (a no-op without JIRA_WRITE_BEHIND).
+
+    Only the WSGI and ASGI entry points call this; management commands,
+    shells and tests leave the outbox to flush_outbox.
+    """
+    if settings.JIRA_WRITE_BEHIND:
+        get_flusher().start()
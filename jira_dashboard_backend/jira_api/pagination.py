@@ -0,0 +1,109 @@
+# jira_api/pagination.py
+# Opaque cursors for keyset pagination of /api/issues/, and change tokens for /api/issues/changes/.
+import base64
+import json
+import re
+
+from django.conf import settings
+
+DIRECTION_NEXT = "next"
+DIRECTION_PREV = "prev"
+
+ISSUE_KEY_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9_]*-\d+$")
+PROJECT_KEY_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(issue_key, direction):
+    """Encode a page boundary as an opaque URL-safe token"""
+    raw = json.dumps({"k": issue_key, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor token into (issue_key, direction)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        issue_key, direction = data["k"], data["d"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREV) or not ISSUE_KEY_PATTERN.match(str(issue_key)):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return issue_key, direction
+
+
+def encode_projects_cursor(after_keys):
+    """Encode the per-project position of a merged multi-project page.
+    
+    after_keys maps each project that still has issues to the last key
+    served from it ("" when none have been served yet).
+    """
+    raw = json.dumps({"p": after_keys, "d": DIRECTION_NEXT}, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_projects_cursor(cursor):
+    """Decode a multi-project cursor into {project_key: last issue key or ""}"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        after_keys = data["p"]
+        valid = isinstance(after_keys, dict) and all(
+            PROJECT_KEY_PATTERN.match(str(project)) and (key == "" or ISSUE_KEY_PATTERN.match(str(key)))
+            for project, key in after_keys.items()
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if not valid:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return after_keys
+
+
+def encode_changes_token(since, project_keys):
+    """Encode the point in time (Unix seconds) a change feed continues from"""
+    raw = json.dumps({"t": round(since, 3), "p": sorted(project_keys)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_changes_token(token):
+    """Decode a change token into (since, project_keys)"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        since, project_keys = float(data["t"]), data["p"]
+        valid = isinstance(project_keys, list) and all(PROJECT_KEY_PATTERN.match(str(key)) for key in project_keys)
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid change token: {token}") from e
+    if not valid:
+        raise InvalidCursor(f"Invalid change token: {token}")
+    return since, project_keys
+
+
+def get_page_size(value):
+    """Clamp a requested page size to the configured bounds"""
+    if value in (None, ""):
+        return settings.ISSUES_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid page_size: {value}")
+    return max(1, min(page_size, settings.ISSUES_MAX_PAGE_SIZE))
+
+
+def page_cursors(issues, has_more, direction=None):
+    """Build the (next_cursor, prev_cursor) pair for a page of newest-first issues"""
+    if not issues:
+        return None, None
+
+    if direction == DIRECTION_PREV:
+        has_older, has_newer = True, has_more
+    else:
+        has_older, has_newer = has_more, direction == DIRECTION_NEXT
+
+    next_cursor = encode_cursor(issues[-1]["key"], DIRECTION_NEXT) if has_older else None
+    prev_cursor = encode_cursor(issues[0]["key"], DIRECTION_PREV) if has_newer else None
+    return next_cursor, prev_cursor
@@ -0,0 +1,77 @@
+# jira_api/pipeline.py
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.conf import settings
+
+from . import deadline
+
+logger = logging.getLogger(__name__)
+
+
+class LinkPipeline:
+    """Pipeline stage that creates Jira issue links off the workflow's critical path"""
+
+    def __init__(self, jira, max_workers=None, max_retries=None, retry_delay=None):
+        self.jira = jira
+        self.max_workers = settings.JIRA_LINK_WORKERS if max_workers is None else max_workers
+        self.max_retries = settings.JIRA_LINK_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.JIRA_LINK_RETRY_DELAY if retry_delay is None else retry_delay
+        self._executor = None
+        self._pending = []
+
+    def submit(self, outward_issue, inward_issue, link_type="Relates"):
+        """Queue a link; with no workers configured the link is created inline"""
+        if self.max_workers <= 0:
+            result = self._link(outward_issue, inward_issue, link_type)
+            self._pending.append(result)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="jira-link")
+        self._pending.append(self._executor.submit(deadline.propagate(self._link), outward_issue, inward_issue, link_type))
+
+    def drain(self):
+        """Wait for every queued link and return one result dict per link"""
+        results = []
+        for pending in self._pending:
+            results.append(pending if isinstance(pending, dict) else pending.result())
+        self._pending = []
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return results
+
+    def _link(self, outward_issue, inward_issue, link_type):
+        """Create one link, retrying with a growing delay on failure"""
+        result = {
+            "outward": outward_issue,
+            "inward": inward_issue,
+            "link_type": link_type,
+            "linked": False,
+            "attempts": 0,
+            "error": None
+        }
+
+        while result["attempts"] <= self.max_retries:
+            result["attempts"] += 1
+            try:
+                if self.jira.link_issues(outward_issue, inward_issue, link_type):
+                    result["linked"] = True
+                    result["error"] = None
+                    return result
+                result["error"] = "Jira rejected the link"
+            except Exception as e:
+                result["error"] = str(e)
+
+            if result["attempts"] <= self.max_retries:
+                if deadline.expired():
+                    result["error"] = f"Request deadline exceeded after: {result['error']}"
+                    break
+                logger.warning(f"Retrying link {outward_issue} -> {inward_issue} "
+                               f"(attempt {result['attempts']}): {result['error']}")
+                deadline.pause(self.retry_delay * result["attempts"])
+
+        logger.error(f"Giving up linking {outward_issue} -> {inward_issue}: {result['error']}")
+        return result
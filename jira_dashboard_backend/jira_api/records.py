@@ -0,0 +1,104 @@
+# jira_api/records.py
+# Compact in-memory form of a Jira issue.
+import sys
+
+from .adf import adf_to_text, text_to_adf
+
+
+# Jira's fixed status categories, by key
+STATUS_CATEGORY_NAMES = {"new": "To Do", "indeterminate": "In Progress", "done": "Done"}
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _name(fields, field, attribute="name"):
+    return _intern((fields.get(field) or {}).get(attribute))
+
+
+class IssueRecord:
+    """One issue as a slotted object holding only what the dashboard uses.
+
+    A parsed Jira issue is a tree of dicts: status, type, priority and
+    every user come with self links, ids, icon and avatar URLs, and the
+    description is an ADF document. A record keeps their names instead,
+    interned so that every issue in a status or assigned to a person shares
+    one string, and the description as plain text.
+    """
+
+    __slots__ = ("key", "id", "summary", "description", "status", "status_category", "issue_type",
+                 "priority", "assignee", "reporter", "parent", "labels", "created", "updated", "resolved")
+
+    def __init__(self, key, id=None, summary="", description="", status=None, status_category=None,
+                 issue_type=None, priority=None, assignee=None, reporter=None, parent=None, labels=(),
+                 created=None, updated=None, resolved=None):
+        self.key = key
+        self.id = id
+        self.summary = summary
+        self.description = description
+        self.status = _intern(status)
+        self.status_category = _intern(status_category)
+        self.issue_type = _intern(issue_type)
+        self.priority = _intern(priority)
+        self.assignee = _intern(assignee)
+        self.reporter = _intern(reporter)
+        self.parent = parent
+        self.labels = tuple(_intern(label) for label in labels)
+        self.created = created
+        self.updated = updated
+        self.resolved = resolved
+
+    def __repr__(self):
+        return f"IssueRecord({self.key!r}, status={self.status!r})"
+
+    @property
+    def project_key(self):
+        return self.key.rsplit("-", 1)[0]
+
+    @classmethod
+    def from_jira(cls, issue):
+        """Build a record from an issue as Jira's REST API returns it"""
+        fields = issue.get("fields") or {}
+        status = fields.get("status") or {}
+        return cls(
+            issue["key"],
+            issue.get("id"),
+            fields.get("summary") or "",
+            adf_to_text(fields.get("description")).rstrip("\n"),
+            status.get("name"),
+            (status.get("statusCategory") or {}).get("key"),
+            _name(fields, "issuetype"),
+            _name(fields, "priority"),
+            _name(fields, "assignee", "displayName"),
+            _name(fields, "reporter", "displayName"),
+            (fields.get("parent") or {}).get("key"),
+            fields.get("labels") or (),
+            fields.get("created"),
+            fields.get("updated"),
+            fields.get("resolutiondate"),
+        )
+
+    def to_jira(self):
+        """Rebuild the Jira JSON shape for the fields the record keeps"""
+        return {
+            "id": self.id,
+            "key": self.key,
+            "fields": {
+                "summary": self.summary,
+                "description": text_to_adf(self.description) if self.description else None,
+                "status": {"name": self.status, "statusCategory": {
+                    "key": self.status_category, "name": STATUS_CATEGORY_NAMES.get(self.status_category)
+                }} if self.status else None,
+                "issuetype": {"name": self.issue_type} if self.issue_type else None,
+                "priority": {"name": self.priority} if self.priority else None,
+                "assignee": {"displayName": self.assignee} if self.assignee else None,
+                "reporter": {"displayName": self.reporter} if self.reporter else None,
+                "parent": {"key": self.parent} if self.parent else None,
+                "labels": list(self.labels),
+                "project": {"key": self.project_key},
+                "created": self.created,
+                "updated": self.updated,
+                "resolutiondate": self.resolved,
+            }
+        }
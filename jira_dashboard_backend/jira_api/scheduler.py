@@ -0,0 +1,187 @@
+# jira_api/scheduler.py
+# Arbitrates the shared outbound Jira budget between interactive and batch work.
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+import threading
+import time
+import logging
+
+import requests
+from django.conf import settings
+
+from . import metrics
+from .deadline import remaining as deadline_remaining
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: dashboard reads vs automation writes, exports and index warming
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+QUEUE_WAIT = "jira_queue_wait_seconds"
+
+_priority = ContextVar("jira_priority", default=None)
+
+
+class QueueTimeout(requests.exceptions.ConnectTimeout):
+    """A request waited too long for its turn; nothing was sent, so it is retried like a connect timeout"""
+
+
+def parse_weights(value):
+    """Parse "interactive=16,batch=1" into {"interactive": 16.0, "batch": 1.0}"""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip():
+            weights[name.strip()] = float(weight)
+    if any(weight <= 0 for weight in weights.values()):
+        raise ValueError(f"Priority weights must be positive: {value}")
+    return weights
+
+
+@contextmanager
+def outbound_priority(priority):
+    """Run Jira calls made in this context (and thread) under the given priority class"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(method):
+    """The priority class for a call: the surrounding outbound_priority, else reads are interactive"""
+    return _priority.get() or (INTERACTIVE if method.upper() == "GET" else BATCH)
+
+
+class OutboundScheduler:
+    """Weighted fair queuing over a concurrency limit and an optional rate limit.
+
+    Every waiting request gets a finish tag on its class's virtual clock,
+    which advances by 1/weight per request, and the smallest tag goes next.
+    With weights interactive=16, batch=1 a dashboard read that arrives
+    behind a long queue of workflow writes is served next, while batch work
+    still gets its share whenever both classes are waiting. A request is
+    dispatched once it is at the head and both a concurrency slot and a
+    rate-limit token are free.
+    """
+
+    def __init__(self, max_concurrency=None, rate=None, burst=None, weights=None, queue_timeout=None):
+        self.max_concurrency = settings.JIRA_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.rate = settings.JIRA_RATE_LIMIT if rate is None else rate
+        self.burst = settings.JIRA_RATE_BURST if burst is None else burst
+        self.weights = parse_weights(settings.JIRA_PRIORITY_WEIGHTS) if weights is None else weights
+        self.queue_timeout = settings.JIRA_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.in_flight = 0
+        self._queue = []
+        self._queued = {priority: 0 for priority in self.weights}
+        self._last_finish = {}
+        self._virtual_time = 0.0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        if self.rate:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def acquire(self, priority):
+        """Wait for this request's turn, then take a concurrency slot (and a rate-limit token)"""
+        weight = self.weights.get(priority)
+        if weight is None:
+            raise ValueError(f"Unknown priority class: {priority}")
+        enqueued = time.monotonic()
+        deadline = enqueued + self.queue_timeout if self.queue_timeout else None
+        left = deadline_remaining()
+        if left is not None:
+            # Never queue past the request deadline
+            deadline = enqueued + left if deadline is None else min(deadline, enqueued + left)
+
+        with self._condition:
+            start = max(self._virtual_time, self._last_finish.get(priority, 0.0))
+            self._last_finish[priority] = start + 1.0 / weight
+            entry = (start + 1.0 / weight, next(self._sequence), start, priority)
+            heapq.heappush(self._queue, entry)
+            self._queued[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    at_head = self._queue[0] is entry and self.in_flight < self.max_concurrency
+                    if at_head and (not self.rate or self._tokens >= 1):
+                        break
+                    # At the head and only short of a token: sleep until the next one
+                    wait = (1 - self._tokens) / self.rate if at_head else None
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise QueueTimeout(f"Waited {now - enqueued:.1f}s for a Jira request slot ({priority})")
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._condition.wait(wait)
+            except BaseException as e:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._queued[priority] -= 1
+                self._condition.notify_all()
+                if isinstance(e, QueueTimeout):
+                    metrics.increment("jira_queue_timeouts_total", priority=priority)
+                raise
+
+            heapq.heappop(self._queue)
+            self._queued[priority] -= 1
+            self._virtual_time = start
+            self.in_flight += 1
+            if self.rate:
+                self._tokens -= 1
+            self._condition.notify_all()
+
+        metrics.observe(QUEUE_WAIT, time.monotonic() - enqueued, priority=priority)
+        metrics.increment("jira_scheduled_total", priority=priority)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """Queue depth per class, slots in use, and recent queue wait percentiles"""
+        with self._condition:
+            queued = dict(self._queued)
+            in_flight = self.in_flight
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_limit": self.rate or None,
+            "in_flight": in_flight,
+            "queued": queued,
+            "wait_seconds": {
+                priority: {
+                    "p50": metrics.percentile(QUEUE_WAIT, 50, priority=priority),
+                    "p99": metrics.percentile(QUEUE_WAIT, 99, priority=priority),
+                }
+                for priority in self.weights
+            },
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler (every JiraService shares one budget)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = OutboundScheduler()
+        return _scheduler
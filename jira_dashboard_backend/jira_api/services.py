@@ -1,110 +1,475 @@
 # jira_api/services.py
 import requests
 from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
 import json
 import time
-import google.generativeai as genai
+import hashlib
 import os
+import threading
+import uuid
 from django.conf import settings
 import logging
 
+from .cache import get_cache
+from .conditional import invalidate_validators, parse_jira_datetime
+from . import deadline
+from .deadline import DeadlineExceeded, propagate
+from .dedup import dedupe, get_issue_index
+from .dispatch import get_dispatcher
+from .fastjson import loads
+from .hedging import ATTEMPT_LATENCY, get_hedger
+from . import metrics
+from .models import WorkflowRun, workflow_idempotency_key
+from .pipeline import LinkPipeline
+from .scheduler import BATCH, current_priority, get_scheduler, outbound_priority
+from .streaming import JsonArrayParser
+from .transport import AlreadyApplied, RetryPolicy
+
 logger = logging.getLogger(__name__)
 
 class JiraService:
     """Service class for Jira API interactions"""
     
-    def __init__(self):
+    def __init__(self, project_key=None):
         self.email = settings.JIRA_EMAIL
         self.api_token = settings.JIRA_API_TOKEN
         self.base_url = settings.JIRA_BASE_URL
-        self.project_key = settings.JIRA_PROJECT_KEY
+        self.project_key = project_key or settings.JIRA_PROJECT_KEY
         self.auth = HTTPBasicAuth(self.email, self.api_token)
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+        self.cache = get_cache("jira")
+        self.issue_index = get_issue_index(self.project_key)
+        self.retry_policy = RetryPolicy()
+        self.scheduler = get_scheduler()
+        # Set once Jira refuses labels on this project's create screen
+        self.labels_rejected = False
+    
+    def request(self, method, url, operation, idempotent=None, check_applied=None, priority=None,
+                retry_policy=None, scheduled=True, **kwargs):
+        """Send a request to Jira, retrying transient failures per the retry policy.
+        
+        Each attempt waits its turn in the outbound scheduler. Without an
+        explicit priority, reads are interactive and writes are batch unless
+        the caller runs inside outbound_priority(). scheduled=False sends at
+        once, outside the scheduler, for the odd call that must not queue.
+        """
+        priority = priority or current_priority(method)
+        
+        def send(timeout):
+            if not scheduled:
+                return requests.request(method, url, headers=self.headers, auth=self.auth, timeout=timeout, **kwargs)
+            with self.scheduler.slot(priority):
+                return requests.request(method, url, headers=self.headers, auth=self.auth, timeout=timeout, **kwargs)
+        return (retry_policy or self.retry_policy).send(send, method, operation, idempotent, check_applied)
+    
+    def _decode(self, response):
+        """Decode a Jira response body; bad JSON raises the same error response.json() would"""
+        try:
+            return loads(response.content)
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(str(e), response.text, 0)
+    
+    def connection_info(self, max_projects=10):
+        """The authenticated user and the first accessible projects"""
+        response = self.request("GET", f"{self.base_url}/rest/api/3/myself", "myself")
+        response.raise_for_status()
+        user_info = self._decode(response)
+        
+        # The paginated search returns only the projects we show, not the whole list
+        response = self.request("GET", f"{self.base_url}/rest/api/3/project/search", "projects",
+                                params={"maxResults": max_projects})
+        response.raise_for_status()
+        projects = self._decode(response).get("values", [])
+        
+        return {
+            "user": user_info.get('displayName', 'Unknown'),
+            "email": user_info.get('emailAddress', 'Unknown'),
+            "jira_url": self.base_url,
+            "configured_project": self.project_key,
+            "available_projects": [{"key": p["key"], "name": p["name"]} for p in projects[:max_projects]]
+        }
     
-    def fetch_issues(self, max_results=50):
-        """Fetch all issues from the project"""
+    def fetch_issues(self, max_results=50, after_key=None, before_key=None, fallback=True):
+        """Fetch a page of issues from the project, newest first.
+        
+        Pages are keyset-paginated on the issue key: after_key returns the page
+        of issues older than that key, before_key the page newer than it. Each
+        page is a single bounded JQL query, so deep pages cost the same as the
+        first. The result carries hasMore when further issues exist in the
+        requested direction.
+        """
         url = f"{self.base_url}/rest/api/3/search"
+        jql = f"project = {self.project_key}"
+        order = "DESC"
+        if after_key:
+            jql += f' AND key < "{after_key}"'
+        elif before_key:
+            jql += f' AND key > "{before_key}"'
+            order = "ASC"
         params = {
-            "jql": f"project = {self.project_key} ORDER BY created DESC",
-            "maxResults": max_results,
+            "jql": f"{jql} ORDER BY key {order}",
+            # One extra row tells us whether another page exists
+            "maxResults": max_results + 1,
             "fields": "summary,status,assignee,issuetype,priority,created,description,updated,reporter"
         }
         
         try:
             logger.info(f"Fetching issues with JQL: {params['jql']}")
-            response = requests.get(url, headers=self.headers, params=params, auth=self.auth)
+            response = self.request("GET", url, "search", params=params)
             response.raise_for_status()
-            return response.json()
+            result = self._page_result(self._decode(response), max_results, reverse=order == "ASC")
+            self.issue_index.update(result["issues"])
+            return result
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching issues: {e}")
-            # If the project key doesn't exist, try fetching all accessible issues
-            if "400" in str(e):
+            # A 400 for the first page usually means the project key doesn't exist:
+            # fall back to all accessible issues
+            status_code = e.response.status_code if getattr(e, "response", None) is not None else None
+            if status_code == 400 and fallback and not (after_key or before_key):
                 logger.warning(f"Project key {self.project_key} might not exist. Trying to fetch all accessible issues.")
                 params["jql"] = "ORDER BY created DESC"
+                params["maxResults"] = max_results
                 try:
-                    response = requests.get(url, headers=self.headers, params=params, auth=self.auth)
+                    response = self.request("GET", url, "search", params=params)
                     response.raise_for_status()
-                    return response.json()
+                    result = self._decode(response)
+                    result["hasMore"] = False
+                    return result
                 except requests.exceptions.RequestException as fallback_error:
                     logger.error(f"Fallback query also failed: {fallback_error}")
             raise
     
+    def fetch_issues_multi(self, project_keys, max_results=50, after_keys=None):
+        """Fetch one page of issues across several projects, newest created first.
+        
+        Every project is searched in parallel with its own keyset position
+        (after_keys maps project -> last key served from it, "" for none
+        yet; projects missing from it are exhausted), so the call takes
+        about as long as the slowest project. The pages are k-way merged on
+        created. The result's after_keys is the position for the next page,
+        and errors lists projects whose search failed (they are retried
+        from the same position on the next page).
+        """
+        if after_keys is None:
+            after_keys = {project_key: "" for project_key in project_keys}
+        active = [project_key for project_key in project_keys if project_key in after_keys]
+        
+        def fetch(project_key):
+            # No fallback: an unknown project must not turn into "every accessible issue"
+            return self.for_project(project_key).fetch_issues(
+                max_results, after_key=after_keys[project_key] or None, fallback=False
+            )
+        
+        pages, errors = {}, {}
+        if active:
+            workers = min(len(active), settings.JIRA_PROJECT_FETCH_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-project") as executor:
+                futures = {project_key: executor.submit(propagate(fetch), project_key) for project_key in active}
+                for project_key, future in futures.items():
+                    try:
+                        pages[project_key] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching issues for project {project_key}: {e}")
+                        errors[project_key] = str(e)
+            if not pages:
+                raise Exception(f"Fetching issues failed for every project: {errors}")
+        
+        # Each project's page is newest first (keys grow with creation), so a heap merge keeps that order
+        streams = [[(project_key, issue) for issue in page.get("issues", [])] for project_key, page in pages.items()]
+        merged = heapq.merge(*streams, key=lambda item: _created_timestamp(item[1]), reverse=True)
+        
+        issues = []
+        next_keys = {project_key: after_keys[project_key] for project_key in active}
+        served = dict.fromkeys(pages, 0)
+        for project_key, issue in itertools.islice(merged, max_results):
+            issues.append(issue)
+            next_keys[project_key] = issue["key"]
+            served[project_key] += 1
+        for project_key, page in pages.items():
+            if not page.get("hasMore") and served[project_key] == len(page.get("issues", [])):
+                del next_keys[project_key]
+        
+        return {
+            "issues": issues,
+            "maxResults": max_results,
+            "hasMore": bool(next_keys),
+            "after_keys": next_keys,
+            "projects": {project_key: {"served": served[project_key], "hasMore": project_key in next_keys}
+                         for project_key in pages},
+            "errors": errors,
+        }
+    
+    def for_project(self, project_key):
+        """The JiraService for another project: same connection, its own index and sync state"""
+        if project_key == self.project_key:
+            return self
+        if not known_project(project_key):
+            raise ValueError(f"Unknown project key: {project_key}")
+        return get_jira_service(project_key)
+    
+    def _page_result(self, result, max_results, reverse=False):
+        """Trim the look-ahead row from a search result and restore newest-first order"""
+        issues = result.get("issues", [])
+        result["hasMore"] = len(issues) > max_results
+        issues = issues[:max_results]
+        if reverse:
+            issues.reverse()
+        result["issues"] = issues
+        result["maxResults"] = max_results
+        return result
+    
     def fetch_issue_details(self, issue_key):
         """Fetch detailed information for a specific issue"""
+        return self.fetch_issue_raw(issue_key)[0]
+    
+    def fetch_issue_raw(self, issue_key):
+        """Fetch an issue as (decoded issue, Jira's response body), so the body can be passed through unchanged"""
         url = f"{self.base_url}/rest/api/3/issue/{issue_key}"
         
         try:
-            response = requests.get(url, headers=self.headers, auth=self.auth)
+            response = self.request("GET", url, "issue")
             response.raise_for_status()
-            return response.json()
+            result = self._decode(response)
+            self.issue_index.update([result])
+            return result, response.content
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching issue {issue_key}: {e}")
             raise
     
-    def create_issue(self, summary, description, issue_type="Task", parent_key=None):
-        """Create a new Jira issue"""
-        url = f"{self.base_url}/rest/api/3/issue"
-        
-        payload = {
-            "fields": {
-                "project": {"key": self.project_key},
-                "summary": summary,
-                "description": {
-                    "type": "doc",
-                    "version": 1,
-                    "content": [
-                        {
-                            "type": "paragraph",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": description
-                                }
-                            ]
-                        }
-                    ]
-                },
-                "issuetype": {"name": issue_type}
-            }
+    def _issue_fields(self, summary, description, issue_type="Task", parent_key=None, label=None):
+        """Build the fields payload for a new issue"""
+        fields = {
+            "project": {"key": self.project_key},
+            "summary": summary,
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [
+                    {
+                        "type": "paragraph",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": description
+                            }
+                        ]
+                    }
+                ]
+            },
+            "issuetype": {"name": issue_type}
         }
         
         # Add parent key if creating a subtask
         if parent_key and issue_type == "Subtask":
-            payload["fields"]["parent"] = {"key": parent_key}
+            fields["parent"] = {"key": parent_key}
+        if label:
+            fields["labels"] = [label]
+        return fields
+    
+    def _idempotency_label(self):
+        """A unique label that lets a retried create find the issue an earlier attempt made"""
+        if not settings.JIRA_IDEMPOTENCY_LABELS or self.labels_rejected:
+            return None
+        return f"idem-{uuid.uuid4().hex[:16]}"
+    
+    def _rejects_labels(self, errors):
+        """Whether Jira's field errors refuse the labels field; if so, stop sending idempotency labels"""
+        if "labels" not in (errors or {}):
+            return False
+        if not self.labels_rejected:
+            logger.warning(f"Jira refuses labels on {self.project_key} issues ({errors['labels']}); "
+                           f"creating them without idempotency labels")
+            self.labels_rejected = True
+        return True
+    
+    def find_by_labels(self, labels):
+        """Return {label: {"id", "key"}} for issues already carrying the given idempotency labels"""
+        quoted = ", ".join(f'"{label}"' for label in labels)
+        params = {
+            "jql": f"project = {self.project_key} AND labels in ({quoted})",
+            "fields": "labels",
+            "maxResults": len(labels)
+        }
+        response = self.request("GET", f"{self.base_url}/rest/api/3/search", "search", params=params)
+        response.raise_for_status()
+        found = {}
+        for issue in self._decode(response).get("issues", []):
+            for label in (issue.get("fields") or {}).get("labels") or []:
+                if label in labels:
+                    found[label] = {"id": issue.get("id"), "key": issue["key"]}
+        return found
+    
+    def create_issue(self, summary, description, issue_type="Task", parent_key=None):
+        """Create a new Jira issue"""
+        url = f"{self.base_url}/rest/api/3/issue"
+        label = self._idempotency_label()
+        payload = {"fields": self._issue_fields(summary, description, issue_type, parent_key, label)}
+        
+        def check_applied():
+            return self.find_by_labels([label]).get(label)
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload, auth=self.auth)
+            response = self.request("POST", url, "create", json=payload,
+                                    check_applied=check_applied if label else None)
+            if response.status_code == 400 and label and self._rejects_labels(self._decode(response).get("errors")):
+                # Without a label a create is only resent when nothing can have been applied
+                return self.create_issue(summary, description, issue_type, parent_key)
             response.raise_for_status()
-            return response.json()
+            result = self._decode(response)
+        except AlreadyApplied as e:
+            result = e.result
         except requests.exceptions.RequestException as e:
             logger.error(f"Error creating issue: {e}")
             raise
+        finally:
+            # Even a failed attempt may have created the issue
+            invalidate_validators([self.project_key])
+        if result.get("key"):
+            self.issue_index.add(result["key"], summary, description)
+        return result
+    
+    def create_issues_bulk(self, issues, labels=None):
+        """Create up to 50 issues in one request.
+        
+        issues is a list of (summary, description, issue_type, parent_key)
+        tuples. Returns one dict per input, in order: the created issue
+        ({"id", "key"}) or {"error": message} for elements Jira rejected.
+        labels gives each issue's idempotency label instead of fresh ones.
+        """
+        url = f"{self.base_url}/rest/api/3/issue/bulk"
+        labels = labels or [self._idempotency_label() for _ in issues]
+        payload = {"issueUpdates": [{"fields": self._issue_fields(*issue, label)} for issue, label in zip(issues, labels)]}
+        
+        def check_applied():
+            return self.find_by_labels(labels) or None
+        
+        try:
+            response = self.request("POST", url, "bulk_create", json=payload,
+                                    check_applied=check_applied if labels[0] else None)
+            # 400 is also returned when only some elements failed; the body says which
+            if response.status_code not in (200, 201, 400):
+                response.raise_for_status()
+            result = self._decode(response)
+            if response.status_code == 400 and not result.get("errors"):
+                response.raise_for_status()
+        except AlreadyApplied as e:
+            # Part of the batch went through before the failure; only create the rest
+            found = e.result
+            missing = [n for n, label in enumerate(labels) if label not in found]
+            rest = iter(self.create_issues_bulk([issues[n] for n in missing], [labels[n] for n in missing])
+                        if missing else [])
+            results = []
+            for (summary, description, _, _), label in zip(issues, labels):
+                if label in found:
+                    self.issue_index.add(found[label]["key"], summary, description)
+                    results.append(found[label])
+                else:
+                    results.append(next(rest))
+            return results
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Error bulk creating issues: {e}")
+            raise
+        finally:
+            invalidate_validators([self.project_key])
+        
+        failed = {error.get("failedElementNumber"): error for error in result.get("errors", [])}
+        created = iter(result.get("issues", []))
+        results, unlabelled = [], []
+        for i, (summary, description, _, _) in enumerate(issues):
+            if i in failed:
+                element = failed[i].get("elementErrors") or {}
+                if labels[i] and self._rejects_labels(element.get("errors")):
+                    unlabelled.append(i)
+                    results.append(None)
+                    continue
+                message = "; ".join(element.get("errorMessages", []) + list((element.get("errors") or {}).values()))
+                results.append({"error": message or f"Jira rejected the issue ({failed[i].get('status')})"})
+                continue
+            issue = next(created, None)
+            if issue is None:
+                results.append({"error": "Missing from the bulk create response"})
+                continue
+            self.issue_index.add(issue["key"], summary, description)
+            results.append({"id": issue.get("id"), "key": issue["key"]})
+        if unlabelled:
+            resent = self.create_issues_bulk([issues[i] for i in unlabelled], [None] * len(unlabelled))
+            for i, issue in zip(unlabelled, resent):
+                results[i] = issue
+        return results
+    
+    def iter_issues(self, jql_filter=None, fields=None, page_size=100, priority=None):
+        """Yield every matching project issue page by page, oldest key first.
+        
+        Walks the search with the same key-based keyset as fetch_issues, so
+        each page is one bounded query and only one page is held at a time.
+        """
+        url = f"{self.base_url}/rest/api/3/search"
+        base_jql = f"project = {self.project_key}"
+        if jql_filter:
+            base_jql += f" AND ({jql_filter})"
+        after_key = None
+        
+        while True:
+            jql = base_jql + (f' AND key > "{after_key}"' if after_key else "")
+            params = {
+                "jql": f"{jql} ORDER BY key ASC",
+                "maxResults": page_size,
+                "fields": fields or "summary,status,assignee,issuetype,priority,created,description,updated,reporter"
+            }
+            try:
+                response = self.request("GET", url, "search", priority=priority, params=params)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error iterating issues with JQL {params['jql']}: {e}")
+                raise
+            
+            result = self._decode(response)
+            issues = result.get("issues", [])
+            if issues:
+                yield issues
+            # Jira may serve fewer rows per page than asked for, so compare with what it used
+            if not issues or len(issues) < result.get("maxResults", page_size):
+                return
+            after_key = issues[-1]["key"]
+    
+    def fetch_changes(self, since, limit):
+        """Issues created or updated since a Unix timestamp, newest key first, and whether more than limit changed.
+        
+        Relative JQL dates avoid the Jira user's timezone. The window is rounded
+        up to whole minutes, so issues changed just before since can come back
+        again; callers treat the result as an upsert.
+        """
+        minutes = int((time.time() - since) // 60) + 1
+        issues = []
+        for page in self.iter_issues(f"updated >= -{minutes}m", page_size=min(limit + 1, settings.ISSUES_MAX_PAGE_SIZE)):
+            self.issue_index.update(page)
+            issues.extend(page)
+            if len(issues) > limit:
+                return issues[:limit][::-1], True
+        return issues[::-1], False
+    
+    def warm_issue_index(self, max_pages=None):
+        """Load the project's existing issues into the duplicate-ticket index"""
+        max_pages = settings.DUPLICATE_INDEX_WARM_PAGES if max_pages is None else max_pages
+        after_key = None
+        with outbound_priority(BATCH):
+            for _ in range(max_pages):
+                # fetch_issues feeds every page it returns into the index
+                page = self.fetch_issues(settings.ISSUES_MAX_PAGE_SIZE, after_key=after_key)
+                if not page.get("hasMore") or not page.get("issues"):
+                    break
+                after_key = page["issues"][-1]["key"]
+        self.issue_index.synced = True
+        logger.info(f"Indexed {len(self.issue_index)} existing issues for {self.project_key}")
     
-    def link_issues(self, outward_issue, inward_issue, link_type="Relates"):
-        """Link two Jira issues"""
+    def link_issues(self, outward_issue, inward_issue, link_type="Relates", raise_errors=False):
+        """Link two Jira issues; returns False on failure, or raises with raise_errors"""
         url = f"{self.base_url}/rest/api/3/issueLink"
         
         payload = {
@@ -114,73 +479,180 @@ class JiraService:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload, auth=self.auth)
+            # Jira never duplicates an identical link, so resending is safe
+            response = self.request("POST", url, "link", idempotent=True, json=payload)
             if response.status_code == 201:
                 return True
             else:
                 logger.error(f"Failed to link issues: {response.status_code} - {response.text}")
+                if raise_errors:
+                    response.raise_for_status()
                 return False
         except requests.exceptions.RequestException as e:
             logger.error(f"Error linking issues: {e}")
+            if raise_errors:
+                raise
             return False
+        finally:
+            invalidate_validators(issue_keys=[outward_issue, inward_issue])
     
     def get_link_types(self):
-        """Get available issue link types"""
+        """Get available issue link types (cached, they rarely change)"""
         url = f"{self.base_url}/rest/api/3/issueLinkType"
         
-        try:
-            response = requests.get(url, headers=self.headers, auth=self.auth)
+        def fetch():
+            response = self.request("GET", url, "link_types")
             response.raise_for_status()
-            return response.json().get("issueLinkTypes", [])
+            return self._decode(response).get("issueLinkTypes", [])
+        
+        try:
+            return self.cache.get_or_set(f"link_types:{self.base_url}", fetch, settings.JIRA_METADATA_CACHE_TTL)
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching link types: {e}")
             return []
 
 
+def _created_timestamp(issue):
+    created = parse_jira_datetime((issue.get("fields") or {}).get("created"))
+    return created.timestamp() if created is not None else 0.0
+
+
+_jira_services = {}
+_jira_services_lock = threading.Lock()
+
+
+def known_project(project_key):
+    """Whether requests may ask for a project: the configured one or one listed in JIRA_PROJECTS"""
+    return project_key == settings.JIRA_PROJECT_KEY or project_key in settings.JIRA_PROJECTS
+
+
+def get_jira_service(project_key=None):
+    """Return the process-wide JiraService for a project (the configured one by default)"""
+    project_key = project_key or settings.JIRA_PROJECT_KEY
+    with _jira_services_lock:
+        service = _jira_services.get(project_key)
+        if service is None:
+            service = _jira_services[project_key] = JiraService(project_key)
+        return service
+
+
 class GeminiService:
     """Service class for Google Gemini API interactions"""
     
-    def __init__(self):
-        self.api_keys = [settings.GEMINI_API_KEY1, settings.GEMINI_API_KEY2]
-        self.current_key_index = 0
-        self._configure_api()
+    def __init__(self, api_keys=None):
+        self.dispatcher = get_dispatcher(api_keys)
+        self.api_keys = [key.api_key for key in self.dispatcher.keys]
+        self.cache = get_cache("gemini")
+        # Hedges go to GEMINI_HEDGE_MODEL if set, otherwise to another key of the same model
+        self.hedger = get_hedger() if settings.GEMINI_HEDGING else None
+        self.hedge_dispatcher = (get_dispatcher(api_keys, settings.GEMINI_HEDGE_MODEL)
+                                 if settings.GEMINI_HEDGE_MODEL else self.dispatcher)
     
-    def _configure_api(self):
-        """Configure Gemini API with current key"""
-        genai.configure(api_key=self.api_keys[self.current_key_index])
+    def generate_content(self, prompt, retry_count=3):
+        """Generate content, reusing a cached response for an identical prompt"""
+        return self.cache.get_or_set(
+            self._content_key(prompt),
+            lambda: self._generate_uncached(prompt, retry_count),
+            settings.GEMINI_CACHE_TTL
+        )
     
-    def _rotate_key(self):
-        """Rotate to next API key"""
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        self._configure_api()
+    def stream_content(self, prompt, retry_count=3):
+        """Yield the response text chunk by chunk as Gemini produces it.
+        
+        A cached response is yielded in one piece. An attempt that fails
+        before its first chunk moves on to another key; once text has been
+        yielded, a failure is raised to the caller instead.
+        """
+        cache_key = self._content_key(prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        attempts = 0
+        last_error = None
+        while attempts < len(self.api_keys) * retry_count:
+            deadline.check("the Gemini call")
+            chunks = []
+            try:
+                with self.dispatcher.slot(timeout=deadline.remaining()) as key:
+                    started = time.monotonic()
+                    for chunk in key.model.generate_content(prompt, stream=True,
+                                                            request_options=self._request_options()):
+                        chunks.append(chunk.text)
+                        yield chunk.text
+                    metrics.observe(ATTEMPT_LATENCY, time.monotonic() - started)
+            except Exception as e:
+                if chunks:
+                    raise
+                last_error = e
+                logger.warning(f"Gemini API error: {e}")
+                attempts += 1
+                continue
+            self.cache.set(cache_key, "".join(chunks), settings.GEMINI_CACHE_TTL)
+            return
+        
+        raise Exception(f"All Gemini API keys failed: {last_error}")
     
-    def generate_content(self, prompt, retry_count=3):
-        """Generate content with automatic key rotation on failure"""
+    def _content_key(self, prompt):
+        return f"content:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+    
+    def _request_options(self):
+        """Per-call timeout: GEMINI_REQUEST_TIMEOUT, cut to what is left of the request deadline"""
+        return {"timeout": deadline.timeout(settings.GEMINI_REQUEST_TIMEOUT, "the Gemini call")}
+    
+    def _generate_uncached(self, prompt, retry_count=3):
+        """Generate content on the least-loaded healthy key, moving to another key on failure.
+        
+        Failed keys are cooled down by the dispatcher (longer for quota
+        errors), which replaces the fixed sleeps between rotations.
+        """
         attempts = 0
         last_error = None
         
         while attempts < len(self.api_keys) * retry_count:
+            deadline.check("the Gemini call")
             try:
-                # Use flash model for better rate limits
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                response = model.generate_content(prompt)
-                return response.text
+                if self.hedger is not None:
+                    return self._generate_hedged(prompt)
+                with self.dispatcher.slot(timeout=deadline.remaining()) as key:
+                    started = time.monotonic()
+                    response = key.model.generate_content(prompt, request_options=self._request_options())
+                    metrics.observe(ATTEMPT_LATENCY, time.monotonic() - started)
+                    return response.text
             except Exception as e:
                 last_error = e
-                logger.warning(f"Gemini API error with key {self.current_key_index}: {e}")
-                
-                if '429' in str(e) or 'quota' in str(e).lower():
-                    # Wait longer for quota issues
-                    time.sleep(5)
-                
-                self._rotate_key()
+                logger.warning(f"Gemini API error: {e}")
                 attempts += 1
-                
-                if attempts % len(self.api_keys) == 0:
-                    time.sleep(10)  # Longer wait between full rotations
         
         raise Exception(f"All Gemini API keys failed: {last_error}")
     
+    def _generate_hedged(self, prompt):
+        """Generate with a hedge: a slow attempt is raced by a duplicate on another key or model"""
+        def primary(cancelled, keys):
+            return self._streamed_attempt(self.dispatcher, prompt, cancelled, keys)
+        
+        def hedge(cancelled, primary_keys):
+            # Avoid the primary's key when hedging on the same model and another key exists
+            same_pool = self.hedge_dispatcher is self.dispatcher and len(self.dispatcher.keys) > 1
+            return self._streamed_attempt(self.hedge_dispatcher, prompt, cancelled, [],
+                                          exclude=primary_keys if same_pool else ())
+        
+        return self.hedger.run(primary, hedge)
+    
+    def _streamed_attempt(self, dispatcher, prompt, cancelled, keys, exclude=()):
+        """One streamed attempt; stops reading (and returns None) once another attempt has answered"""
+        with dispatcher.slot(exclude, timeout=deadline.remaining()) as key:
+            keys.append(key)
+            started = time.monotonic()
+            chunks = []
+            for chunk in key.model.generate_content(prompt, stream=True, request_options=self._request_options()):
+                if cancelled.is_set():
+                    return None
+                chunks.append(chunk.text)
+            metrics.observe(ATTEMPT_LATENCY, time.monotonic() - started)
+            return "".join(chunks)
+    
     def parse_json_response(self, response_text):
         """Extract and parse JSON from Gemini response"""
         try:
@@ -198,16 +670,67 @@ class GeminiService:
             return None
 
 
+def get_gemini_service():
+    """Build the configured Gemini backend ('stub' serves canned responses for load tests)"""
+    if settings.GEMINI_BACKEND == "stub":
+        from .stubs import StubGeminiService
+        return StubGeminiService(latency=settings.GEMINI_STUB_LATENCY)
+    return GeminiService()
+
+
 class AutomationService:
     """Service for AI-powered Jira automation"""
     
-    def __init__(self):
-        self.jira = JiraService()
-        self.gemini = GeminiService()
+    # Pacing delays (seconds) that keep the workflow under upstream rate limits
+    DEV_TASK_DELAY = 2
+    TEST_CASE_DELAY = 3
+    CREATE_DELAY = 2
+    
+    def __init__(self, jira=None, gemini=None):
+        self.jira = jira or get_jira_service()
+        self.gemini = gemini or get_gemini_service()
+        
+        if settings.AUTOMATION_PACING_SCALE != 1:
+            scale = settings.AUTOMATION_PACING_SCALE
+            self.DEV_TASK_DELAY = self.DEV_TASK_DELAY * scale
+            self.TEST_CASE_DELAY = self.TEST_CASE_DELAY * scale
+            self.CREATE_DELAY = self.CREATE_DELAY * scale
     
     def generate_development_tasks(self, requirement):
         """Generate development subtasks for a requirement"""
-        prompt = f"""Analyze the following software development task and generate EXACTLY 3 to 5 high-level, non-overlapping subtasks:
+        response_text = self.gemini.generate_content(self._dev_tasks_prompt(requirement))
+        return self.gemini.parse_json_response(response_text)
+    
+    def stream_development_tasks(self, requirement):
+        """Yield ("text", ...) and ("task", ...) events while tasks generate, then ("done", {"tasks": [...]})"""
+        return self._stream_items(self._dev_tasks_prompt(requirement), "task", "tasks")
+    
+    def generate_test_cases(self, task_description):
+        """Generate test cases for a development task"""
+        response_text = self.gemini.generate_content(self._test_cases_prompt(task_description))
+        return self.gemini.parse_json_response(response_text)
+    
+    def stream_test_cases(self, task_description):
+        """Yield ("text", ...) and ("test_case", ...) events while tests generate, then ("done", {"test_cases": [...]})"""
+        return self._stream_items(self._test_cases_prompt(task_description), "test_case", "test_cases")
+    
+    def _stream_items(self, prompt, item_event, result_key):
+        """Forward streamed text, plus each item of the JSON array as soon as it is complete"""
+        parser = JsonArrayParser()
+        chunks = []
+        for text in self.gemini.stream_content(prompt):
+            chunks.append(text)
+            yield "text", {"text": text}
+            for item in parser.feed(text):
+                yield item_event, item
+        
+        items = self.gemini.parse_json_response("".join(chunks))
+        if not items:
+            raise Exception(f"Failed to generate {result_key.replace('_', ' ')}")
+        yield "done", {result_key: items}
+    
+    def _dev_tasks_prompt(self, requirement):
+        return f"""Analyze the following software development task and generate EXACTLY 3 to 5 high-level, non-overlapping subtasks:
 Task: {requirement}
 
 Instructions:
@@ -231,13 +754,9 @@ Output the result as JSON in exactly this format:
 ]
 
 IMPORTANT: Verify that each subtask is unique and distinct before finalizing the output. The total number of subtasks MUST be between 3 and 5, inclusive."""
-        
-        response_text = self.gemini.generate_content(prompt)
-        return self.gemini.parse_json_response(response_text)
     
-    def generate_test_cases(self, task_description):
-        """Generate test cases for a development task"""
-        prompt = f"""Generate EXACTLY 3 to 5 comprehensive test cases for the following development task:
+    def _test_cases_prompt(self, task_description):
+        return f"""Generate EXACTLY 3 to 5 comprehensive test cases for the following development task:
 
 Task Description: {task_description}
 
@@ -262,27 +781,88 @@ Output the result as JSON in exactly this format:
 ]
 
 IMPORTANT: Make sure each test case is unique and thorough. The total number of test cases MUST be between 3 and 5, inclusive."""
-        
-        response_text = self.gemini.generate_content(prompt)
-        return self.gemini.parse_json_response(response_text)
     
-    def create_automated_workflow(self, requirement):
-        """Create complete automated workflow with parent ticket, dev tasks, and test cases"""
+    def create_automated_workflow(self, requirement, restart=False, reuse_existing=True):
+        """Create complete automated workflow with parent ticket, dev tasks, and test cases.
+
+        Every step is checkpointed against a WorkflowRun, so calling this again
+        with the same requirement after a failed or interrupted run resumes from
+        the last completed step (and sets resumed) instead of recreating tickets
+        or regenerating AI output. A completed run is never replayed, and
+        restart=True always starts a fresh run. With reuse_existing, tickets
+        equivalent to issues already in the project are linked instead of
+        created again.
+        """
+        run, resumed = WorkflowRun.for_requirement(requirement, restart=restart)
+        jira = self._writer(run)
         workflow_status = {
+            "workflow_id": run.pk,
+            "resumed": resumed,
             "requirement": requirement,
             "parent_ticket": None,
             "development_tasks": [],
             "test_cases": {},
+            "pruned": {"development_tasks": [], "test_cases": []},
+            "existing_tickets": [],
+            "resumed_steps": 0,
             "errors": []
         }
         
+        def checkpoint(step, func):
+            """Run a step once; on resume return its stored result instead"""
+            existing = run.get_checkpoint(step)
+            if existing is not None:
+                workflow_status["resumed_steps"] += 1
+                return existing.result
+            deadline.check(f"step {step}")
+            try:
+                result = func()
+            except Exception as e:
+                run.fail_checkpoint(step, e)
+                raise
+            if result:
+                run.save_checkpoint(step, result)
+            return result
+        
+        # Tickets created by this run never count as pre-existing duplicates
+        run_keys = set()
+        
+        def create_or_reuse(step, summary, description, issue_type="Task", parent_key=None, delay=0):
+            """Create a ticket once, or reuse an equivalent issue already in the project"""
+            def create():
+                if reuse_existing:
+                    match = jira.issue_index.find(summary, description, exclude=run_keys)
+                    if match:
+                        return {"key": match["key"], "existing": True, "similarity": match["similarity"]}
+                result = jira.create_issue(summary, description, issue_type, parent_key)
+                if jira is self.jira:
+                    deadline.pause(delay)  # Rate limiting (queued writes are paced by the outbox flusher)
+                return result
+            
+            result = checkpoint(step, create)
+            if result.get("existing"):
+                workflow_status["existing_tickets"].append({
+                    "item": summary,
+                    "key": result["key"],
+                    "similarity": result["similarity"]
+                })
+            elif result.get("key"):
+                run_keys.add(result["key"])
+            return result
+        
+        if reuse_existing and not self.jira.issue_index.synced:
+            try:
+                self.jira.warm_issue_index()
+            except Exception as e:
+                logger.warning(f"Could not index existing issues, duplicate detection is partial: {e}")
+        
+        # Links are created by a background stage so they never block ticket creation
+        links = self._link_pipeline(jira)
+        skipped_steps = 0
+        reached_end = False
         try:
             # Step 1: Create parent ticket
-            parent_result = self.jira.create_issue(
-                f"Main Task: {requirement}",
-                f"This is the parent ticket for: {requirement}\n\nSubtasks will be linked to this ticket.",
-                "Task"
-            )
+            parent_result = create_or_reuse("parent_ticket", *self._format_parent(requirement), "Task")
             workflow_status["parent_ticket"] = parent_result.get("key")
             
             if not workflow_status["parent_ticket"]:
@@ -290,43 +870,44 @@ IMPORTANT: Make sure each test case is unique and thorough. The total number of
                 return workflow_status
             
             # Step 2: Generate and create development tasks
-            logger.info("Generating development tasks...")
-            time.sleep(2)  # Rate limiting before AI call
+            def generate_dev_tasks():
+                logger.info("Generating development tasks...")
+                deadline.pause(self.DEV_TASK_DELAY)  # Rate limiting before AI call
+                
+                try:
+                    return self.generate_development_tasks(requirement)
+                except Exception as e:
+                    if "429" in str(e) or "quota" in str(e).lower():
+                        workflow_status["errors"].append("AI service quota exceeded. Please try again later.")
+                        workflow_status["errors"].append("Using fallback task generation due to quota limits")
+                        # Create manual fallback tasks
+                        return self._create_fallback_tasks(requirement)
+                    raise
             
             try:
-                dev_tasks = self.generate_development_tasks(requirement)
+                dev_tasks = checkpoint("development_tasks", generate_dev_tasks)
             except Exception as e:
-                if "429" in str(e) or "quota" in str(e).lower():
-                    workflow_status["errors"].append("AI service quota exceeded. Please try again later.")
-                    # Create manual fallback tasks
-                    dev_tasks = self._create_fallback_tasks(requirement)
-                    workflow_status["errors"].append("Using fallback task generation due to quota limits")
-                else:
-                    workflow_status["errors"].append(f"Failed to generate development tasks: {str(e)}")
-                    return workflow_status
+                workflow_status["errors"].append(f"Failed to generate development tasks: {str(e)}")
+                return workflow_status
             
             if not dev_tasks:
                 workflow_status["errors"].append("No development tasks generated")
                 return workflow_status
             
+            # Drop near-duplicate tasks before anything is written to Jira
+            dev_tasks, workflow_status["pruned"]["development_tasks"] = dedupe(
+                dev_tasks, self._dev_task_text, settings.AUTOMATION_DEDUP_THRESHOLD,
+                label=lambda task: task["title"]
+            )
+            
             # Get available link types
-            link_types = self.jira.get_link_types()
-            link_type = "Relates"
-            if link_types:
-                available_names = [lt["name"] for lt in link_types]
-                for lt in ["Relates", "Relates to", "Dependency"]:
-                    if lt in available_names:
-                        link_type = lt
-                        break
+            link_type = self._link_type()
             
             # Create development task tickets
-            for i, task in enumerate(dev_tasks):
-                description = (f"{task['summary']}\n\n"
-                             f"Category: {task['category']}\n"
-                             f"Component: {task['component']}\n"
-                             f"Parent Task: {workflow_status['parent_ticket']}")
-                
-                task_result = self.jira.create_issue(task["title"], description, "Task")
+            created_tasks = []
+            for i, task in dev_tasks:
+                summary, description = self._format_dev_task(task, workflow_status["parent_ticket"])
+                task_result = create_or_reuse(f"development_task:{i}", summary, description, "Task")
                 task_key = task_result.get("key")
                 
                 if task_key:
@@ -334,32 +915,385 @@ IMPORTANT: Make sure each test case is unique and thorough. The total number of
                         "key": task_key,
                         "title": task["title"],
                         "summary": task["summary"],
-                        "category": task["category"]
+                        "category": task["category"],
+                        "existing": bool(task_result.get("existing"))
                     })
+                    # Existing tickets are linked as they are; only new ones get test cases
+                    if not task_result.get("existing"):
+                        created_tasks.append((task, task_key))
                     
-                    # Link to parent
-                    self.jira.link_issues(workflow_status["parent_ticket"], task_key, link_type)
-                    
-                    # Step 3: Generate and create test cases for this task (with quota protection)
-                    time.sleep(3)  # Rate limiting
+                    # Queue the link to the parent
+                    if run.get_checkpoint(f"link:{task_key}") is None:
+                        links.submit(workflow_status["parent_ticket"], task_key, link_type)
+                    else:
+                        workflow_status["resumed_steps"] += 1
+                else:
+                    skipped_steps += 1
+            
+            # Step 3: Generate test cases for every task (with quota protection)
+            generated_tests = []
+            for task, task_key in created_tasks:
+                def generate_task_tests():
+                    deadline.pause(self.TEST_CASE_DELAY)  # Rate limiting
                     
                     try:
-                        test_cases = self.generate_test_cases(task["summary"])
+                        return self.generate_test_cases(task["summary"])
                     except Exception as e:
                         if "429" in str(e) or "quota" in str(e).lower():
                             workflow_status["errors"].append(f"AI quota exceeded for test cases of task {task_key}")
                             # Create basic test case manually
-                            test_cases = self._create_fallback_test_cases(task["title"])
+                            return self._create_fallback_test_cases(task["title"])
+                        raise
+                
+                try:
+                    test_cases = checkpoint(f"test_cases:{task_key}", generate_task_tests)
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    workflow_status["errors"].append(f"Failed to generate test cases for {task_key}: {str(e)}")
+                    skipped_steps += 1
+                    continue
+                
+                if test_cases:
+                    workflow_status["test_cases"][task_key] = []
+                    generated_tests.extend((task_key, j, tc) for j, tc in enumerate(test_cases))
+            
+            # Drop near-duplicate test cases within each task in one batch
+            kept_tests, workflow_status["pruned"]["test_cases"] = dedupe(
+                generated_tests, lambda entry: self._test_case_text(entry[2]),
+                settings.AUTOMATION_DEDUP_THRESHOLD,
+                label=lambda entry: f"{entry[0]}: {entry[2].get('test_name', 'Basic Test')}",
+                groups=[task_key for task_key, _, _ in generated_tests]
+            )
+            
+            # Step 4: Create test case subtasks
+            for _, (task_key, j, tc) in kept_tests:
+                tc_summary, tc_description = self._format_test_case(tc)
+                tc_result = create_or_reuse(f"test_case:{task_key}:{j}", tc_summary, tc_description,
+                                            "Subtask", task_key, delay=self.CREATE_DELAY)
+                
+                if tc_result.get("key"):
+                    workflow_status["test_cases"][task_key].append({
+                        "key": tc_result["key"],
+                        "name": tc.get("test_name", "Basic Test"),
+                        "priority": tc.get("priority", "Medium"),
+                        "existing": bool(tc_result.get("existing"))
+                    })
+                    if tc_result.get("existing"):
+                        if run.get_checkpoint(f"link:{tc_result['key']}") is None:
+                            links.submit(task_key, tc_result["key"], link_type)
                         else:
-                            workflow_status["errors"].append(f"Failed to generate test cases for {task_key}: {str(e)}")
-                            continue
-                    
-                    if test_cases:
-                        workflow_status["test_cases"][task_key] = []
-                        
-                        for tc in test_cases:
-                            steps_formatted = "\n".join([f"{i+1}. {step}" for i, step in enumerate(tc.get('steps', ['Execute test']))])
-                            tc_description = f"""Test Case: {tc.get('test_name', 'Basic Test')}
+                            workflow_status["resumed_steps"] += 1
+            
+            reached_end = True
+            
+        except DeadlineExceeded as e:
+            # Completed steps are checkpointed: calling again resumes from here
+            workflow_status["errors"].append(f"{e}; run the workflow again to resume")
+            logger.warning(f"Automation workflow {run.pk} stopped at its deadline: {e}")
+        except Exception as e:
+            workflow_status["errors"].append(str(e))
+            logger.error(f"Automation workflow error: {e}")
+        finally:
+            for link in links.drain():
+                if link["linked"]:
+                    run.save_checkpoint(f"link:{link['inward']}", True)
+                else:
+                    workflow_status["errors"].append(
+                        f"Failed to link {link['inward']} to {link['outward']} "
+                        f"after {link['attempts']} attempts: {link['error']}")
+                    skipped_steps += 1
+            
+            complete = reached_end and skipped_steps == 0
+            if jira is not self.jira:
+                workflow_status["pending_writes"] = jira.pending()
+            run.status = WorkflowRun.STATUS_COMPLETED if complete else WorkflowRun.STATUS_FAILED
+            run.result = workflow_status
+            run.save(update_fields=["status", "result", "updated_at"])
+            if jira is not self.jira:
+                jira.settle()
+        
+        return workflow_status
+    
+    def plan_workflow(self, requirement):
+        """Generate the full task/test tree for a requirement without touching Jira.
+        
+        Test cases for all tasks are generated in parallel, and Gemini
+        responses are cached, so planning is bounded by the slowest AI call
+        rather than by Jira pacing. The returned tree is what commit_plan writes.
+        """
+        summary, description = self._format_parent(requirement)
+        tree = {
+            "parent": {"summary": summary, "description": description},
+            "development_tasks": [],
+            "pruned": {"development_tasks": [], "test_cases": []},
+            "errors": []
+        }
+        
+        try:
+            dev_tasks = self.generate_development_tasks(requirement)
+        except Exception as e:
+            if "429" not in str(e) and "quota" not in str(e).lower():
+                raise
+            tree["errors"].append("AI service quota exceeded, using fallback task generation")
+            dev_tasks = self._create_fallback_tasks(requirement)
+        if not dev_tasks:
+            raise ValueError("No development tasks generated")
+        
+        kept_tasks, tree["pruned"]["development_tasks"] = dedupe(
+            dev_tasks, self._dev_task_text, settings.AUTOMATION_DEDUP_THRESHOLD,
+            label=lambda task: task["title"]
+        )
+        tasks = [dict(task, test_cases=[]) for _, task in kept_tasks]
+        
+        def generate_task_tests(task):
+            try:
+                return self.generate_test_cases(task["summary"]) or []
+            except Exception as e:
+                if "429" in str(e) or "quota" in str(e).lower():
+                    tree["errors"].append(f"AI quota exceeded for test cases of task {task['title']}")
+                    return self._create_fallback_test_cases(task["title"])
+                tree["errors"].append(f"Failed to generate test cases for {task['title']}: {str(e)}")
+                return []
+        
+        with ThreadPoolExecutor(max_workers=max(1, settings.AUTOMATION_PLAN_WORKERS),
+                                thread_name_prefix="plan") as pool:
+            test_lists = list(pool.map(propagate(generate_task_tests), tasks))
+        
+        generated_tests = [(i, tc) for i, test_cases in enumerate(test_lists) for tc in test_cases]
+        kept_tests, tree["pruned"]["test_cases"] = dedupe(
+            generated_tests, lambda entry: self._test_case_text(entry[1]),
+            settings.AUTOMATION_DEDUP_THRESHOLD,
+            label=lambda entry: f"{tasks[entry[0]]['title']}: {entry[1].get('test_name', 'Basic Test')}",
+            groups=[i for i, _ in generated_tests]
+        )
+        for _, (i, tc) in kept_tests:
+            tasks[i]["test_cases"].append(tc)
+        tree["development_tasks"] = tasks
+        return tree
+    
+    def commit_plan(self, plan, dry_run=False, reuse_existing=True):
+        """Write a saved plan to Jira with bulk creates and no pacing sleeps.
+        
+        Tickets are created level by level (parent, tasks, test subtasks),
+        each level in as few bulk requests as possible. Every created ticket
+        is checkpointed against the plan's WorkflowRun, so committing again
+        after a failure only creates what is missing. A dry run goes through
+        the same steps, including existing-issue matching, but writes nothing
+        and reports placeholder keys.
+        """
+        tree = plan.tree
+        run = plan.run
+        if run is None and not dry_run:
+            run = plan.run = WorkflowRun.objects.create(
+                idempotency_key=workflow_idempotency_key(f"plan {plan.pk}"), requirement=plan.requirement
+            )
+            plan.save(update_fields=["run", "updated_at"])
+        jira = self.jira if dry_run else self._writer(run)
+        
+        commit_status = {
+            "plan_id": plan.pk,
+            "revision": plan.revision,
+            "dry_run": dry_run,
+            "workflow_id": run.pk if run else None,
+            "parent_ticket": None,
+            "development_tasks": [],
+            "test_cases": {},
+            "existing_tickets": [],
+            "links": [],
+            "resumed_steps": 0,
+            "errors": []
+        }
+        run_keys = set()
+        placeholders = itertools.count(1)
+        
+        def resolve(entries):
+            """Return one result per (step, summary, description, issue_type, parent_key) entry"""
+            results = [None] * len(entries)
+            pending = []
+            for n, (step, summary, description, issue_type, parent_key) in enumerate(entries):
+                checkpoint = run.get_checkpoint(step) if run else None
+                match = None
+                if checkpoint is None and reuse_existing:
+                    match = jira.issue_index.find(summary, description, exclude=run_keys)
+                if checkpoint is not None:
+                    commit_status["resumed_steps"] += 1
+                    results[n] = checkpoint.result
+                elif match:
+                    results[n] = {"key": match["key"], "existing": True, "similarity": match["similarity"]}
+                    if run:
+                        run.save_checkpoint(step, results[n])
+                else:
+                    pending.append(n)
+                    continue
+                if results[n].get("existing"):
+                    commit_status["existing_tickets"].append({
+                        "item": summary, "key": results[n]["key"], "similarity": results[n]["similarity"]
+                    })
+                else:
+                    run_keys.add(results[n]["key"])
+            
+            for start in range(0, len(pending), settings.JIRA_BULK_CREATE_SIZE):
+                batch = pending[start:start + settings.JIRA_BULK_CREATE_SIZE]
+                deadline.check(f"creating {len(batch)} issues")
+                if dry_run:
+                    created = [{"key": f"NEW-{next(placeholders)}"} for _ in batch]
+                else:
+                    try:
+                        created = jira.create_issues_bulk([entries[n][1:] for n in batch])
+                    except Exception as e:
+                        created = [{"error": str(e)}] * len(batch)
+                for n, issue in zip(batch, created):
+                    results[n] = issue
+                    if issue.get("key"):
+                        run_keys.add(issue["key"])
+                        if run:
+                            run.save_checkpoint(entries[n][0], issue)
+                    else:
+                        commit_status["errors"].append(f"Failed to create '{entries[n][1]}': {issue.get('error')}")
+            return results
+        
+        if reuse_existing and not self.jira.issue_index.synced:
+            try:
+                self.jira.warm_issue_index()
+            except Exception as e:
+                logger.warning(f"Could not index existing issues, duplicate detection is partial: {e}")
+        
+        links = self._link_pipeline(jira)
+        link_type = self._link_type()
+        
+        def link(outward, inward):
+            if dry_run:
+                commit_status["links"].append({"outward": outward, "inward": inward, "link_type": link_type})
+            elif run.get_checkpoint(f"link:{inward}") is None:
+                links.submit(outward, inward, link_type)
+            else:
+                commit_status["resumed_steps"] += 1
+        
+        try:
+            parent = tree.get("parent") or {}
+            summary, description = self._format_parent(plan.requirement)
+            parent_key = resolve([("parent_ticket", parent.get("summary") or summary,
+                                   parent.get("description") or description, "Task", None)])[0].get("key")
+            commit_status["parent_ticket"] = parent_key
+            if not parent_key:
+                return commit_status
+            
+            tasks = tree["development_tasks"]
+            task_results = resolve([
+                (f"development_task:{i}", *self._format_dev_task(task, parent_key), "Task", None)
+                for i, task in enumerate(tasks)
+            ])
+            
+            test_entries, test_owners = [], []
+            for i, (task, task_result) in enumerate(zip(tasks, task_results)):
+                task_key = task_result.get("key")
+                if not task_key:
+                    continue
+                commit_status["development_tasks"].append({
+                    "key": task_key,
+                    "title": task["title"],
+                    "summary": task["summary"],
+                    "category": task.get("category", "General"),
+                    "existing": bool(task_result.get("existing"))
+                })
+                link(parent_key, task_key)
+                # Existing tickets are linked as they are; only new ones get test cases
+                if task_result.get("existing"):
+                    continue
+                commit_status["test_cases"][task_key] = []
+                for j, tc in enumerate(task.get("test_cases", [])):
+                    test_entries.append((f"test_case:{i}:{j}", *self._format_test_case(tc), "Subtask", task_key))
+                    test_owners.append((task_key, tc))
+            
+            for (task_key, tc), tc_result in zip(test_owners, resolve(test_entries)):
+                if not tc_result.get("key"):
+                    continue
+                commit_status["test_cases"][task_key].append({
+                    "key": tc_result["key"],
+                    "name": tc.get("test_name", "Basic Test"),
+                    "priority": tc.get("priority", "Medium"),
+                    "existing": bool(tc_result.get("existing"))
+                })
+                if tc_result.get("existing"):
+                    link(task_key, tc_result["key"])
+        except DeadlineExceeded as e:
+            # Created tickets are checkpointed: committing again creates only the rest
+            commit_status["errors"].append(f"{e}; commit the plan again to finish")
+            logger.warning(f"Commit of plan {plan.pk} stopped at its deadline: {e}")
+        except Exception as e:
+            commit_status["errors"].append(str(e))
+            logger.error(f"Error committing plan {plan.pk}: {e}")
+        finally:
+            for result in links.drain():
+                if result["linked"]:
+                    run.save_checkpoint(f"link:{result['inward']}", True)
+                else:
+                    commit_status["errors"].append(
+                        f"Failed to link {result['inward']} to {result['outward']} "
+                        f"after {result['attempts']} attempts: {result['error']}")
+            
+            if jira is not self.jira:
+                commit_status["pending_writes"] = jira.pending()
+            if not dry_run:
+                failed = bool(commit_status["errors"]) or not commit_status["parent_ticket"]
+                plan.status = plan.STATUS_FAILED if failed else plan.STATUS_COMMITTED
+                run.status = WorkflowRun.STATUS_FAILED if failed else WorkflowRun.STATUS_COMPLETED
+                run.result = commit_status
+                run.save(update_fields=["status", "result", "updated_at"])
+            plan.last_result = commit_status
+            plan.save(update_fields=["status", "last_result", "updated_at"])
+            if jira is not self.jira:
+                jira.settle()
+        
+        return commit_status
+    
+    def _writer(self, run):
+        """Where a run's creates and links go: the durable outbox with JIRA_WRITE_BEHIND, else straight to Jira"""
+        if not settings.JIRA_WRITE_BEHIND:
+            return self.jira
+        from .outbox import OutboxJiraService
+        return OutboxJiraService(self.jira, run)
+    
+    def _link_pipeline(self, jira):
+        # Queueing a link is a quick local write, so the outbox needs no link workers
+        return LinkPipeline(jira, max_workers=0 if jira is not self.jira else None)
+    
+    def _format_parent(self, requirement):
+        """Build the Jira summary and description for the parent ticket"""
+        return (f"Main Task: {requirement}",
+                f"This is the parent ticket for: {requirement}\n\nSubtasks will be linked to this ticket.")
+    
+    def _link_type(self):
+        """Pick the link type used between parent, task and test tickets"""
+        link_types = self.jira.get_link_types()
+        if link_types:
+            available_names = [lt["name"] for lt in link_types]
+            for lt in ["Relates", "Relates to", "Dependency"]:
+                if lt in available_names:
+                    return lt
+        return "Relates"
+    
+    def _dev_task_text(self, task):
+        """Text compared when looking for duplicate development tasks"""
+        return f"{task.get('title', '')} {task.get('summary', '')}"
+    
+    def _test_case_text(self, tc):
+        """Text compared when looking for duplicate test cases"""
+        return f"{tc.get('test_name', '')} {tc.get('description', '')} {' '.join(tc.get('steps', []))}"
+    
+    def _format_dev_task(self, task, parent_key):
+        """Build the Jira summary and description for a development task"""
+        description = (f"{task['summary']}\n\n"
+                     f"Category: {task.get('category', 'General')}\n"
+                     f"Component: {task.get('component', 'General')}\n"
+                     f"Parent Task: {parent_key}")
+        return task["title"], description
+    
+    def _format_test_case(self, tc):
+        """Build the Jira summary and description for a test case subtask"""
+        steps_formatted = "\n".join([f"{i+1}. {step}" for i, step in enumerate(tc.get('steps', ['Execute test']))])
+        tc_description = f"""Test Case: {tc.get('test_name', 'Basic Test')}
             
 Description: {tc.get('description', 'Test the functionality')}
 
@@ -369,24 +1303,9 @@ Steps:
 Expected Result: {tc.get('expected_result', 'Functionality works as expected')}
 
 Priority: {tc.get('priority', 'Medium')}"""
-                            
-                            tc_summary = f"Test: {tc.get('test_name', 'Basic Test')} [{tc.get('priority', 'Medium')}]"
-                            tc_result = self.jira.create_issue(tc_summary, tc_description, "Subtask", task_key)
-                            
-                            if tc_result.get("key"):
-                                workflow_status["test_cases"][task_key].append({
-                                    "key": tc_result["key"],
-                                    "name": tc.get("test_name", "Basic Test"),
-                                    "priority": tc.get("priority", "Medium")
-                                })
-                            
-                            time.sleep(2)  # Rate limiting
-            
-        except Exception as e:
-            workflow_status["errors"].append(str(e))
-            logger.error(f"Automation workflow error: {e}")
         
-        return workflow_status
+        tc_summary = f"Test: {tc.get('test_name', 'Basic Test')} [{tc.get('priority', 'Medium')}]"
+        return tc_summary, tc_description
     
     def _create_fallback_tasks(self, requirement):
         """Create basic fallback tasks when AI is unavailable"""
@@ -0,0 +1,253 @@
+# jira_api/snapshot.py
+# On-disk snapshots of the in-memory caches, so a restarted worker starts warm.
+#
+# File layout: a fixed header (magic, save time, table-of-contents offset and
+# length, HMAC of the table of contents), one serialised section per cache -
+# "cache" (the memory service-cache backend), "store:<project>" (analytics
+# issue stores) and "index:<project>" (duplicate-detection indexes) - then the
+# table of contents {section: (offset, length, saved_at, HMAC)}. The file is
+# memory-mapped and only the table of contents is read up front; each section
+# is decoded when its cache is first created.
+#
+# Sections are pickles, so nothing is decoded unless its HMAC (keyed with
+# SECRET_KEY) matches, and files that are not owned by this user or are
+# writable by others are ignored.
+import atexit
+import hmac
+import mmap
+import os
+import struct
+import threading
+import time
+import logging
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+from . import metrics
+from .cache import deserialize, serialize
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"JAPSNAP2"
+HEADER = struct.Struct("<8sdQQ32s")
+
+
+def sign(data):
+    """HMAC of snapshot bytes; only this deployment (which knows SECRET_KEY) can produce it"""
+    return salted_hmac("jira_api.snapshot", bytes(data), algorithm="sha256").digest()
+
+
+class CacheSnapshot:
+    """Saves the in-memory caches to one file and restores them section by section.
+
+    start() maps the last snapshot, restores every section on a background
+    thread (a request that needs a cache sooner restores it itself) and then
+    saves every interval seconds and at exit. Sections older than max_age
+    seconds are ignored; sections this process never loaded are carried
+    over into its snapshots unchanged.
+    """
+
+    def __init__(self, path=None, interval=None, max_age=None):
+        self.path = settings.CACHE_SNAPSHOT_PATH if path is None else path
+        self.interval = settings.CACHE_SNAPSHOT_INTERVAL if interval is None else interval
+        self.max_age = settings.CACHE_SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.last_saved = None
+        self.last_size = None
+        self._map = None
+        self._toc = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Restore the last snapshot in the background and keep saving new ones"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="cache-snapshot", daemon=True)
+            self._thread.start()
+        atexit.register(self.save)
+
+    def _run(self):
+        self.warm()
+        while self.interval > 0:
+            time.sleep(self.interval)
+            self.save()
+
+    def warm(self):
+        """Restore every section of the last snapshot now rather than on first use"""
+        from .cache import get_cache
+        from .dedup import get_issue_index
+        from .store import get_issue_store
+
+        owners = {"cache": lambda key: get_cache(), "store": get_issue_store, "index": get_issue_index}
+        with self._lock:
+            self._open()
+            names = list(self._toc)
+        started = time.monotonic()
+        for name in names:
+            kind, _, key = name.partition(":")
+            if kind in owners:
+                # Creating the cache restores its section (unless a request already did)
+                owners[kind](key)
+        if names:
+            logger.info(f"Restored {len(names)} cache snapshot sections in {time.monotonic() - started:.2f}s")
+
+    def restore(self, name):
+        """The saved state for a section, once; None when there is none or it is too old"""
+        with self._lock:
+            self._open()
+            entry = self._toc.pop(name, None)
+            if entry is None:
+                return None
+            offset, length, saved_at, signature = entry
+            if self._stale(saved_at):
+                return None
+            data = self._map[offset:offset + length]
+        if not hmac.compare_digest(sign(data), signature):
+            logger.warning(f"Ignoring cache snapshot section {name}: bad signature")
+            return None
+        try:
+            state = deserialize(data)
+        except Exception as e:
+            logger.error(f"Could not restore cache snapshot section {name}: {e}")
+            return None
+        metrics.increment("cache_snapshot_restores_total", section=name.partition(":")[0])
+        return state
+
+    def save(self):
+        """Write a snapshot of every in-memory cache; returns the number of sections written"""
+        with self._save_lock:
+            try:
+                return self._save()
+            except Exception as e:
+                logger.error(f"Error saving cache snapshot to {self.path}: {e}")
+                metrics.increment("cache_snapshot_errors_total")
+                return 0
+
+    def _save(self):
+        now = time.time()
+        sections = {}
+        for name, state in _states():
+            if state:
+                data = serialize(state)
+                sections[name] = (data, now, sign(data))
+        if not sections:
+            # Nothing cached in this process: leave the last snapshot alone
+            return 0
+        with self._lock:
+            self._open()
+            for name, (offset, length, saved_at, signature) in self._toc.items():
+                if name not in sections and not self._stale(saved_at):
+                    # Carried over with its own signature, which restore() still checks
+                    sections[name] = (self._map[offset:offset + length], saved_at, signature)
+
+        toc, offset = {}, HEADER.size
+        for name, (data, saved_at, signature) in sections.items():
+            toc[name] = (offset, len(data), saved_at, signature)
+            offset += len(data)
+        encoded = serialize(toc)
+
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        # Readable and writable by this user only
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(HEADER.pack(MAGIC, now, offset, len(encoded), sign(encoded)))
+            for data, saved_at, signature in sections.values():
+                f.write(data)
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        # Atomic: other workers (and this one's mapping) keep reading the old file
+        os.replace(temporary, self.path)
+
+        self.last_saved = now
+        self.last_size = offset + len(encoded)
+        metrics.increment("cache_snapshot_saves_total")
+        logger.debug(f"Saved {len(sections)} cache snapshot sections ({self.last_size} bytes) to {self.path}")
+        return len(sections)
+
+    def _open(self):
+        """Map the snapshot file and read its table of contents (once; caller holds the lock)"""
+        if self._toc is not None:
+            return
+        self._toc = {}
+        try:
+            with open(self.path, "rb") as f:
+                info = os.fstat(f.fileno())
+                if info.st_mode & 0o022 or (hasattr(os, "getuid") and info.st_uid != os.getuid()):
+                    raise ValueError("the file must be owned by this user and not writable by others")
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # No snapshot yet (or an empty file): start cold
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring cache snapshot {self.path}: {e}")
+            return
+        try:
+            magic, saved_at, toc_offset, toc_length, signature = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError("not a cache snapshot")
+            encoded = mapped[toc_offset:toc_offset + toc_length]
+            if not hmac.compare_digest(sign(encoded), signature):
+                raise ValueError("bad signature (written by another deployment, or modified)")
+            toc = deserialize(encoded)
+        except Exception as e:
+            logger.warning(f"Ignoring cache snapshot {self.path}: {e}")
+            mapped.close()
+            return
+        self._map = mapped
+        self._toc = {name: entry for name, entry in toc.items() if not self._stale(entry[2])}
+
+    def _stale(self, saved_at):
+        return time.time() - saved_at > self.max_age
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._toc or {})
+        return {"path": self.path, "last_saved": self.last_saved, "last_size": self.last_size,
+                "sections_not_restored": pending}
+
+
+def _states():
+    """(section, state) for every in-memory cache of this process"""
+    from .cache import MemoryCache, get_cache
+    from .dedup import issue_indexes
+    from .store import issue_stores
+
+    backend = get_cache()
+    if isinstance(backend, MemoryCache):
+        yield "cache", backend.dump_state()
+    for project_key, store in issue_stores().items():
+        yield f"store:{project_key}", store.dump_state()
+    for project_key, index in issue_indexes().items():
+        yield f"index:{project_key}", index.dump_state()
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def start():
+    """Restore and keep saving the cache snapshot in this process (a no-op when snapshots are disabled).
+
+    Only the WSGI and ASGI entry points call this: management commands,
+    shells and tests neither read nor write snapshots.
+    """
+    global _snapshot
+    if not settings.CACHE_SNAPSHOT_PATH:
+        return
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = CacheSnapshot()
+    _snapshot.start()
+
+
+def get_snapshot():
+    """Return this process's cache snapshot, or None when it is not serving one"""
+    return _snapshot
+
+
+def restore(name):
+    """Saved state for a cache section, or None (also when this process is not serving snapshots)"""
+    snapshot = _snapshot
+    return snapshot.restore(name) if snapshot is not None else None
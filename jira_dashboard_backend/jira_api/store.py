@@ -0,0 +1,226 @@
+# jira_api/store.py
+# Local columnar copy of the issue fields the analytics need.
+import threading
+import time
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from .conditional import parse_jira_datetime
+from .snapshot import restore as restore_snapshot
+
+logger = logging.getLogger(__name__)
+
+STORE_FIELDS = "status,issuetype,assignee,created,updated,resolutiondate"
+
+UNASSIGNED = "Unassigned"
+
+COLUMNS = ("status", "status_category", "issue_type", "assignee", "created", "updated", "resolved")
+
+CATEGORIES = ("statuses", "status_categories", "issue_types", "assignees")
+
+
+class Categories:
+    """Interns repeated strings (statuses, types, assignees) as small integer codes"""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def load(self, names):
+        self.names = list(names)
+        self.codes = {name: code for code, name in enumerate(self.names)}
+
+
+class IssueStore:
+    """Column-per-field issue store for one project.
+
+    Each field lives in its own NumPy array indexed by row, with strings
+    interned as category codes, so aggregates over 100k+ issues are a few
+    vectorised operations. Rows are upserted incrementally; version is bumped
+    on every change so cached aggregates know when to recompute.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, project_key):
+        self.project_key = project_key
+        self.lock = threading.RLock()
+        self.version = 0
+        self.last_sync = None
+        self.rows = {}
+        self.keys = []
+        self.statuses = Categories()
+        self.status_categories = Categories()
+        self.issue_types = Categories()
+        self.assignees = Categories()
+        self._allocate(self.INITIAL_CAPACITY)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _allocate(self, capacity):
+        def grow(name, dtype, fill):
+            column = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:len(old)] = old
+            setattr(self, name, column)
+
+        grow("status", np.int32, -1)
+        grow("status_category", np.int32, -1)
+        grow("issue_type", np.int32, -1)
+        grow("assignee", np.int32, -1)
+        grow("created", np.float64, np.nan)
+        grow("updated", np.float64, np.nan)
+        grow("resolved", np.float64, np.nan)
+        grow("alive", np.bool_, False)
+        self.capacity = capacity
+
+    @property
+    def size(self):
+        """Number of allocated rows (including removed ones)"""
+        return len(self.keys)
+
+    def upsert(self, issues):
+        """Insert or update issues from Jira search results"""
+        with self.lock:
+            # Build each column's new values in Python, then write them with one
+            # vectorised assignment per column
+            rows, columns = [], {name: [] for name in COLUMNS}
+            for issue in issues:
+                fields = issue.get("fields") or {}
+                row = self.rows.get(issue["key"])
+                if row is None:
+                    row = self.rows[issue["key"]] = len(self.keys)
+                    self.keys.append(issue["key"])
+                rows.append(row)
+
+                status = fields.get("status") or {}
+                columns["status"].append(self.statuses.code(status.get("name", "Unknown")))
+                columns["status_category"].append(self.status_categories.code(
+                    (status.get("statusCategory") or {}).get("key", "undefined")))
+                columns["issue_type"].append(self.issue_types.code((fields.get("issuetype") or {}).get("name", "Unknown")))
+                columns["assignee"].append(self.assignees.code((fields.get("assignee") or {}).get("displayName") or UNASSIGNED))
+                columns["created"].append(_timestamp(fields.get("created")))
+                columns["updated"].append(_timestamp(fields.get("updated")))
+                columns["resolved"].append(_timestamp(fields.get("resolutiondate")))
+
+            if not rows:
+                return 0
+            while len(self.keys) > self.capacity:
+                self._allocate(self.capacity * 2)
+            for name, values in columns.items():
+                getattr(self, name)[rows] = values
+            self.alive[rows] = True
+            self.version += 1
+        return len(rows)
+
+    def remove(self, keys):
+        """Mark issues as deleted"""
+        with self.lock:
+            rows = [self.rows.pop(key) for key in keys if key in self.rows]
+            if rows:
+                self.alive[rows] = False
+                self.version += 1
+        return len(rows)
+
+    def sync(self, jira, full=False):
+        """Pull changes from Jira: everything on the first/full sync, else only recent updates"""
+        started = time.time()
+        if full or self.last_sync is None:
+            jql_filter = None
+            seen = set()
+        else:
+            # Relative JQL dates avoid the Jira user's timezone; overlap by a minute
+            minutes = int((started - self.last_sync) // 60) + 1
+            jql_filter = f"updated >= -{minutes}m"
+            seen = None
+
+        synced = 0
+        for page in jira.iter_issues(jql_filter, fields=STORE_FIELDS, page_size=settings.ISSUES_MAX_PAGE_SIZE):
+            synced += self.upsert(page)
+            if seen is not None:
+                seen.update(issue["key"] for issue in page)
+
+        if seen is not None:
+            # A full sync also tells us which issues were deleted
+            self.remove([key for key in list(self.rows) if key not in seen])
+        self.last_sync = started
+        logger.info(f"Synced {synced} issues into the {self.project_key} store (full={jql_filter is None})")
+        return synced
+
+    def dump_state(self):
+        """Copy of the synced rows and categories for a cache snapshot, or None before the first sync"""
+        with self.lock:
+            if self.last_sync is None:
+                return None
+            size = self.size
+            return {
+                "version": self.version,
+                "last_sync": self.last_sync,
+                "keys": list(self.keys),
+                "categories": {name: list(getattr(self, name).names) for name in CATEGORIES},
+                "columns": {name: getattr(self, name)[:size].copy() for name in COLUMNS + ("alive",)},
+            }
+
+    def load_state(self, state):
+        """Replace the store's contents with a dump_state() snapshot; the next sync is incremental"""
+        with self.lock:
+            capacity = self.INITIAL_CAPACITY
+            while capacity < len(state["keys"]):
+                capacity *= 2
+            for name in COLUMNS + ("alive",):
+                setattr(self, name, None)
+            self._allocate(capacity)
+            for name, values in state["columns"].items():
+                getattr(self, name)[:len(values)] = values
+            for name, names in state["categories"].items():
+                getattr(self, name).load(names)
+            self.keys = list(state["keys"])
+            # Removed and re-added issues leave dead rows behind; only live rows are indexed
+            self.rows = {key: row for row, key in enumerate(self.keys) if self.alive[row]}
+            self.version = state["version"]
+            self.last_sync = state["last_sync"]
+
+    def ensure_fresh(self, jira, max_age=None):
+        """Sync if the store has never been synced or is older than max_age seconds"""
+        max_age = settings.ANALYTICS_SYNC_INTERVAL if max_age is None else max_age
+        with self.lock:
+            if self.last_sync is None or time.time() - self.last_sync > max_age:
+                self.sync(jira)
+
+
+def _timestamp(value):
+    parsed = parse_jira_datetime(value)
+    return parsed.timestamp() if parsed is not None else np.nan
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_issue_store(project_key):
+    """Return the process-wide issue store for a project"""
+    with _stores_lock:
+        store = _stores.get(project_key)
+        if store is None:
+            store = _stores[project_key] = IssueStore(project_key)
+            state = restore_snapshot(f"store:{project_key}")
+            if state is not None:
+                store.load_state(state)
+        return store
+
+
+def issue_stores():
+    """Every issue store created by this process, by project"""
+    with _stores_lock:
+        return dict(_stores)
@@ -0,0 +1,84 @@
+# jira_api/streaming.py
+# Server-Sent Events for streamed AI generation.
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayParser:
+    """Incrementally parses a JSON array of objects as text arrives.
+
+    feed() returns every object completed by the new text, so callers can
+    act on each item long before the closing bracket. Text before the
+    array (a ```json fence, a sentence of preamble) is skipped.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self._finished = False
+
+    def feed(self, text):
+        items = []
+        for char in text:
+            if self._finished:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+            if self._depth:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._buffer = [char]
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self._finished = True
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._parse("".join(self._buffer))
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._buffer = []
+        return items
+
+    @staticmethod
+    def _parse(text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_stream(events):
+    """Turn (event, data) pairs into SSE text, ending with an error event if the source fails"""
+    # A comment line first makes proxies and browsers start delivering the stream
+    yield ": stream\n\n"
+    try:
+        for event, data in events:
+            yield sse_event(event, data)
+    except Exception as e:
+        logger.error(f"Error while streaming events: {e}")
+        yield sse_event("error", {"error": str(e)})
@@ -0,0 +1,357 @@
+# jira_api/stubs.py
+# In-memory stand-ins for the Jira and Gemini services, used by benchmarks
+# and load tests so they can run without real credentials.
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+
+from . import deadline
+from .conditional import parse_jira_datetime
+from .dedup import IssueSimilarityIndex
+from .records import IssueRecord
+from .services import GeminiService
+
+
+class StubJiraService:
+    """In-memory JiraService replacement with configurable per-call latency"""
+
+    def __init__(self, latency=0.05, link_latency=None, project_key="STUB"):
+        self.latency = latency
+        self.link_latency = latency if link_latency is None else link_latency
+        self.project_key = project_key
+        self.issues = {}
+        self.links = []
+        self.labelled = {}
+        self.issue_index = IssueSimilarityIndex()
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def create_issue(self, summary, description, issue_type="Task", parent_key=None):
+        """Create an issue in memory"""
+        time.sleep(self.latency)
+        return self._create(summary, description, issue_type, parent_key)
+
+    def _create(self, summary, description, issue_type="Task", parent_key=None):
+        with self._lock:
+            self._counter += 1
+            key = f"{self.project_key}-{self._counter}"
+            record = self.issues[key] = IssueRecord(key, str(10000 + self._counter), summary, description,
+                                                    issue_type=issue_type, parent=parent_key)
+        self.issue_index.add(key, summary, description)
+        return {"id": record.id, "key": key}
+
+    def create_issues_bulk(self, issues, labels=None):
+        """Create several issues in memory for the cost of one call"""
+        time.sleep(self.latency)
+        results = [self._create(*issue) for issue in issues]
+        for label, result in zip(labels or [], results):
+            if label:
+                self.labelled[label] = result
+        return results
+
+    def _idempotency_label(self):
+        """A unique label, when JiraService would use one"""
+        return f"idem-{uuid.uuid4().hex[:16]}" if settings.JIRA_IDEMPOTENCY_LABELS else None
+
+    def find_by_labels(self, labels):
+        """Return {label: {"id", "key"}} for issues created with the given idempotency labels"""
+        return {label: self.labelled[label] for label in labels if label in self.labelled}
+
+    def link_issues(self, outward_issue, inward_issue, link_type="Relates", raise_errors=False):
+        """Record a link in memory"""
+        time.sleep(self.link_latency)
+        with self._lock:
+            self.links.append((outward_issue, inward_issue, link_type))
+        return True
+
+    def warm_issue_index(self, max_pages=None):
+        """Every stub issue is indexed as it is created"""
+        self.issue_index.synced = True
+
+    def get_link_types(self):
+        """Return the default link type"""
+        return [{"name": "Relates"}]
+
+    def fetch_issues(self, max_results=50, after_key=None, before_key=None):
+        """Return a keyset-paginated page of issues, newest first"""
+        time.sleep(self.latency)
+        number = lambda key: int(key.rsplit("-", 1)[1])
+        with self._lock:
+            issues = list(self.issues.values())[::-1]
+        if after_key:
+            issues = [i for i in issues if number(i.key) < number(after_key)]
+        elif before_key:
+            issues = [i for i in issues if number(i.key) > number(before_key)][-(max_results + 1):]
+        has_more = len(issues) > max_results
+        page = issues[-max_results:] if before_key else issues[:max_results]
+        return {"startAt": 0, "maxResults": max_results, "total": len(self.issues),
+                "issues": [record.to_jira() for record in page], "hasMore": has_more}
+
+    def fetch_issue_details(self, issue_key):
+        """Return a single issue"""
+        time.sleep(self.latency)
+        return self.issues[issue_key].to_jira()
+
+
+class StubGenerativeModel:
+    """Stand-in for a per-key GenerativeModel: canned text after a fixed latency.
+
+    slow_rate of the calls take slow_factor times longer, to produce a latency tail.
+    """
+
+    def __init__(self, latency=0.2, text="[]", slow_rate=0.0, slow_factor=10, chunks=4):
+        self.latency = latency
+        self.text = text
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.chunks = chunks
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        latency = self.latency * (self.slow_factor if random.random() < self.slow_rate else 1)
+        if stream:
+            return self._stream(latency)
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and timeout < latency:
+            time.sleep(timeout)
+            raise google_exceptions.DeadlineExceeded(f"Stub model call timed out after {timeout:.1f}s")
+        time.sleep(latency)
+        return SimpleNamespace(text=self.text)
+
+    def _stream(self, latency):
+        size = -(-len(self.text) // self.chunks) or 1
+        for start in range(0, max(len(self.text), 1), size):
+            time.sleep(latency / self.chunks)
+            yield SimpleNamespace(text=self.text[start:start + size])
+
+
+class StubGeminiService(GeminiService):
+    """GeminiService replacement that returns canned task and test case JSON"""
+
+    def __init__(self, latency=0.0, task_count=4, test_count=3):
+        self.latency = latency
+        self.task_count = task_count
+        self.test_count = test_count
+        self.api_keys = ["stub"]
+
+    def generate_content(self, prompt, retry_count=3):
+        """Return a canned JSON payload shaped like the prompt asks for"""
+        deadline.check("the Gemini call")
+        deadline.pause(self.latency)
+        deadline.check("the Gemini response")
+        return self._canned(prompt)
+
+    def stream_content(self, prompt, retry_count=3, chunk_size=64):
+        """Yield the canned payload in chunks spread over the configured latency"""
+        text = self._canned(prompt)
+        chunks = [text[start:start + chunk_size] for start in range(0, len(text), chunk_size)]
+        for chunk in chunks:
+            deadline.pause(self.latency / len(chunks))
+            deadline.check("the next Gemini chunk")
+            yield chunk
+
+    def _canned(self, prompt):
+        # Tag items with the prompt so different requirements never look like duplicates
+        tag = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        if "test cases" in prompt:
+            items = [{
+                "test_id": f"TC-{i + 1}",
+                "test_name": f"Stub test case {i + 1} {tag}",
+                "description": f"Verify behaviour {i + 1}",
+                "steps": ["Prepare", "Execute", "Verify"],
+                "expected_result": "Behaves as expected",
+                "priority": "Medium"
+            } for i in range(self.test_count)]
+        else:
+            items = [{
+                "summary": f"Stub development task {i + 1} {tag}",
+                "category": "Backend",
+                "component": f"component-{i + 1}",
+                "title": f"Stub task {i + 1} {tag}"
+            } for i in range(self.task_count)]
+        return json.dumps(items)
+
+
+JIRA_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.000%z"
+_KEY_BOUND = re.compile(r'key\s*([<>])\s*"?([A-Za-z][A-Za-z0-9_]*-\d+)"?')
+_KEY_ORDER = re.compile(r"ORDER BY key (ASC|DESC)", re.IGNORECASE)
+_PROJECT = re.compile(r"project\s*=\s*\"?([A-Za-z][A-Za-z0-9_]*)")
+_UPDATED_SINCE = re.compile(r"updated\s*>=\s*-(\d+)m")
+
+
+class StubJiraServer:
+    """Minimal Jira REST API over HTTP, for load testing real server deployments.
+
+    Serves the endpoints JiraService calls (search with keyset JQL, issue
+    read/create, issue links, link types, myself, project) from memory, with
+    a fixed latency per request. Runs in a background thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, project_key="STUB", seed_issues=500,
+                 extra_projects=()):
+        self.latency = latency
+        self.project_key = project_key
+        self.project_keys = [project_key, *extra_projects]
+        self.issues = {}
+        self.links = []
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        for key in self.project_keys:
+            self.seed(seed_issues, key)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def seed(self, count, project_key=None):
+        """Create count issues spread over the last year"""
+        now = datetime.now(timezone.utc)
+        statuses = [("To Do", "new"), ("In Progress", "indeterminate"), ("Done", "done")]
+        for i in range(count):
+            created = now - timedelta(hours=(count - i) * 24 * 365 / max(count, 1))
+            status, category = statuses[i % len(statuses)]
+            self._add_issue({
+                "summary": f"Seeded issue {i + 1}",
+                "description": f"Generated by the stub Jira server ({i + 1})",
+                "issuetype": {"name": "Task"},
+                "status": {"name": status, "statusCategory": {"key": category, "name": status}},
+                "created": created.strftime(JIRA_TIMESTAMP),
+                "updated": created.strftime(JIRA_TIMESTAMP),
+            }, project_key)
+
+    def _add_issue(self, fields, project_key=None):
+        """Store an issue (as a compact record) and return the record"""
+        project_key = project_key or (fields.get("project") or {}).get("key") or self.project_key
+        with self._lock:
+            number = self._counters[project_key] = self._counters.get(project_key, 0) + 1
+            key = f"{project_key}-{number}"
+            now = datetime.now(timezone.utc).strftime(JIRA_TIMESTAMP)
+            fields.setdefault("status", {"name": "To Do", "statusCategory": {"key": "new", "name": "To Do"}})
+            fields.setdefault("created", now)
+            fields.setdefault("updated", now)
+            record = self.issues[key] = IssueRecord.from_jira(
+                {"id": str(10000 + len(self.issues) + 1), "key": key, "fields": fields})
+            return record
+
+    def search(self, jql, max_results):
+        """Answer the keyset-paginated searches JiraService issues"""
+        number = lambda key: int(key.rsplit("-", 1)[1])
+        with self._lock:
+            issues = list(self.issues.values())
+        project = _PROJECT.search(jql)
+        if project:
+            issues = [issue for issue in issues if issue.project_key == project.group(1)]
+        for operator, bound in _KEY_BOUND.findall(jql):
+            bound = number(bound)
+            if operator == "<":
+                issues = [issue for issue in issues if number(issue.key) < bound]
+            else:
+                issues = [issue for issue in issues if number(issue.key) > bound]
+        updated = _UPDATED_SINCE.search(jql)
+        if updated:
+            since = datetime.now(timezone.utc) - timedelta(minutes=int(updated.group(1)))
+            issues = [issue for issue in issues if parse_jira_datetime(issue.updated) >= since]
+        order = _KEY_ORDER.search(jql)
+        if order is None or order.group(1).upper() == "DESC":
+            issues.reverse()
+        return {"startAt": 0, "maxResults": max_results, "total": len(issues),
+                "issues": [issue.to_jira() for issue in issues[:max_results]]}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=None):
+                payload = json.dumps(body).encode("utf-8") if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                time.sleep(stub.latency)
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/rest/api/3/search":
+                    max_results = min(int(query.get("maxResults", ["50"])[0]), 100)
+                    jql = query.get("jql", [""])[0]
+                    project = _PROJECT.search(jql)
+                    if project and project.group(1) not in stub.project_keys:
+                        # Like Jira, a JQL query naming a project that doesn't exist is a 400
+                        self._send(400, {"errorMessages": [
+                            f"The value '{project.group(1)}' does not exist for the field 'project'."]})
+                    else:
+                        self._send(200, stub.search(jql, max_results))
+                elif url.path.startswith("/rest/api/3/issue/"):
+                    issue = stub.issues.get(url.path.rsplit("/", 1)[1])
+                    if issue is None:
+                        self._send(404, {"errorMessages": ["Issue does not exist"]})
+                    else:
+                        self._send(200, issue.to_jira())
+                elif url.path == "/rest/api/3/issueLinkType":
+                    self._send(200, {"issueLinkTypes": [{"name": "Relates"}, {"name": "Blocks"}]})
+                elif url.path == "/rest/api/3/myself":
+                    self._send(200, {"displayName": "Load Test", "emailAddress": "loadtest@example.com"})
+                elif url.path == "/rest/api/3/project":
+                    self._send(200, [{"key": key, "name": f"Stub project {key}"} for key in stub.project_keys])
+                elif url.path == "/rest/api/3/project/search":
+                    max_results = int(query.get("maxResults", ["50"])[0])
+                    projects = [{"key": key, "name": f"Stub project {key}"} for key in stub.project_keys]
+                    self._send(200, {"values": projects[:max_results], "total": len(projects),
+                                     "isLast": len(projects) <= max_results})
+                else:
+                    self._send(404, {"errorMessages": [f"No stub for {url.path}"]})
+
+            def do_POST(self):
+                time.sleep(stub.latency)
+                path = urlsplit(self.path).path
+                body = self._body()
+                if path == "/rest/api/3/issue":
+                    issue = stub._add_issue(dict(body.get("fields") or {}))
+                    self._send(201, {"id": issue.id, "key": issue.key})
+                elif path == "/rest/api/3/issue/bulk":
+                    issues = [stub._add_issue(dict(update.get("fields") or {})) for update in body.get("issueUpdates", [])]
+                    self._send(201, {"issues": [{"id": issue.id, "key": issue.key} for issue in issues],
+                                     "errors": []})
+                elif path == "/rest/api/3/issueLink":
+                    with stub._lock:
+                        stub.links.append(body)
+                    self._send(201)
+                else:
+                    self._send(404, {"errorMessages": [f"No stub for {path}"]})
+
+        return Handler
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from jira_api.cache import COMPRESS_THRESHOLD, MAX_KEY_LENGTH, MemoryCache, SQLiteCache, deserialize, make_key, serialize
+
+
+class CountingFunc:
+    """A slow value function that counts its calls"""
+
+    def __init__(self, value, seconds=0.2):
+        self.value = value
+        self.seconds = seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return self.value
+
+
+def run_concurrently(funcs):
+    """Start every func at once and return their results in order"""
+    results = [None] * len(funcs)
+    barrier = threading.Barrier(len(funcs))
+
+    def run(n):
+        barrier.wait()
+        results[n] = funcs[n]()
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(len(funcs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SerializationTests(SimpleTestCase):
+    def test_round_trip_and_compression(self):
+        small, large = {"key": "PROJ-1"}, {"text": "x" * COMPRESS_THRESHOLD * 4}
+        self.assertEqual(deserialize(serialize(small)), small)
+        self.assertEqual(deserialize(serialize(large)), large)
+        self.assertLess(len(serialize(large)), COMPRESS_THRESHOLD)
+
+    def test_long_keys_are_hashed(self):
+        key = make_key("gemini", "p" * 500)
+        self.assertLessEqual(len(key), MAX_KEY_LENGTH)
+        self.assertTrue(key.startswith("gemini:"))
+        self.assertEqual(key, make_key("gemini", "p" * 500))
+
+
+class MemoryCacheTests(SimpleTestCase):
+    def test_entries_expire_after_their_ttl(self):
+        cache = MemoryCache()
+        cache.set("short", 1, ttl=0.05)
+        cache.set("long", 2, ttl=60)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.get("long"), 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_oversized_values_are_not_cached(self):
+        cache = MemoryCache(max_value_size=100)
+        cache.set("big", os.urandom(1000))
+        self.assertIsNone(cache.get("big"))
+
+    def test_get_or_set_computes_once_for_concurrent_callers(self):
+        cache = MemoryCache()
+        func = CountingFunc({"tasks": 3})
+        results = run_concurrently([lambda: cache.namespace("gemini").get_or_set("prompt", func, 60)] * 8)
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(results, [{"tasks": 3}] * 8)
+
+    def test_get_or_set_recomputes_once_expired(self):
+        cache = MemoryCache()
+        func = CountingFunc("value", seconds=0)
+        cache.get_or_set("key", func, ttl=0.05)
+        cache.get_or_set("key", func, ttl=0.05)
+        time.sleep(0.1)
+        cache.get_or_set("key", func, ttl=0.05)
+        self.assertEqual(func.calls, 2)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "service_cache.sqlite3")
+
+    def test_entries_are_shared_and_expire(self):
+        writer, reader = SQLiteCache(self.location), SQLiteCache(self.location)
+        writer.set("short", 1, ttl=0.05)
+        writer.set("long", 2, ttl=60)
+        self.assertEqual(reader.get("short"), 1)
+        time.sleep(0.1)
+        self.assertIsNone(reader.get("short"))
+        self.assertEqual(reader.get("long"), 2)
+
+    def test_get_or_set_computes_once_across_processes(self):
+        # Separate instances stand in for worker processes: only the file lock is shared
+        caches = [SQLiteCache(self.location) for _ in range(4)]
+        func = CountingFunc("value")
+        results = run_concurrently([lambda cache=cache: cache.get_or_set("key", func, 60) for cache in caches])
+        self.assertEqual(func.calls, 1)
+        self.assertEqual(results, ["value"] * 4)
+
+    def test_stale_locks_are_taken_over(self):
+        cache = SQLiteCache(self.location)
+        cache.LOCK_TIMEOUT = 0.1
+        # A process that died while computing the value left its lock behind
+        self.assertTrue(cache._acquire_lock("key"))
+        self.assertEqual(cache.get_or_set("key", lambda: "value", 60), "value")
+        self.assertTrue(cache._acquire_lock("key"))
@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+import json
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from jira_api import conditional, views
+from jira_api.cache import MemoryCache
+from jira_api.changes import issue_changes
+from jira_api.conditional import ValidatorCache
+from jira_api.models import IssueDeletion
+from jira_api.pagination import encode_changes_token
+from jira_api.services import JiraService
+from jira_api.stubs import StubJiraServer
+
+SECRET = "s3cret"
+
+
+def deleted_event(issue_key, project_key="CHG"):
+    return {"webhookEvent": "jira:issue_deleted",
+            "issue": {"key": issue_key, "fields": {"project": {"key": project_key}}}}
+
+
+@override_settings(JIRA_PROJECT_KEY="CHG", JIRA_PROJECTS=[], JIRA_WEBHOOK_SECRET=SECRET)
+class IssueChangesTests(TestCase):
+    """/api/issues/changes/ returns what changed since a token, /api/webhooks/jira/ records deletions"""
+
+    def setUp(self):
+        self.server = StubJiraServer("127.0.0.1", latency=0, project_key="CHG", seed_issues=3).start()
+        self.addCleanup(self.server.stop)
+        memory = MemoryCache()
+        self.jira = JiraService("CHG")
+        self.jira.base_url = self.server.url
+        for patcher in (mock.patch.object(conditional, "get_cache", lambda namespace: memory.namespace(namespace)),
+                        mock.patch.object(views, "jira_service", self.jira)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(views, "validator_cache", ValidatorCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def changes(self, since=None):
+        return self.client.get("/api/issues/changes/", {"since": since} if since else {})
+
+    def post_event(self, event, secret=SECRET):
+        body = json.dumps(event).encode("utf-8")
+        signature = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        return self.client.post("/api/webhooks/jira/", body, content_type="application/json",
+                                HTTP_X_HUB_SIGNATURE=signature)
+
+    def test_the_first_call_only_returns_a_token(self):
+        response = self.changes()
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result["issues"], result["deleted"], result["truncated"]), ([], [], False))
+        self.assertTrue(result["next_since"])
+
+    def test_only_issues_changed_since_the_token_come_back(self):
+        since = self.changes().json()["next_since"]
+        self.jira.create_issue("Export reports as PDF", "")
+
+        result = self.changes(since).json()
+        self.assertEqual([issue["key"] for issue in result["issues"]], ["CHG-4"])
+        self.assertEqual(result["deleted"], [])
+        self.assertFalse(result["truncated"])
+        self.assertNotEqual(result["next_since"], since)
+
+    def test_deleted_issues_are_reported_instead_of_returned(self):
+        since = self.changes().json()["next_since"]
+        self.jira.create_issue("Export reports as PDF", "")
+        self.assertEqual(self.post_event(deleted_event("CHG-4")).json(), {"recorded": "CHG-4"})
+
+        result = self.changes(since).json()
+        self.assertEqual(result["issues"], [])
+        self.assertEqual(result["deleted"], ["CHG-4"])
+
+    def test_deletions_before_the_token_are_not_reported(self):
+        self.post_event(deleted_event("CHG-1"))
+        since = encode_changes_token(time.time() + 1, ["CHG"])
+        self.assertEqual(self.changes(since).json()["deleted"], [])
+
+    def test_invalid_and_expired_tokens(self):
+        self.assertEqual(self.changes("bogus").status_code, 400)
+        self.assertEqual(self.changes(encode_changes_token(time.time(), ["XYZ"])).status_code, 400)
+        expired = encode_changes_token(time.time() - settings.ISSUE_CHANGES_MAX_AGE - 10, ["CHG"])
+        self.assertEqual(self.changes(expired).status_code, 410)
+
+    @override_settings(ISSUE_CHANGES_LIMIT=2)
+    def test_too_many_changes_are_truncated(self):
+        since = time.time() - 1
+        for n in range(3):
+            self.jira.create_issue(f"Export reports as format {n}", "")
+        result = issue_changes(self.jira, ["CHG"], since)
+        self.assertTrue(result["truncated"])
+        self.assertEqual(len(result["issues"]), 2)
+
+    def test_webhooks_must_be_signed(self):
+        response = self.post_event(deleted_event("CHG-1"), secret="wrong")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(IssueDeletion.objects.exists())
+
+    def test_other_events_are_ignored(self):
+        response = self.post_event({"webhookEvent": "jira:issue_updated", "issue": {"key": "CHG-1"}})
+        self.assertEqual(response.json(), {"recorded": None})
+        self.assertFalse(IssueDeletion.objects.exists())
+
+    @override_settings(JIRA_WEBHOOK_SECRET="")
+    def test_webhooks_are_off_without_a_secret(self):
+        response = self.post_event(deleted_event("CHG-1"), secret="")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(IssueDeletion.objects.exists())
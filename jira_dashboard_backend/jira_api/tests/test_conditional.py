@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from jira_api import conditional, views
+from jira_api.cache import MemoryCache
+from jira_api.conditional import ValidatorCache, invalidate_validators, issue_validators
+from jira_api.services import JiraService
+from jira_api.stubs import StubJiraServer
+
+
+def issue(key, updated):
+    return {"key": key, "fields": {"updated": updated}}
+
+
+class IssueValidatorTests(SimpleTestCase):
+    def test_etag_follows_keys_and_updates(self):
+        page = [issue("PROJ-2", "2024-01-31T10:15:00.000+0000"), issue("PROJ-1", "2024-01-30T09:00:00.000+0000")]
+        etag, last_modified = issue_validators(page)
+        self.assertEqual(issue_validators(page), (etag, last_modified))
+        self.assertEqual(last_modified, 1706696100)
+
+        edited = [issue("PROJ-2", "2024-01-31T10:16:00.000+0000"), page[1]]
+        self.assertNotEqual(issue_validators(edited)[0], etag)
+        self.assertNotEqual(issue_validators(page[:1])[0], etag)
+
+    def test_issues_without_timestamps(self):
+        etag, last_modified = issue_validators([{"key": "PROJ-1"}])
+        self.assertTrue(etag.startswith('"'))
+        self.assertIsNone(last_modified)
+
+
+class ValidatorCacheTests(SimpleTestCase):
+    def setUp(self):
+        memory = MemoryCache()
+        patcher = mock.patch.object(conditional, "get_cache", lambda namespace: memory.namespace(namespace))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.validators = ValidatorCache(ttl=60)
+
+    def test_round_trip(self):
+        self.validators.set("issues:PROJ:50:", ["PROJ"], '"abc"', 1706696100)
+        self.assertEqual(tuple(self.validators.get("issues:PROJ:50:", ["PROJ"])), ('"abc"', 1706696100))
+        self.assertIsNone(self.validators.get("issues:PROJ:25:", ["PROJ"]))
+
+    def test_a_write_retires_only_its_projects_entries(self):
+        self.validators.set("issues:PROJ", ["PROJ"], '"proj"', None)
+        self.validators.set("issues:OPS", ["OPS"], '"ops"', None)
+        self.validators.set("issues:OPS,PROJ", ["OPS", "PROJ"], '"both"', None)
+
+        invalidate_validators(issue_keys=["PROJ-7"])
+
+        self.assertIsNone(self.validators.get("issues:PROJ", ["PROJ"]))
+        self.assertIsNone(self.validators.get("issues:OPS,PROJ", ["OPS", "PROJ"]))
+        self.assertIsNotNone(self.validators.get("issues:OPS", ["OPS"]))
+
+    def test_zero_ttl_disables_the_cache(self):
+        validators = ValidatorCache(ttl=0)
+        validators.set("issues:PROJ", ["PROJ"], '"proj"', None)
+        self.assertIsNone(validators.get("issues:PROJ", ["PROJ"]))
+
+
+@override_settings(ISSUE_VALIDATOR_TTL=60, JIRA_PROJECT_KEY="COND")
+class ConditionalIssuesTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubJiraServer("127.0.0.1", latency=0, project_key="COND", seed_issues=3).start()
+        self.addCleanup(self.server.stop)
+        memory = MemoryCache()
+        self.jira = JiraService("COND")
+        self.jira.base_url = self.server.url
+        self.jira.fetch_issues = mock.Mock(wraps=self.jira.fetch_issues)
+        for patcher in (mock.patch.object(conditional, "get_cache", lambda namespace: memory.namespace(namespace)),
+                        mock.patch.object(views, "jira_service", self.jira)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(views, "validator_cache", ValidatorCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **headers):
+        return self.client.get("/api/issues/", {"page_size": 2}, **headers)
+
+    def test_revalidation_is_answered_without_calling_jira(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "no-cache")
+
+        revalidated = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], first["ETag"])
+        self.assertEqual(self.jira.fetch_issues.call_count, 1)
+
+    def test_writes_to_the_project_force_a_fresh_fetch(self):
+        first = self.get()
+        self.jira.create_issue("Export reports as PDF", "")
+
+        changed = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(changed.json()["issues"][0]["key"], "COND-4")
+        self.assertEqual(self.jira.fetch_issues.call_count, 2)
+
+    def test_unchanged_issues_revalidate_after_the_cache_is_gone(self):
+        first = self.get()
+        views.validator_cache.invalidate(["COND"])
+        revalidated = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.jira.fetch_issues.call_count, 2)
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from jira_api import deadline, services
+from jira_api.deadline import DeadlineExceeded, propagate, with_deadline
+from jira_api.scheduler import BATCH, current_priority, outbound_priority
+from jira_api.services import JiraService
+
+
+class DeadlineTests(SimpleTestCase):
+    def test_nested_deadlines_never_extend_the_outer_one(self):
+        self.assertIsNone(deadline.remaining())
+        with deadline.deadline(1):
+            with deadline.deadline(60):
+                self.assertLessEqual(deadline.remaining(), 1)
+            with deadline.deadline(0.5):
+                self.assertLessEqual(deadline.remaining(), 0.5)
+        self.assertIsNone(deadline.remaining())
+
+    def test_timeouts_and_pauses_end_at_the_deadline(self):
+        self.assertEqual(deadline.timeout(30), 30)
+        with deadline.deadline(0.2):
+            self.assertLessEqual(deadline.timeout(30), 0.2)
+            started = time.monotonic()
+            deadline.pause(5)
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertTrue(deadline.expired())
+            with self.assertRaises(DeadlineExceeded):
+                deadline.check("the next page")
+            with self.assertRaises(DeadlineExceeded):
+                deadline.timeout(30)
+
+
+class PropagateTests(SimpleTestCase):
+    def test_pool_workers_run_under_the_callers_deadline_and_priority(self):
+        def context():
+            return deadline.remaining(), current_priority("GET")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            with deadline.deadline(5), outbound_priority(BATCH):
+                left, priority = pool.submit(propagate(context)).result()
+                unpropagated = pool.submit(context).result()
+        self.assertLessEqual(left, 5)
+        self.assertEqual(priority, BATCH)
+        self.assertEqual(unpropagated, (None, "interactive"))
+
+    def test_expired_deadlines_stop_pool_work(self):
+        with ThreadPoolExecutor(max_workers=2) as pool, deadline.deadline(0):
+            futures = [pool.submit(propagate(deadline.check), f"task {n}") for n in range(3)]
+            for future in futures:
+                with self.assertRaises(DeadlineExceeded):
+                    future.result()
+
+    @override_settings(JIRA_PROJECT_KEY="PROJ", JIRA_PROJECTS=["OPS"], JIRA_BASE_URL="http://127.0.0.1:9")
+    def test_project_searches_stop_at_the_deadline(self):
+        with mock.patch.dict(services._jira_services, clear=True), deadline.deadline(0):
+            with self.assertRaisesMessage(Exception, "Request deadline exceeded") as raised:
+                JiraService("PROJ").fetch_issues_multi(["PROJ", "OPS"])
+        self.assertIn("'OPS'", str(raised.exception))
+
+    def test_the_deadline_is_captured_when_wrapped(self):
+        with deadline.deadline(5):
+            wrapped = propagate(deadline.remaining)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertIsNotNone(pool.submit(wrapped).result())
+
+    def test_streamed_responses_keep_the_views_deadline(self):
+        def chunks():
+            yield deadline.remaining()
+
+        with deadline.deadline(5):
+            items = deadline.iterate(chunks())
+        self.assertLessEqual(next(items), 5)
+
+
+@override_settings(REQUEST_DEADLINE=30)
+class WithDeadlineTests(SimpleTestCase):
+    def call(self, view, **headers):
+        return with_deadline()(view)(RequestFactory().get("/api/issues/", **headers))
+
+    def test_clients_may_ask_for_a_shorter_budget_only(self):
+        def view(request):
+            return HttpResponse(str(deadline.remaining()))
+        self.assertLessEqual(float(self.call(view, HTTP_X_REQUEST_TIMEOUT="2").content), 2)
+        self.assertGreater(float(self.call(view, HTTP_X_REQUEST_TIMEOUT="300").content), 2)
+        self.assertGreater(float(self.call(view, HTTP_X_REQUEST_TIMEOUT="soon").content), 2)
+
+    def test_running_out_of_time_is_a_gateway_timeout(self):
+        def raises(request):
+            deadline.pause(1)
+            deadline.check("the Jira call")
+
+        def fails_late(request):
+            deadline.pause(1)
+            return HttpResponse(status=500)
+
+        response = self.call(raises, HTTP_X_REQUEST_TIMEOUT="0.05")
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("the Jira call", json.loads(response.content)["error"])
+        self.assertEqual(self.call(fails_late, HTTP_X_REQUEST_TIMEOUT="0.05").status_code, 504)
+        self.assertEqual(self.call(lambda request: HttpResponse(status=500)).status_code, 500)
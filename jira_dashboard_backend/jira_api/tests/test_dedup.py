@@ -0,0 +1,95 @@
+from django.test import SimpleTestCase
+
+from jira_api.cache import deserialize, serialize
+from jira_api.dedup import IssueSimilarityIndex, dedupe, find_duplicates, normalize_text
+
+
+class FindDuplicatesTests(SimpleTestCase):
+    def test_normalize_text_ignores_formatting(self):
+        self.assertEqual(normalize_text("  Export *Reports*,\nas PDF! "), "export reports as pdf")
+
+    def test_keeps_the_first_of_each_cluster(self):
+        texts = [
+            "Add PDF export to the reports page",
+            "Write the onboarding email template",
+            "Add a PDF export to the reports page",
+            "add pdf export to the REPORTS page!",
+        ]
+        duplicates = find_duplicates(texts, threshold=0.8)
+        self.assertEqual(sorted(duplicates), [2, 3])
+        self.assertTrue(all(kept == 0 for kept, _ in duplicates.values()))
+        self.assertAlmostEqual(duplicates[3][1], 1.0, places=5)
+
+    def test_groups_are_compared_separately(self):
+        texts = ["Validate the login form", "Validate the login form"]
+        self.assertEqual(find_duplicates(texts, 0.9, groups=["task-1", "task-2"]), {})
+        self.assertEqual(list(find_duplicates(texts, 0.9, groups=["task-1", "task-1"])), [1])
+
+    def test_threshold_above_one_disables_deduplication(self):
+        self.assertEqual(find_duplicates(["same", "same"], threshold=1.01), {})
+        self.assertEqual(find_duplicates(["alone"], threshold=0.5), {})
+
+    def test_dedupe_reports_pruned_items(self):
+        items = [{"title": "Export reports as PDF"}, {"title": "Rotate API keys"}, {"title": "Export reports as PDF."}]
+        kept, pruned = dedupe(items, lambda item: item["title"], 0.9)
+        self.assertEqual([index for index, _ in kept], [0, 1])
+        self.assertEqual(pruned, [{"item": "Export reports as PDF.", "duplicate_of": "Export reports as PDF",
+                                   "similarity": 1.0}])
+
+
+class IssueSimilarityIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = IssueSimilarityIndex()
+        self.index.add("PROJ-1", "Export the monthly report as PDF", "Finance needs a printable copy")
+        self.index.add("PROJ-2", "Rotate the Gemini API keys", "")
+        self.index.add("PROJ-3", "Fix the login redirect loop", "Users bounce between /login and /home")
+
+    def test_finds_the_best_match(self):
+        match = self.index.find("Export the monthly report as PDF", "Finance needs a printable copy", threshold=0.5)
+        self.assertEqual(match["key"], "PROJ-1")
+        self.assertAlmostEqual(match["similarity"], 1.0, places=5)
+        self.assertIsNone(self.index.find("Translate the settings page", "", threshold=0.5))
+
+    def test_exclude_and_remove(self):
+        query = ("Fix the login redirect loop", "Users bounce between /login and /home")
+        self.assertIsNone(self.index.find(*query, threshold=0.5, exclude=["PROJ-3"]))
+        self.index.remove(["PROJ-3"])
+        self.assertIsNone(self.index.find(*query, threshold=0.5))
+        self.assertEqual(len(self.index), 2)
+
+    def test_reindexing_replaces_the_old_text(self):
+        self.index.add("PROJ-2", "Archive closed sprints", "")
+        self.assertIsNone(self.index.find("Rotate the Gemini API keys", "", threshold=0.5))
+        self.assertEqual(self.index.find("Archive closed sprints", "", threshold=0.5)["key"], "PROJ-2")
+
+    def test_unchanged_issues_do_not_grow_the_index(self):
+        for _ in range(100):
+            self.index.add("PROJ-1", "Export the monthly report as PDF", "Finance needs a printable copy")
+        self.assertEqual(self.index.size, 3)
+
+    def test_tombstones_are_compacted(self):
+        self.index.COMPACT_MIN_ROWS = 10
+        for revision in range(50):
+            self.index.add("PROJ-2", f"Rotate the Gemini API keys, attempt {revision}", "")
+        self.assertLessEqual(self.index.size, 2 * len(self.index) + 1)
+        self.assertEqual(self.index.find("Rotate the Gemini API keys, attempt 49", "", threshold=0.9)["key"], "PROJ-2")
+        self.assertEqual(self.index.find("Fix the login redirect loop", "Users bounce between /login and /home",
+                                         threshold=0.9)["key"], "PROJ-3")
+
+    def test_update_indexes_jira_issues(self):
+        description = {"type": "doc", "version": 1, "content": [
+            {"type": "paragraph", "content": [{"type": "text", "text": "Cache the sprint board"}]}]}
+        self.index.update([{"key": "PROJ-4", "fields": {"summary": "Speed up the board", "description": description}},
+                           {"key": "PROJ-5", "fields": {"labels": ["no-summary"]}}])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.find("Speed up the board", "Cache the sprint board", threshold=0.9)["key"], "PROJ-4")
+
+    def test_state_round_trip(self):
+        self.index.add("PROJ-2", "Archive closed sprints", "")
+        restored = IssueSimilarityIndex()
+        restored.load_state(deserialize(serialize(self.index.dump_state())))
+        self.assertEqual(len(restored), 3)
+        self.assertEqual(restored.find("Archive closed sprints", "", threshold=0.9)["key"], "PROJ-2")
+        # Checksums survive the round trip, so unchanged issues are still skipped
+        restored.add("PROJ-2", "Archive closed sprints", "")
+        self.assertEqual(restored.size, 3)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+import google.ai.generativelanguage as glm
+from django.test import SimpleTestCase
+
+from jira_api.dispatch import GeminiKey, KeyDispatcher
+
+
+def gemini_response(text):
+    return glm.GenerateContentResponse(candidates=[{"content": {"parts": [{"text": text}]}, "finish_reason": 1}])
+
+
+class GeminiKeyTests(SimpleTestCase):
+    def test_model_sends_through_its_own_client(self):
+        key = GeminiKey(0, "key-0", "gemini-1.5-flash", 2)
+        calls = []
+
+        def generate_content(client, request=None, **kwargs):
+            calls.append(client)
+            return gemini_response("hello")
+
+        with mock.patch.object(glm.GenerativeServiceClient, "generate_content", generate_content), \
+                mock.patch("google.generativeai.client.get_default_generative_client",
+                           side_effect=AssertionError("used the global client")):
+            response = key.model.generate_content("hi")
+
+        self.assertEqual(response.text, "hello")
+        self.assertEqual(calls, [key.model._client])
+
+    def test_each_key_has_its_own_client(self):
+        first = GeminiKey(0, "key-0", "gemini-1.5-flash", 2)
+        second = GeminiKey(1, "key-1", "gemini-1.5-flash", 2)
+        self.assertIs(first.model, first.model)
+        self.assertIsNot(first.model._client, second.model._client)
+
+
+class KeyDispatcherTests(SimpleTestCase):
+    def test_acquire_prefers_the_least_loaded_key(self):
+        keys = [GeminiKey(n, f"key-{n}", "gemini-1.5-flash", 2) for n in range(2)]
+        dispatcher = KeyDispatcher(keys)
+        first = dispatcher.acquire()
+        second = dispatcher.acquire()
+        self.assertIsNot(first, second)
+        self.assertEqual([key.in_flight for key in keys], [1, 1])
+
+    def test_failed_key_cools_down(self):
+        keys = [GeminiKey(n, f"key-{n}", "gemini-1.5-flash", 2) for n in range(2)]
+        dispatcher = KeyDispatcher(keys)
+        failing = dispatcher.acquire()
+        dispatcher.release(failing, error=Exception("500 internal"))
+        for _ in range(3):
+            key = dispatcher.acquire()
+            self.assertIsNot(key, failing)
+            dispatcher.release(key)
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase, override_settings
+
+from jira_api.health import STATUS_DOWN, STATUS_OK, HealthProber
+from jira_api.scheduler import INTERACTIVE, OutboundScheduler
+from jira_api.services import JiraService
+from jira_api.stubs import StubJiraServer
+
+
+@override_settings(GEMINI_BACKEND="stub")
+class HealthProbeTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubJiraServer("127.0.0.1", latency=0, project_key="HLTH", seed_issues=0).start()
+        self.addCleanup(self.server.stop)
+        self.jira = JiraService("HLTH")
+        self.jira.base_url = self.server.url
+        self.jira.scheduler = OutboundScheduler(max_concurrency=1, rate=0, weights={INTERACTIVE: 1},
+                                                queue_timeout=30)
+
+    def test_reports_ok(self):
+        result = HealthProber(self.jira, interval=60, timeout=2).probe()
+        self.assertEqual(result["status"], STATUS_OK)
+        self.assertTrue(result["checks"]["jira"]["ok"])
+
+    def test_probe_does_not_queue_behind_a_saturated_scheduler(self):
+        self.jira.scheduler.acquire(INTERACTIVE)
+        self.addCleanup(self.jira.scheduler.release)
+        result = HealthProber(self.jira, interval=60, timeout=2).probe()
+        self.assertEqual(result["status"], STATUS_OK)
+        self.assertLess(result["checks"]["jira"]["latency_ms"], 2000)
+
+    def test_unreachable_jira_is_down(self):
+        self.server.stop()
+        result = HealthProber(self.jira, interval=60, timeout=1).probe()
+        self.assertEqual(result["status"], STATUS_DOWN)
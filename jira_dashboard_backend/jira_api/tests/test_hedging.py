@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.test import SimpleTestCase
+
+from jira_api import metrics
+from jira_api.hedging import Hedger
+
+
+def answer(text, seconds=0.0):
+    """An attempt that answers after some seconds, or returns None once cancelled"""
+    def attempt(cancelled, keys):
+        if cancelled.wait(seconds):
+            return None
+        return text
+    return attempt
+
+
+def never_called(cancelled, keys):
+    raise AssertionError("The hedge should not have been sent")
+
+
+class HedgerTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def hedger(self, **kwargs):
+        options = {"percentile": 95, "budget": 1.0, "min_delay": 0.2, "initial_delay": 0.2, "min_samples": 1000,
+                   "workers": 1, "holdout": 0.0, **kwargs}
+        return Hedger(**options)
+
+    def test_slow_calls_are_answered_by_the_hedge(self):
+        hedger = self.hedger()
+        self.assertEqual(hedger.run(answer("primary", 5), answer("hedge")), "hedge")
+        self.assertEqual((hedger.calls, hedger.hedges), (1, 1))
+        self.assertEqual(metrics.value("gemini_hedge_wins_total"), 1)
+
+    def test_hedge_delay_starts_when_the_primary_does(self):
+        hedger = self.hedger()
+        hedger._primary_executor = ThreadPoolExecutor(max_workers=1)
+        hedger._hedge_executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(hedger._primary_executor.shutdown)
+        self.addCleanup(hedger._hedge_executor.shutdown)
+        # The primary waits behind other work for longer than the hedge delay
+        hedger._primary_executor.submit(time.sleep, 0.4)
+
+        self.assertEqual(hedger.run(answer("primary", 0.05), never_called), "primary")
+        self.assertEqual(hedger.hedges, 0)
+
+    def test_no_hedge_without_a_free_hedge_worker(self):
+        hedger = self.hedger(workers=1)
+        hedger._hedge_slots.acquire()
+        self.assertEqual(hedger.run(answer("primary", 0.4), never_called), "primary")
+        self.assertEqual(hedger.hedges, 0)
+        self.assertEqual(metrics.value("gemini_hedges_denied_total"), 1)
+
+    def test_hedge_workers_are_released(self):
+        hedger = self.hedger(workers=1)
+        for _ in range(3):
+            self.assertEqual(hedger.run(answer("primary", 5), answer("hedge")), "hedge")
+        self.assertEqual(hedger.hedges, 3)
+
+    def test_gain_is_measured_against_held_out_calls(self):
+        hedger = self.hedger(holdout=1.0, min_samples=3)
+        for _ in range(3):
+            self.assertEqual(hedger.run(answer("primary", 0.3), never_called), "primary")
+        self.assertEqual(metrics.value("gemini_hedge_holdout_calls_total"), 3)
+        # Too few hedged calls so far to compare
+        self.assertIsNone(hedger.stats()["p99_gained_seconds"])
+
+        hedger.holdout = 0.0
+        for _ in range(3):
+            hedger.run(answer("primary", 5), answer("hedge"))
+
+        stats = hedger.stats()
+        self.assertEqual(stats["p99_gained_seconds"],
+                         round(stats["p99_unhedged_seconds"] - stats["p99_seconds"], 3))
+        self.assertGreater(stats["p99_gained_seconds"], 0)
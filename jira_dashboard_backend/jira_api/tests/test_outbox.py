@@ -0,0 +1,135 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jira_api.models import OutboxEntry, WorkflowRun
+from jira_api.outbox import OutboxFlusher, OutboxJiraService, permanent, substitute
+from jira_api.stubs import StubJiraService
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code} error", response=response)
+
+
+class FlakyJiraService(StubJiraService):
+    """A stub Jira whose bulk creates first fail with the given errors"""
+
+    def __init__(self, *errors, apply_before_failing=False):
+        super().__init__(latency=0, project_key="OBX")
+        self.errors = list(errors)
+        self.apply_before_failing = apply_before_failing
+
+    def create_issues_bulk(self, issues, labels=None):
+        if self.errors:
+            if self.apply_before_failing:
+                # The issues are created but the response never arrives
+                super().create_issues_bulk(issues, labels)
+            raise self.errors.pop(0)
+        return super().create_issues_bulk(issues, labels)
+
+
+class OutboxFlushTests(TestCase):
+    def setUp(self):
+        self.jira = StubJiraService(latency=0, project_key="OBX")
+        self.run = WorkflowRun.objects.create(idempotency_key="outbox-test", requirement="Export reports")
+
+    def flusher(self, jira=None, **kwargs):
+        flusher = OutboxFlusher(jira_for=lambda project_key: jira or self.jira, **kwargs)
+        # Tests flush by hand rather than on the background thread
+        flusher.wake = mock.Mock()
+        return flusher
+
+    def flush_all(self, flusher):
+        """Flush until nothing is pending, making retries due at once"""
+        for _ in range(10):
+            OutboxEntry.objects.filter(status=OutboxEntry.STATUS_PENDING).update(next_attempt_at=timezone.now())
+            if not flusher.flush():
+                return
+
+    def test_substitute_replaces_placeholders_everywhere(self):
+        value = {"PENDING:1": ["see PENDING:2", {"key": "PENDING:3"}], "n": 1}
+        self.assertEqual(substitute(value, {1: "OBX-1", 2: "OBX-2"}),
+                         {"OBX-1": ["see OBX-2", {"key": "PENDING:3"}], "n": 1})
+
+    def test_permanent_statuses(self):
+        self.assertEqual([code for code in (400, 401, 403, 404, 408, 409, 429, 500, 503) if permanent(code)],
+                         [400, 401, 403, 404, 409])
+
+    def test_sends_creates_and_links_with_real_keys(self):
+        flusher = self.flusher()
+        outbox = OutboxJiraService(self.jira, self.run, flusher)
+        parent = outbox.create_issue("Export reports", "As PDF")
+        child = outbox.create_issue("Render the header", f"Part of {parent['key']}", "Subtask", parent["key"])
+        self.assertTrue(outbox.link_issues(parent["key"], child["key"]))
+        self.assertTrue(parent["pending"] and parent["key"].startswith("PENDING:"))
+        self.run.result = {"parent": parent["key"], "tasks": [child["key"]], "errors": [], "pending_writes": 3}
+        self.run.status = WorkflowRun.STATUS_COMPLETED
+        self.run.save()
+
+        self.flush_all(flusher)
+
+        self.assertEqual(outbox.pending(), 0)
+        parent_key, child_key = sorted(self.jira.issues)
+        child_issue = self.jira.issues[child_key]
+        self.assertEqual(child_issue.parent, parent_key)
+        self.assertEqual(child_issue.description, f"Part of {parent_key}")
+        self.assertEqual(self.jira.links, [(parent_key, child_key, "Relates")])
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.result, {"parent": parent_key, "tasks": [child_key], "errors": [],
+                                           "pending_writes": 0})
+
+    def test_rejected_create_fails_its_dependants(self):
+        jira = FlakyJiraService(http_error(400))
+        flusher = self.flusher(jira)
+        outbox = OutboxJiraService(jira, self.run, flusher)
+        parent = outbox.create_issue("Export reports", "As PDF")
+        outbox.create_issue("Render the header", "", "Subtask", parent["key"])
+        self.run.result = {"errors": [], "pending_writes": 2}
+        self.run.status = WorkflowRun.STATUS_COMPLETED
+        self.run.save()
+
+        self.flush_all(flusher)
+
+        statuses = list(OutboxEntry.objects.order_by("pk").values_list("status", "attempts"))
+        self.assertEqual(statuses, [(OutboxEntry.STATUS_FAILED, 1), (OutboxEntry.STATUS_FAILED, 0)])
+        self.assertEqual(jira.issues, {})
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, WorkflowRun.STATUS_FAILED)
+        self.assertEqual(len(self.run.result["errors"]), 2)
+
+    def test_transient_errors_are_retried(self):
+        jira = FlakyJiraService(http_error(503), requests.exceptions.ConnectTimeout())
+        flusher = self.flusher(jira)
+        OutboxJiraService(jira, self.run, flusher).create_issue("Export reports", "As PDF")
+
+        self.flush_all(flusher)
+
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts, entry.result["key"]), (OutboxEntry.STATUS_SENT, 3, "OBX-1"))
+
+    def test_gives_up_after_max_attempts(self):
+        jira = FlakyJiraService(*[http_error(503)] * 5)
+        flusher = self.flusher(jira, max_attempts=3)
+        OutboxJiraService(jira, self.run, flusher).create_issue("Export reports", "As PDF")
+
+        self.flush_all(flusher)
+
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts), (OutboxEntry.STATUS_FAILED, 3))
+        self.assertIn("Gave up after 3 attempts", entry.error)
+
+    @override_settings(JIRA_IDEMPOTENCY_LABELS=True)
+    def test_lost_responses_do_not_create_twice(self):
+        jira = FlakyJiraService(requests.exceptions.ReadTimeout(), apply_before_failing=True)
+        flusher = self.flusher(jira)
+        OutboxJiraService(jira, self.run, flusher).create_issue("Export reports", "As PDF")
+
+        self.flush_all(flusher)
+
+        entry = OutboxEntry.objects.get()
+        self.assertEqual((entry.status, entry.result["key"]), (OutboxEntry.STATUS_SENT, "OBX-1"))
+        self.assertEqual(list(jira.issues), ["OBX-1"])
@@ -0,0 +1,96 @@
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from jira_api.pagination import (
+    DIRECTION_NEXT, DIRECTION_PREV, InvalidCursor, decode_changes_token, decode_cursor, decode_projects_cursor,
+    encode_changes_token, encode_cursor, encode_projects_cursor, get_page_size, page_cursors,
+)
+from jira_api.services import JiraService
+from jira_api.stubs import StubJiraServer
+
+
+def issues(*numbers):
+    return [{"key": f"PROJ-{number}"} for number in numbers]
+
+
+class CursorTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor("PROJ-42", DIRECTION_PREV)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), ("PROJ-42", DIRECTION_PREV))
+
+    def test_rejects_cursors_we_did_not_issue(self):
+        forged = encode_cursor("PROJ-1 OR 1=1", DIRECTION_NEXT)
+        for cursor in ("", "not-a-cursor", encode_cursor("PROJ-1", "sideways"), forged):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_projects_cursor_round_trip(self):
+        after_keys = {"PROJ": "PROJ-7", "OPS": ""}
+        self.assertEqual(decode_projects_cursor(encode_projects_cursor(after_keys)), after_keys)
+        with self.assertRaises(InvalidCursor):
+            decode_projects_cursor(encode_projects_cursor({"PROJ": "OPS-1; DROP"}))
+
+    def test_changes_token_round_trip(self):
+        since, project_keys = decode_changes_token(encode_changes_token(1700000000.12345, ["OPS", "PROJ"]))
+        self.assertEqual((since, project_keys), (1700000000.123, ["OPS", "PROJ"]))
+        with self.assertRaises(InvalidCursor):
+            decode_changes_token(encode_cursor("PROJ-1", DIRECTION_NEXT))
+
+
+class PageCursorTests(SimpleTestCase):
+    def test_first_page(self):
+        next_cursor, prev_cursor = page_cursors(issues(30, 29, 28), has_more=True)
+        self.assertEqual(decode_cursor(next_cursor), ("PROJ-28", DIRECTION_NEXT))
+        self.assertIsNone(prev_cursor)
+
+    def test_last_page_going_forward(self):
+        next_cursor, prev_cursor = page_cursors(issues(3, 2, 1), has_more=False, direction=DIRECTION_NEXT)
+        self.assertIsNone(next_cursor)
+        self.assertEqual(decode_cursor(prev_cursor), ("PROJ-3", DIRECTION_PREV))
+
+    def test_first_page_reached_going_back(self):
+        next_cursor, prev_cursor = page_cursors(issues(30, 29), has_more=False, direction=DIRECTION_PREV)
+        self.assertEqual(decode_cursor(next_cursor), ("PROJ-29", DIRECTION_NEXT))
+        self.assertIsNone(prev_cursor)
+
+    def test_empty_page(self):
+        self.assertEqual(page_cursors([], has_more=True), (None, None))
+
+    @override_settings(ISSUES_PAGE_SIZE=50, ISSUES_MAX_PAGE_SIZE=100)
+    def test_page_size_is_clamped(self):
+        self.assertEqual([get_page_size(value) for value in (None, "", "10", "0", "1000")], [50, 50, 10, 1, 100])
+        with self.assertRaises(ValueError):
+            get_page_size("ten")
+
+
+class KeysetPaginationTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StubJiraServer("127.0.0.1", latency=0, project_key="PAGE", seed_issues=23).start()
+        self.addCleanup(self.server.stop)
+        self.jira = JiraService("PAGE")
+        self.jira.base_url = self.server.url
+
+    def test_walks_every_issue_once_in_both_directions(self):
+        seen, pages, after_key = [], [], None
+        while True:
+            page = self.jira.fetch_issues(5, after_key=after_key)
+            pages.append([issue["key"] for issue in page["issues"]])
+            seen += pages[-1]
+            if not page["hasMore"]:
+                break
+            after_key = page["issues"][-1]["key"]
+        self.assertEqual(seen, [f"PAGE-{number}" for number in range(23, 0, -1)])
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+
+        # Back from the last page: the same pages, newest first
+        before = self.jira.fetch_issues(5, before_key=pages[-1][0])
+        self.assertEqual([issue["key"] for issue in before["issues"]], pages[-2])
+
+    def test_new_issues_do_not_shift_later_pages(self):
+        first = self.jira.fetch_issues(5)
+        self.server._add_issue({"summary": f"Added {time.time()}"})
+        second = self.jira.fetch_issues(5, after_key=first["issues"][-1]["key"])
+        keys = [issue["key"] for issue in first["issues"] + second["issues"]]
+        self.assertEqual(len(keys), len(set(keys)))
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from jira_api.deadline import propagate, track_threads
+from jira_api.middleware import StackSampler
+
+
+def worker_task(seconds):
+    time.sleep(seconds)
+    return threading.get_ident()
+
+
+def bystander_task(stop):
+    while not stop.wait(0.001):
+        pass
+
+
+class TrackThreadsTests(SimpleTestCase):
+    def test_propagated_calls_register_their_thread_while_running(self):
+        with ThreadPoolExecutor(max_workers=1) as pool, track_threads() as workers:
+            seen = pool.submit(propagate(lambda: set(workers))).result()
+            ident = pool.submit(propagate(worker_task), 0).result()
+            self.assertEqual(seen, {ident})
+            self.assertEqual(workers, set())
+            # Calls that are not propagated are not part of the request
+            pool.submit(time.sleep, 0).result()
+            self.assertEqual(workers, set())
+
+    def test_nothing_is_tracked_outside_the_block(self):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertIsNotNone(pool.submit(propagate(worker_task), 0).result())
+
+
+class StackSamplerTests(SimpleTestCase):
+    def test_samples_the_request_and_its_workers_only(self):
+        stop = threading.Event()
+        bystander = threading.Thread(target=bystander_task, args=(stop,), name="bystander-1")
+        bystander.start()
+        self.addCleanup(bystander.join)
+        self.addCleanup(stop.set)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="jira-project") as pool, \
+                track_threads() as workers:
+            sampler = StackSampler(threading.get_ident(), 0.005, workers)
+            sampler.start()
+            try:
+                pool.submit(propagate(worker_task), 0.2).result()
+            finally:
+                sampler.stop()
+
+        stacks = "\n".join(sampler.stacks)
+        self.assertIn("test_samples_the_request_and_its_workers_only", stacks)
+        self.assertIn("[jira-project];", stacks)
+        self.assertIn("worker_task", stacks)
+        self.assertNotIn("bystander", stacks)
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from jira_api import services, views
+from jira_api.cache import MemoryCache
+from jira_api.conditional import ValidatorCache
+from jira_api.services import JiraService
+from jira_api.stubs import StubJiraServer
+
+
+class ProjectSelectionTests(SimpleTestCase):
+    """Issue endpoints only serve the configured project and those listed in JIRA_PROJECTS"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubJiraServer("127.0.0.1", latency=0, project_key="PROJ", seed_issues=3,
+                                    extra_projects=["OPS"]).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        settings = override_settings(JIRA_BASE_URL=self.server.url, JIRA_PROJECT_KEY="PROJ",
+                                     JIRA_PROJECTS=["OPS", "GONE"])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        validators = ValidatorCache()
+        validators.cache = MemoryCache().namespace("validators")
+        for patcher in (mock.patch.dict(services._jira_services, clear=True),
+                        mock.patch.object(views, "jira_service", JiraService("PROJ")),
+                        mock.patch.object(views, "validator_cache", validators)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def issue_keys(self, response):
+        return [issue["key"] for issue in response.json()["issues"]]
+
+    def test_listed_projects_are_served(self):
+        response = self.client.get("/api/issues/", {"project": "OPS"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.issue_keys(response), ["OPS-3", "OPS-2", "OPS-1"])
+
+    def test_unlisted_projects_are_refused_without_creating_a_service(self):
+        for params in ({"project": "XYZ"}, {"projects": "PROJ,XYZ"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/issues/", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Unknown project key: XYZ", response.json()["error"])
+        self.assertNotIn("XYZ", services._jira_services)
+        with self.assertRaises(ValueError):
+            views.jira_service.for_project("XYZ")
+
+    def test_requested_projects_never_fall_back_to_every_issue(self):
+        # GONE is allowed but doesn't exist in Jira
+        response = self.client.get("/api/issues/", {"project": "GONE"})
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("issues", response.json())
+
+    @override_settings(JIRA_PROJECT_KEY="GONE")
+    def test_the_configured_project_still_falls_back(self):
+        with mock.patch.object(views, "jira_service", JiraService("GONE")):
+            response = self.client.get("/api/issues/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(self.issue_keys(response)), ["OPS-1", "OPS-2", "OPS-3", "PROJ-1", "PROJ-2", "PROJ-3"])
+
+
+@override_settings(JIRA_PROJECT_KEY="PROJ", JIRA_PROJECTS=["OPS", "GONE"])
+class MultiProjectIssuesTests(SimpleTestCase):
+    """?projects=A,B searches every project and k-way merges the pages on created"""
+
+    def setUp(self):
+        self.server = StubJiraServer("127.0.0.1", latency=0, project_key="PROJ", seed_issues=0,
+                                     extra_projects=["OPS"]).start()
+        self.addCleanup(self.server.stop)
+        self.server.seed(5, "PROJ")
+        self.server.seed(3, "OPS")
+        settings = override_settings(JIRA_BASE_URL=self.server.url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.jira = JiraService("PROJ")
+        validators = ValidatorCache()
+        validators.cache = MemoryCache().namespace("validators")
+        for patcher in (mock.patch.dict(services._jira_services, clear=True),
+                        mock.patch.object(views, "jira_service", self.jira),
+                        mock.patch.object(views, "validator_cache", validators)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def newest_first(self):
+        return [record.key for record in sorted(self.server.issues.values(), key=lambda record: record.created,
+                                                reverse=True)]
+
+    def test_pages_are_merged_newest_first(self):
+        page = self.jira.fetch_issues_multi(["PROJ", "OPS"], max_results=8)
+        self.assertEqual([issue["key"] for issue in page["issues"]], self.newest_first())
+        self.assertFalse(page["hasMore"])
+        self.assertEqual(page["projects"], {"PROJ": {"served": 5, "hasMore": False},
+                                            "OPS": {"served": 3, "hasMore": False}})
+
+    def test_cursors_walk_every_issue_once(self):
+        keys, cursor, pages = [], None, 0
+        while True:
+            params = {"projects": "PROJ,OPS", "page_size": 3, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get("/api/issues/", params)
+            self.assertEqual(response.status_code, 200)
+            result = response.json()
+            keys += [issue["key"] for issue in result["issues"]]
+            pages += 1
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(keys, self.newest_first())
+        self.assertEqual(pages, 3)
+
+    def test_a_failed_project_is_retried_from_the_same_position(self):
+        page = self.jira.fetch_issues_multi(["PROJ", "GONE"], max_results=2)
+        self.assertEqual(list(page["errors"]), ["GONE"])
+        self.assertEqual(page["after_keys"], {"PROJ": "PROJ-4", "GONE": ""})
+        self.assertTrue(page["hasMore"])
+
+    def test_every_project_failing_is_an_error(self):
+        with self.assertRaisesMessage(Exception, "Fetching issues failed for every project"):
+            self.jira.fetch_issues_multi(["GONE"], max_results=2)
+
+    def test_forged_cursors_are_refused(self):
+        response = self.client.get("/api/issues/", {"projects": "PROJ,OPS", "cursor": "bogus"})
+        self.assertEqual(response.status_code, 400)
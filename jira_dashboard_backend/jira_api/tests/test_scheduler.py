@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from jira_api import deadline, metrics
+from jira_api.scheduler import (BATCH, INTERACTIVE, OutboundScheduler, QueueTimeout, current_priority,
+                                outbound_priority, parse_weights)
+
+
+def scheduler(**kwargs):
+    options = {"max_concurrency": 1, "rate": 0, "burst": 1, "weights": {INTERACTIVE: 16, BATCH: 1},
+               "queue_timeout": 5, **kwargs}
+    return OutboundScheduler(**options)
+
+
+class PriorityTests(SimpleTestCase):
+    def test_parse_weights(self):
+        self.assertEqual(parse_weights("interactive=16, batch=1"), {INTERACTIVE: 16.0, BATCH: 1.0})
+        with self.assertRaises(ValueError):
+            parse_weights("interactive=0")
+
+    def test_reads_are_interactive_unless_the_context_says_otherwise(self):
+        self.assertEqual((current_priority("GET"), current_priority("POST")), (INTERACTIVE, BATCH))
+        with outbound_priority(BATCH):
+            self.assertEqual(current_priority("GET"), BATCH)
+
+
+class OutboundSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def queue_behind_a_busy_slot(self, scheduler, priorities):
+        """Queue one waiter per priority, in order, while the only slot is taken; return the dispatch order"""
+        order = []
+
+        def waiter(priority):
+            with scheduler.slot(priority):
+                order.append(priority)
+
+        scheduler.acquire(INTERACTIVE)
+        threads = []
+        for n, priority in enumerate(priorities, 1):
+            threads.append(threading.Thread(target=waiter, args=(priority,)))
+            threads[-1].start()
+            while len(scheduler._queue) < n:
+                time.sleep(0.001)
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        return order
+
+    def test_interactive_requests_overtake_queued_batch_work(self):
+        order = self.queue_behind_a_busy_slot(scheduler(), [BATCH] * 4 + [INTERACTIVE] * 4)
+        self.assertEqual(order, [INTERACTIVE] * 4 + [BATCH] * 4)
+
+    def test_batch_work_keeps_its_share(self):
+        weights = {INTERACTIVE: 2, BATCH: 1}
+        order = self.queue_behind_a_busy_slot(scheduler(weights=weights), [BATCH] * 3 + [INTERACTIVE] * 6)
+        # Two interactive requests per batch request while both classes are waiting
+        self.assertEqual(order[:6], [BATCH, INTERACTIVE, INTERACTIVE, BATCH, INTERACTIVE, INTERACTIVE])
+        self.assertEqual(order.count(BATCH), 3)
+
+    def test_waiters_give_up_after_the_queue_timeout(self):
+        busy = scheduler(queue_timeout=0.1)
+        busy.acquire(INTERACTIVE)
+        started = time.monotonic()
+        with self.assertRaises(QueueTimeout):
+            busy.acquire(BATCH)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(busy.stats()["queued"], {INTERACTIVE: 0, BATCH: 0})
+        self.assertEqual(metrics.value("jira_queue_timeouts_total", priority=BATCH), 1)
+
+        busy.release()
+        with busy.slot(BATCH):
+            self.assertEqual(busy.in_flight, 1)
+
+    def test_waiting_stops_at_the_request_deadline(self):
+        busy = scheduler(queue_timeout=30)
+        busy.acquire(INTERACTIVE)
+        started = time.monotonic()
+        with deadline.deadline(0.1), self.assertRaises(QueueTimeout):
+            busy.acquire(INTERACTIVE)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_rate_limit(self):
+        limited = scheduler(max_concurrency=10, rate=20, burst=1)
+        started = time.monotonic()
+        for _ in range(3):
+            with limited.slot(INTERACTIVE):
+                pass
+        # The burst covers the first request, the rest wait 1/20s each
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            scheduler().acquire("urgent")
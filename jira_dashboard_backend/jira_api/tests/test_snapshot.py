@@ -0,0 +1,93 @@
+import os
+import stat
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from jira_api import snapshot
+from jira_api.dedup import IssueSimilarityIndex
+from jira_api.snapshot import HEADER, CacheSnapshot
+
+
+def index_state(*summaries):
+    index = IssueSimilarityIndex()
+    for number, summary in enumerate(summaries, 1):
+        index.add(f"SNAP-{number}", summary)
+    return index.dump_state()
+
+
+class CacheSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache_snapshot.bin")
+
+    def save(self, sections, **kwargs):
+        with mock.patch.object(snapshot, "_states", return_value=list(sections.items())):
+            return CacheSnapshot(self.path, interval=0, max_age=kwargs.get("max_age", 60)).save()
+
+    def restore(self, name, max_age=60):
+        return CacheSnapshot(self.path, interval=0, max_age=max_age).restore(name)
+
+    def test_round_trip(self):
+        self.assertEqual(self.save({"index:SNAP": index_state("Export reports as PDF", "Rotate API keys")}), 1)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+        saved = CacheSnapshot(self.path, interval=0, max_age=60)
+        index = IssueSimilarityIndex()
+        index.load_state(saved.restore("index:SNAP"))
+        self.assertEqual(index.find("Rotate API keys", "", threshold=0.9)["key"], "SNAP-2")
+        # Each section is handed out once
+        self.assertIsNone(saved.restore("index:SNAP"))
+        self.assertIsNone(saved.restore("index:OTHER"))
+
+    def test_sections_of_other_processes_are_carried_over(self):
+        self.save({"index:ONE": index_state("First project issue")})
+        self.save({"index:TWO": index_state("Second project issue")})
+        self.assertIsNotNone(self.restore("index:ONE"))
+        self.assertIsNotNone(self.restore("index:TWO"))
+
+    def test_nothing_cached_leaves_the_last_snapshot(self):
+        self.save({"index:ONE": index_state("First project issue")})
+        self.assertEqual(self.save({"index:TWO": None}), 0)
+        self.assertIsNotNone(self.restore("index:ONE"))
+
+    def test_stale_sections_are_ignored(self):
+        self.save({"index:SNAP": index_state("Export reports as PDF")})
+        self.assertIsNone(self.restore("index:SNAP", max_age=-1))
+
+    def test_modified_sections_are_not_unpickled(self):
+        self.save({"index:SNAP": index_state("Export reports as PDF")})
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER.size + 10)
+            byte = f.read(1)
+            f.seek(HEADER.size + 10)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with mock.patch.object(snapshot, "deserialize", wraps=snapshot.deserialize) as deserialize:
+            self.assertIsNone(self.restore("index:SNAP"))
+        # Only the (signed) table of contents was decoded
+        self.assertEqual(deserialize.call_count, 1)
+
+    def test_snapshots_of_other_deployments_are_ignored(self):
+        self.save({"index:SNAP": index_state("Export reports as PDF")})
+        with override_settings(SECRET_KEY="another-deployment"):
+            self.assertIsNone(self.restore("index:SNAP"))
+
+    def test_files_others_can_write_are_ignored(self):
+        self.save({"index:SNAP": index_state("Export reports as PDF")})
+        os.chmod(self.path, 0o666)
+        self.assertIsNone(self.restore("index:SNAP"))
+
+    def test_missing_or_foreign_files_start_cold(self):
+        self.assertIsNone(self.restore("index:SNAP"))
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot at all, just some bytes" * 4)
+        os.chmod(self.path, 0o600)
+        self.assertIsNone(self.restore("index:SNAP"))
+
+    def test_processes_that_did_not_start_snapshots_never_read_them(self):
+        self.save({"index:SNAP": index_state("Export reports as PDF")})
+        with override_settings(CACHE_SNAPSHOT_PATH=self.path), mock.patch.object(snapshot, "_snapshot", None):
+            self.assertIsNone(snapshot.get_snapshot())
+            self.assertIsNone(snapshot.restore("index:SNAP"))
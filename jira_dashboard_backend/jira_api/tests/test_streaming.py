@@ -0,0 +1,58 @@
+import json
+
+from django.test import SimpleTestCase
+
+from jira_api.streaming import JsonArrayParser, sse_event, sse_stream
+
+ITEMS = [
+    {"title": "Render the [header]", "description": "Use \"bold\" {braces} and a \\ backslash"},
+    {"title": "Export", "steps": [["open", "report"], {"nested": True}]},
+    {"title": "Unicode é✓", "estimate": 3},
+]
+
+
+def feed_in_chunks(text, size):
+    parser = JsonArrayParser()
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+class JsonArrayParserTests(SimpleTestCase):
+    def test_items_complete_at_any_chunk_boundary(self):
+        text = json.dumps(ITEMS, indent=2)
+        for size in (1, 2, 7, len(text)):
+            with self.subTest(size=size):
+                self.assertEqual(feed_in_chunks(text, size), ITEMS)
+
+    def test_each_item_is_returned_as_soon_as_it_closes(self):
+        parser = JsonArrayParser()
+        self.assertEqual(parser.feed('[{"a": 1}, {"b": '), [{"a": 1}])
+        self.assertEqual(parser.feed('2}'), [{"b": 2}])
+
+    def test_skips_preamble_and_code_fences(self):
+        text = "Here are the tasks:\n```json\n" + json.dumps(ITEMS[:1]) + "\n```\nLet me know!"
+        self.assertEqual(feed_in_chunks(text, 5), ITEMS[:1])
+
+    def test_stops_at_the_end_of_the_array(self):
+        self.assertEqual(feed_in_chunks('[{"a": 1}] [{"b": 2}]', 3), [{"a": 1}])
+
+    def test_skips_values_that_are_not_objects(self):
+        self.assertEqual(feed_in_chunks('[1, "two", ["three"], {"four": 4}, {bad json}, {"five": 5}]', 4),
+                         [{"four": 4}, {"five": 5}])
+
+
+class ServerSentEventTests(SimpleTestCase):
+    def test_event_format(self):
+        self.assertEqual(sse_event("task", {"title": "Export"}), 'event: task\ndata: {"title": "Export"}\n\n')
+
+    def test_stream_ends_with_an_error_event_when_the_source_fails(self):
+        def events():
+            yield "task", {"n": 1}
+            raise RuntimeError("Gemini went away")
+
+        chunks = list(sse_stream(events()))
+        self.assertEqual(chunks[0], ": stream\n\n")
+        self.assertEqual(chunks[1], sse_event("task", {"n": 1}))
+        self.assertEqual(chunks[2], sse_event("error", {"error": "Gemini went away"}))
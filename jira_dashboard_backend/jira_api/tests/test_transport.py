@@ -0,0 +1,165 @@
+import json
+from email.utils import formatdate
+import time
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from jira_api import deadline
+from jira_api.deadline import DeadlineExceeded
+from jira_api.services import JiraService
+from jira_api.transport import AMBIGUOUS, FATAL, RETRY, SUCCESS, AlreadyApplied, RetryPolicy, classify, retry_after
+
+
+def response(status_code, body=None, headers=None):
+    result = requests.Response()
+    result.status_code = status_code
+    result._content = json.dumps(body if body is not None else {}).encode("utf-8")
+    result.headers.update(headers or {})
+    return result
+
+
+class ScriptedSend:
+    """A send() that plays back responses (or raises errors) in order and records its timeouts"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class ClassifyTests(SimpleTestCase):
+    def test_status_codes(self):
+        cases = {200: SUCCESS, 201: SUCCESS, 302: SUCCESS, 429: RETRY, 503: RETRY,
+                 500: AMBIGUOUS, 502: AMBIGUOUS, 504: AMBIGUOUS, 400: FATAL, 401: FATAL, 404: FATAL}
+        for status_code, outcome in cases.items():
+            with self.subTest(status_code=status_code):
+                self.assertEqual(classify(response(status_code)), outcome)
+
+    def test_transport_errors(self):
+        refused = requests.exceptions.ConnectionError("NewConnectionError: Connection refused")
+        reset = requests.exceptions.ConnectionError("Connection aborted: RemoteDisconnected")
+        self.assertEqual(classify(error=requests.exceptions.ConnectTimeout()), RETRY)
+        self.assertEqual(classify(error=refused), RETRY)
+        self.assertEqual(classify(error=reset), AMBIGUOUS)
+        self.assertEqual(classify(error=requests.exceptions.ReadTimeout()), AMBIGUOUS)
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after(response(429, headers={"Retry-After": "7"})), 7.0)
+        self.assertAlmostEqual(retry_after(response(503, headers={"Retry-After": formatdate(time.time() + 30)})),
+                               30, delta=2)
+        self.assertIsNone(retry_after(response(429)))
+        self.assertIsNone(retry_after(response(429, headers={"Retry-After": "soon"})))
+
+
+class RetryPolicyTests(SimpleTestCase):
+    def policy(self, **kwargs):
+        return RetryPolicy(**{"max_retries": 3, "base_delay": 0, "max_delay": 0, "budget": 10, "timeout": 5,
+                              "connect_timeout": 2, **kwargs})
+
+    def test_backoff_is_capped(self):
+        policy = self.policy(base_delay=1, max_delay=4)
+        for retry in range(1, 10):
+            self.assertLessEqual(policy.backoff(retry), min(4, 2 ** (retry - 1)))
+
+    def test_retries_rate_limited_writes(self):
+        send = ScriptedSend(response(429), response(503), response(201, {"key": "PROJ-1"}))
+        result = self.policy().send(send, "POST", "create")
+        self.assertEqual(result.status_code, 201)
+        self.assertEqual(send.timeouts, [(2, 5)] * 3)
+
+    def test_does_not_resend_ambiguous_writes(self):
+        send = ScriptedSend(response(500), response(201))
+        self.assertEqual(self.policy().send(send, "POST", "create").status_code, 500)
+        self.assertEqual(len(send.timeouts), 1)
+
+    def test_resends_ambiguous_reads_until_retries_run_out(self):
+        send = ScriptedSend(*[response(502)] * 4)
+        self.assertEqual(self.policy().send(send, "GET", "search").status_code, 502)
+        self.assertEqual(len(send.timeouts), 4)
+
+    def test_fatal_responses_are_returned_at_once(self):
+        send = ScriptedSend(response(400), response(200))
+        self.assertEqual(self.policy().send(send, "GET", "search").status_code, 400)
+
+    def test_checks_before_resending_an_ambiguous_write(self):
+        send = ScriptedSend(requests.exceptions.ReadTimeout(), response(201))
+        with self.assertRaises(AlreadyApplied) as raised:
+            self.policy().send(send, "POST", "create", check_applied=lambda: {"key": "PROJ-1"})
+        self.assertEqual(raised.exception.result, {"key": "PROJ-1"})
+        self.assertEqual(len(send.timeouts), 1)
+
+        send = ScriptedSend(requests.exceptions.ReadTimeout(), response(201))
+        self.assertEqual(self.policy().send(send, "POST", "create", check_applied=lambda: None).status_code, 201)
+
+    def test_raises_the_last_transport_error(self):
+        send = ScriptedSend(*[requests.exceptions.ConnectTimeout()] * 4)
+        with self.assertRaises(requests.exceptions.ConnectTimeout):
+            self.policy().send(send, "GET", "search")
+        self.assertEqual(len(send.timeouts), 4)
+
+    def test_gives_up_when_retry_after_exceeds_the_budget(self):
+        send = ScriptedSend(response(429, headers={"Retry-After": "60"}), response(200))
+        self.assertEqual(self.policy().send(send, "GET", "search").status_code, 429)
+
+    def test_timeouts_end_at_the_request_deadline(self):
+        send = ScriptedSend(response(200))
+        with deadline.deadline(1):
+            self.policy().send(send, "GET", "search")
+        connect, read = send.timeouts[0]
+        self.assertLessEqual(read, 1)
+        self.assertLessEqual(connect, read)
+
+        with deadline.deadline(0), self.assertRaises(DeadlineExceeded):
+            self.policy().send(ScriptedSend(), "GET", "search")
+
+
+@override_settings(JIRA_IDEMPOTENCY_LABELS=True)
+class IdempotencyLabelTests(SimpleTestCase):
+    """Creates carry an idempotency label unless the project's create screen refuses labels"""
+
+    def setUp(self):
+        self.jira = JiraService("LABELS")
+        self.jira.labels_rejected = False
+        self.sent = []
+        self.jira.request = self.request
+
+    def request(self, method, url, operation, check_applied=None, json=None, **kwargs):
+        self.sent.append((operation, check_applied is not None, json))
+        if operation == "create":
+            if "labels" in json["fields"]:
+                return response(400, {"errors": {"labels": "Field 'labels' cannot be set."}})
+            return response(201, {"id": "1", "key": "LABELS-1"})
+        refused = [{"failedElementNumber": n, "status": 400, "elementErrors": {"errors": {"labels": "Refused"}}}
+                   for n, update in enumerate(json["issueUpdates"]) if "labels" in update["fields"]]
+        if refused:
+            return response(400, {"issues": [], "errors": refused})
+        return response(201, {"issues": [{"id": str(n), "key": f"LABELS-{n + 10}"}
+                                         for n in range(len(json["issueUpdates"]))]})
+
+    @override_settings(JIRA_IDEMPOTENCY_LABELS=False)
+    def test_labels_are_opt_in(self):
+        self.assertIsNone(self.jira._idempotency_label())
+
+    def test_create_falls_back_to_no_label(self):
+        self.assertEqual(self.jira.create_issue("Summary", "Description"), {"id": "1", "key": "LABELS-1"})
+        self.assertEqual([(operation, checked, "labels" in payload["fields"])
+                          for operation, checked, payload in self.sent],
+                         [("create", True, True), ("create", False, False)])
+
+        # Later creates skip the label straight away
+        self.sent.clear()
+        self.jira.create_issue("Summary", "Description")
+        self.assertEqual(len(self.sent), 1)
+
+    def test_bulk_create_resends_refused_elements_without_labels(self):
+        results = self.jira.create_issues_bulk([("A", "", "Task", None), ("B", "", "Task", None)])
+        self.assertEqual([result["key"] for result in results], ["LABELS-10", "LABELS-11"])
+        self.assertEqual([(operation, checked) for operation, checked, _ in self.sent],
+                         [("bulk_create", True), ("bulk_create", False)])
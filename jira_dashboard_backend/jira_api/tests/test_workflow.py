@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from jira_api import views
+from jira_api.models import WorkflowRun, WorkflowStep
+from jira_api.services import AutomationService
+from jira_api.stubs import StubGeminiService, StubJiraService
+
+REQUIREMENT = "Export the monthly report as PDF"
+
+
+def ticket_keys(result):
+    """Every ticket a workflow result reports"""
+    keys = [result["parent_ticket"]] + [task["key"] for task in result["development_tasks"]]
+    return keys + [test["key"] for tests in result["test_cases"].values() for test in tests]
+
+
+class BrokenSubtasksJiraService(StubJiraService):
+    """A stub Jira that refuses to create subtasks while broken is set"""
+
+    def __init__(self):
+        super().__init__(latency=0, project_key="WF")
+        self.broken = True
+
+    def create_issue(self, summary, description, issue_type="Task", parent_key=None):
+        if self.broken and issue_type == "Subtask":
+            raise RuntimeError("Subtask creation is down")
+        return super().create_issue(summary, description, issue_type, parent_key)
+
+
+@override_settings(AUTOMATION_PACING_SCALE=0, JIRA_WRITE_BEHIND=False)
+class WorkflowResumeTests(TestCase):
+    def setUp(self):
+        self.jira = BrokenSubtasksJiraService()
+        self.gemini = StubGeminiService(task_count=2, test_count=2)
+        self.gemini.generate_content = mock.Mock(wraps=self.gemini.generate_content)
+        self.automation = AutomationService(jira=self.jira, gemini=self.gemini)
+
+    def test_failed_run_resumes_from_its_checkpoints(self):
+        first = self.automation.create_automated_workflow(REQUIREMENT)
+        self.assertFalse(first["resumed"])
+        self.assertIn("Subtask creation is down", first["errors"])
+        self.assertEqual(WorkflowRun.objects.get().status, WorkflowRun.STATUS_FAILED)
+        self.assertEqual(len(self.jira.issues), 3)
+        completed = WorkflowStep.objects.filter(status=WorkflowStep.STATUS_COMPLETED).count()
+        gemini_calls = self.gemini.generate_content.call_count
+
+        self.jira.broken = False
+        second = self.automation.create_automated_workflow(REQUIREMENT)
+
+        self.assertTrue(second["resumed"])
+        self.assertEqual(second["workflow_id"], first["workflow_id"])
+        self.assertEqual(second["errors"], [])
+        self.assertEqual(second["resumed_steps"], completed)
+        # Nothing from the first attempt was created or generated again
+        self.assertEqual(self.gemini.generate_content.call_count, gemini_calls)
+        self.assertEqual(sorted(ticket_keys(second)), sorted(self.jira.issues))
+        self.assertEqual(second["parent_ticket"], first["parent_ticket"])
+        self.assertEqual(WorkflowRun.objects.get().status, WorkflowRun.STATUS_COMPLETED)
+
+    def test_completed_runs_are_not_replayed(self):
+        self.jira.broken = False
+        first = self.automation.create_automated_workflow(REQUIREMENT, reuse_existing=False)
+        second = self.automation.create_automated_workflow(REQUIREMENT, reuse_existing=False)
+
+        self.assertFalse(second["resumed"])
+        self.assertNotEqual(second["workflow_id"], first["workflow_id"])
+        self.assertEqual(second["resumed_steps"], 0)
+        self.assertFalse(set(ticket_keys(first)) & set(ticket_keys(second)))
+        self.assertEqual(list(WorkflowRun.objects.values_list("status", flat=True)),
+                         [WorkflowRun.STATUS_COMPLETED] * 2)
+
+    def test_restart_starts_a_fresh_run(self):
+        first = self.automation.create_automated_workflow(REQUIREMENT)
+        second = self.automation.create_automated_workflow(REQUIREMENT, restart=True)
+        self.assertFalse(second["resumed"])
+        self.assertNotEqual(second["workflow_id"], first["workflow_id"])
+
+    def test_view_reports_resumed_runs(self):
+        with mock.patch.object(views, "automation_service", self.automation):
+            failed = self.client.post("/api/automation/workflow/", {"requirement": REQUIREMENT},
+                                      content_type="application/json")
+            self.jira.broken = False
+            resumed = self.client.post("/api/automation/workflow/", {"requirement": REQUIREMENT},
+                                       content_type="application/json")
+            created = self.client.post("/api/automation/workflow/", {"requirement": REQUIREMENT},
+                                       content_type="application/json")
+
+        self.assertEqual(failed.status_code, 207)
+        self.assertEqual((resumed.status_code, resumed.json()["resumed"]), (200, True))
+        self.assertEqual((created.status_code, created.json()["resumed"]), (201, False))
@@ -0,0 +1,155 @@
+# jira_api/transport.py
+# Retry policy for outbound HTTP calls to Jira.
+from email.utils import parsedate_to_datetime
+import random
+import time
+import logging
+
+import requests
+from django.conf import settings
+
+from . import metrics
+from .deadline import DeadlineExceeded, expired as deadline_expired, remaining as deadline_remaining
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Outcome classes. RETRY means the request was certainly not applied (rate
+# limited, or rejected before processing); AMBIGUOUS means it may have been,
+# so only idempotent calls (or ones that can check) are resent.
+SUCCESS = "success"
+RETRY = "retry"
+AMBIGUOUS = "ambiguous"
+FATAL = "fatal"
+
+RETRY_STATUSES = frozenset({429, 503})
+AMBIGUOUS_STATUSES = frozenset({500, 502, 504})
+
+
+class AlreadyApplied(Exception):
+    """Raised when a retried non-idempotent call turns out to have succeeded already"""
+
+    def __init__(self, result):
+        super().__init__("Request was already applied")
+        self.result = result
+
+
+def classify(response=None, error=None):
+    """Classify an attempt by its status code or transport error"""
+    if error is not None:
+        # Nothing reached Jira if the connection was never established
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return RETRY
+        if isinstance(error, requests.exceptions.ConnectionError) and not isinstance(error, requests.exceptions.ReadTimeout):
+            return RETRY if _failed_to_connect(error) else AMBIGUOUS
+        return AMBIGUOUS
+    if response.status_code < 400:
+        return SUCCESS
+    if response.status_code in RETRY_STATUSES:
+        return RETRY
+    if response.status_code in AMBIGUOUS_STATUSES:
+        return AMBIGUOUS
+    return FATAL
+
+
+def _failed_to_connect(error):
+    cause = error.args[0] if error.args else None
+    text = str(cause or error)
+    return "NewConnectionError" in text or "Name or service not known" in text or "Connection refused" in text
+
+
+def retry_after(response):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), or None"""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped by attempts and a per-call time budget"""
+
+    def __init__(self, max_retries=None, base_delay=None, max_delay=None, budget=None, timeout=None,
+                 connect_timeout=None):
+        self.max_retries = settings.JIRA_RETRY_MAX if max_retries is None else max_retries
+        self.base_delay = settings.JIRA_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.JIRA_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.budget = settings.JIRA_RETRY_BUDGET if budget is None else budget
+        self.timeout = settings.JIRA_REQUEST_TIMEOUT if timeout is None else timeout
+        self.connect_timeout = settings.JIRA_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout
+
+    def backoff(self, retry):
+        """Delay before the given retry (1-based): uniform in [0, min(cap, base * 2^(retry-1))]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def send(self, send, method, operation, idempotent=None, check_applied=None):
+        """Call send(timeout=(connect, read)) until it succeeds, fails permanently, or retries run out.
+
+        Returns the last Response (callers still check its status) or raises
+        the last transport error. Non-idempotent calls are only resent after
+        failures that guarantee nothing was applied, unless check_applied is
+        given: it is called before resending after an ambiguous failure and
+        returns the earlier call's result (raised as AlreadyApplied) or None.
+        The budget, and so every attempt's timeouts, ends at the request deadline.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        deadline = time.monotonic() + self.budget
+        left = deadline_remaining()
+        if left is not None:
+            if left <= 0:
+                metrics.increment("jira_deadline_exceeded_total", operation=operation)
+                raise DeadlineExceeded(f"Request deadline exceeded before Jira {operation}")
+            deadline = min(deadline, time.monotonic() + left)
+        retries = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            read_timeout = max(0.1, min(self.timeout, remaining))
+            response, error = None, None
+            try:
+                response = send(timeout=(min(self.connect_timeout, read_timeout), read_timeout))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            outcome = classify(response, error)
+            reason = type(error).__name__ if error is not None else str(response.status_code)
+            metrics.increment("jira_requests_total", operation=operation, outcome=outcome)
+
+            if outcome in (SUCCESS, FATAL):
+                return response
+            if not (outcome == RETRY or idempotent or check_applied is not None):
+                return self._give_up(operation, "not_idempotent", reason, response, error)
+            if retries >= self.max_retries:
+                return self._give_up(operation, "max_retries", reason, response, error)
+
+            delay = retry_after(response)
+            delay = self.backoff(retries + 1) if delay is None else delay
+            if time.monotonic() + delay > deadline:
+                return self._give_up(operation, "budget", reason, response, error)
+
+            retries += 1
+            metrics.increment("jira_retries_total", operation=operation, reason=reason)
+            logger.warning(f"Jira {operation} failed ({reason}), retry {retries}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+            if outcome == AMBIGUOUS and not idempotent:
+                applied = check_applied()
+                if applied is not None:
+                    metrics.increment("jira_idempotent_recoveries_total", operation=operation)
+                    raise AlreadyApplied(applied)
+
+    def _give_up(self, operation, why, reason, response, error):
+        metrics.increment("jira_retries_exhausted_total", operation=operation, reason=why)
+        if error is not None and deadline_expired():
+            # The attempt's timeout was cut short by the request deadline, not by Jira being slow
+            metrics.increment("jira_deadline_exceeded_total", operation=operation)
+            raise DeadlineExceeded(f"Request deadline exceeded during Jira {operation}: {error}") from error
+        if error is not None:
+            raise error
+        return response
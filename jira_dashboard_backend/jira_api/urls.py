@@ -5,14 +5,30 @@ from . import views
 urlpatterns = [
     # Test endpoint
     path('test/', views.test_jira_connection, name='test_jira_connection'),
+    path('health/', views.health, name='health'),
+    path('metrics/', views.service_metrics, name='service_metrics'),
     
     # Issue viewing endpoints
     path('issues/', views.fetch_issues, name='fetch_issues'),
+    path('issues/export/', views.export_issues, name='export_issues'),
+    path('issues/changes/', views.fetch_issue_changes, name='fetch_issue_changes'),
     path('issues/<str:issue_key>/', views.fetch_issue_details, name='fetch_issue_details'),
     
     # Automation endpoints
     path('automation/workflow/', views.create_automation_workflow, name='create_automation_workflow'),
     path('automation/generate-tasks/', views.generate_dev_tasks, name='generate_dev_tasks'),
     path('automation/generate-tests/', views.generate_test_cases, name='generate_test_cases'),
+    path('automation/generate-tasks/stream/', views.stream_dev_tasks, name='stream_dev_tasks'),
+    path('automation/generate-tests/stream/', views.stream_test_cases, name='stream_test_cases'),
     path('automation/status/', views.get_workflow_status, name='get_workflow_status'),
+    path('automation/plans/', views.workflow_plans, name='workflow_plans'),
+    path('automation/plans/<int:plan_id>/', views.workflow_plan, name='workflow_plan'),
+    path('automation/plans/<int:plan_id>/commit/', views.commit_workflow_plan, name='commit_workflow_plan'),
+    
+    # Analytics endpoints
+    path('analytics/', views.fetch_analytics, name='fetch_analytics'),
+    path('analytics/<str:metric>/', views.fetch_analytics, name='fetch_analytics_metric'),
+    
+    # Jira webhooks
+    path('webhooks/jira/', views.jira_webhook, name='jira_webhook'),
 ]
\ No newline at end of file
@@ -2,24 +2,118 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.conf import settings
+from django.db.models import Count
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+import itertools
+import json
 import logging
+import time
 
-from .services import JiraService, AutomationService
+from . import deadline, metrics
+from .analytics import METRICS, project_analytics, project_analytics_json
+from .cache import get_cache
+from .changes import DELETED_EVENT, issue_changes, record_deletion, valid_signature
+from .health import STATUS_DOWN, STATUS_STARTING, get_prober
+from .hedging import get_hedger
+from .fastjson import RawJSON
+from .export import csv_chunks, jira_fields, ndjson_chunks, parse_export_fields
+from .deadline import with_deadline
+from .conditional import ValidatorCache, conditional_response, issue_project, issue_validators, set_validator_headers
+from .models import WorkflowPlan, WorkflowRun
+from .outbox import outbox_stats
+from .pagination import (DIRECTION_NEXT, PROJECT_KEY_PATTERN, InvalidCursor, decode_changes_token, decode_cursor,
+                         decode_projects_cursor, encode_changes_token, encode_projects_cursor, get_page_size,
+                         page_cursors)
+from .snapshot import get_snapshot
+from .scheduler import BATCH, get_scheduler, outbound_priority
+from .services import AutomationService, get_jira_service, known_project
+from .store import get_issue_store
+from .streaming import sse_stream
 
 logger = logging.getLogger(__name__)
 
 # Initialize services
-jira_service = JiraService()
+jira_service = get_jira_service()
 automation_service = AutomationService()
+validator_cache = ValidatorCache()
+health_cache = get_cache("health")
+
+
+def _project_keys(params):
+    """Project keys from ?projects=A,B (or ?project=A), defaulting to the configured project"""
+    value = params.get('projects') or params.get('project') or jira_service.project_key
+    project_keys = list(dict.fromkeys(key.strip() for key in value.split(',') if key.strip()))
+    invalid = [key for key in project_keys if not PROJECT_KEY_PATTERN.match(key)]
+    if invalid:
+        raise ValueError(f"Invalid project key: {', '.join(invalid)}")
+    if not project_keys:
+        raise ValueError("At least one project key is required")
+    unknown = [key for key in project_keys if not known_project(key)]
+    if unknown:
+        raise ValueError(f"Unknown project key: {', '.join(unknown)}")
+    if len(project_keys) > settings.JIRA_MAX_PROJECTS_PER_REQUEST:
+        raise ValueError(f"At most {settings.JIRA_MAX_PROJECTS_PER_REQUEST} projects per request")
+    return project_keys
 
 
 @api_view(['GET'])
+@with_deadline()
 def fetch_issues(request):
-    """Fetch all Jira issues"""
+    """Fetch a page of Jira issues, newest first.
+    
+    Query params: page_size, projects (one or several comma-separated project
+    keys, default the configured project), and cursor (a next_cursor or
+    prev_cursor value from a previous page) to move forward or backward.
+    Several projects are fetched in parallel and merged on created; their
+    pages only move forward.
+    """
     try:
-        result = jira_service.fetch_issues()
-        return Response(result, status=status.HTTP_200_OK)
+        try:
+            page_size = get_page_size(request.query_params.get('page_size'))
+            project_keys = _project_keys(request.query_params)
+            cursor = request.query_params.get('cursor')
+            if len(project_keys) > 1:
+                after_keys = decode_projects_cursor(cursor) if cursor else None
+            else:
+                cursor_key, direction = decode_cursor(cursor) if cursor else (None, None)
+        except (InvalidCursor, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(project_keys) > 1:
+            return _fetch_project_issues(request, project_keys, page_size, cursor, after_keys)
+        project_jira = jira_service.for_project(project_keys[0])
+        resource = f"issues:{project_jira.project_key}:{page_size}:{cursor or ''}"
+        
+        # Answer a revalidation from recently served validators without calling Jira
+        cached = validator_cache.get(resource, project_keys)
+        if cached:
+            not_modified = conditional_response(request, *cached)
+            if not_modified is not None:
+                return not_modified
+        
+        # Only the configured project falls back to every accessible issue: a requested project
+        # that Jira doesn't know is an error, not someone else's issues cached under its key
+        fallback = project_jira is jira_service
+        if direction == DIRECTION_NEXT:
+            result = project_jira.fetch_issues(page_size, after_key=cursor_key, fallback=fallback)
+        else:
+            result = project_jira.fetch_issues(page_size, before_key=cursor_key, fallback=fallback)
+        
+        issues = result.get("issues", [])
+        result["next_cursor"], result["prev_cursor"] = page_cursors(issues, result.get("hasMore"), direction)
+        result["page_size"] = page_size
+        etag, last_modified = issue_validators(issues)
+        validator_cache.set(resource, project_keys, etag, last_modified)
+        
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = Response(result, status=status.HTTP_200_OK)
+        return set_validator_headers(response, etag, last_modified)
     except Exception as e:
         logger.error(f"Error in fetch_issues: {e}")
         return Response(
@@ -28,12 +122,154 @@ def fetch_issues(request):
         )
 
 
+def _fetch_project_issues(request, project_keys, page_size, cursor, after_keys):
+    """The multi-project branch of fetch_issues"""
+    resource = f"issues:{','.join(sorted(project_keys))}:{page_size}:{cursor or ''}"
+    cached = validator_cache.get(resource, project_keys)
+    if cached:
+        not_modified = conditional_response(request, *cached)
+        if not_modified is not None:
+            return not_modified
+    
+    result = jira_service.fetch_issues_multi(project_keys, page_size, after_keys)
+    result["next_cursor"] = encode_projects_cursor(result.pop("after_keys")) if result["hasMore"] else None
+    result["prev_cursor"] = None
+    result["page_size"] = page_size
+    etag, last_modified = issue_validators(result["issues"])
+    # A partial page must not be revalidated as if it were complete
+    if not result["errors"]:
+        validator_cache.set(resource, project_keys, etag, last_modified)
+    
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    
+    response = Response(result, status=status.HTTP_200_OK)
+    return set_validator_headers(response, etag, last_modified)
+
+
+# A plain Django view: DRF reserves ?format= for content negotiation
+@require_GET
+def export_issues(request):
+    """Stream every issue of one or several projects as CSV or NDJSON (?format=csv|ndjson&fields=key,summary,...&projects=A,B)"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return JsonResponse({"error": "format must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        columns = parse_export_fields(request.GET.get('fields'))
+        project_keys = _project_keys(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Projects are exported one after another, each in key order
+    pages = itertools.chain.from_iterable(
+        jira_service.for_project(project_key).iter_issues(fields=jira_fields(columns), priority=BATCH)
+        for project_key in project_keys
+    )
+    try:
+        # Fetch the first page up front so upstream errors still get a proper status code
+        first_page = next(pages, [])
+    except Exception as e:
+        logger.error(f"Error in export_issues: {e}")
+        return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    pages = itertools.chain([first_page], pages)
+    
+    if export_format == 'csv':
+        response = StreamingHttpResponse(csv_chunks(pages, columns), content_type='text/csv; charset=utf-8')
+    else:
+        response = StreamingHttpResponse(ndjson_chunks(pages, columns), content_type='application/x-ndjson')
+    filename = "-".join(project_keys)
+    response['Content-Disposition'] = f'attachment; filename="{filename}-issues.{export_format}"'
+    return response
+
+
+@api_view(['GET'])
+@with_deadline()
+def fetch_issue_changes(request):
+    """Issues created, updated or deleted since an earlier call, for refreshing a loaded list.
+    
+    Without ?since= only a starting token is returned (for ?projects=, as in
+    /api/issues/): take it before loading the list. With since (the
+    next_since of the previous response) the response has the changed
+    issues, the keys of deleted ones and the next token. Only the change
+    window is searched, so the cost follows the size of the change; when
+    truncated is set, or the token has expired (410), reload the list.
+    """
+    started = time.time()
+    try:
+        since = request.query_params.get('since')
+        if since:
+            since, project_keys = decode_changes_token(since)
+            unknown = [key for key in project_keys if not known_project(key)]
+            if unknown:
+                raise ValueError(f"Unknown project key: {', '.join(unknown)}")
+        else:
+            project_keys = _project_keys(request.query_params)
+    except (InvalidCursor, ValueError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    next_since = encode_changes_token(started, project_keys)
+    if not since:
+        return Response({"issues": [], "deleted": [], "truncated": False, "next_since": next_since},
+                        status=status.HTTP_200_OK)
+    if started - since > settings.ISSUE_CHANGES_MAX_AGE:
+        return Response({"error": "Change token expired: reload the issue list"}, status=status.HTTP_410_GONE)
+    
+    try:
+        result = issue_changes(jira_service, project_keys, since)
+        result["next_since"] = next_since
+        return Response(result, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error in fetch_issue_changes: {e}")
+        return Response(
+            {"error": str(e)}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@csrf_exempt
+@require_POST
+def jira_webhook(request):
+    """Jira webhook receiver: issue deletions are recorded for /api/issues/changes/"""
+    if not settings.JIRA_WEBHOOK_SECRET:
+        # Unsigned events could delete any issue from the change feed
+        return JsonResponse({"error": "Jira webhooks are not configured"}, status=status.HTTP_404_NOT_FOUND)
+    if not valid_signature(request.body, request.headers.get('X-Hub-Signature')):
+        return JsonResponse({"error": "Invalid webhook signature"}, status=status.HTTP_403_FORBIDDEN)
+    event = _json_body(request)
+    if event is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+    if event.get('webhookEvent') != DELETED_EVENT:
+        # Creates and updates need no record: the change feed finds them by their updated time
+        return JsonResponse({"recorded": None})
+    return JsonResponse({"recorded": record_deletion(event)})
+
+
 @api_view(['GET'])
+@with_deadline()
 def fetch_issue_details(request, issue_key):
     """Fetch details for a specific issue"""
     try:
-        result = jira_service.fetch_issue_details(issue_key)
-        return Response(result, status=status.HTTP_200_OK)
+        resource = f"issue:{issue_key}"
+        project_keys = [issue_project(issue_key)]
+        
+        cached = validator_cache.get(resource, project_keys)
+        if cached:
+            not_modified = conditional_response(request, *cached)
+            if not_modified is not None:
+                return not_modified
+        
+        result, content = jira_service.fetch_issue_raw(issue_key)
+        etag, last_modified = issue_validators([result])
+        validator_cache.set(resource, project_keys, etag, last_modified)
+        
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        # Jira's body goes out as received: no re-encoding of the (large) issue JSON
+        response = Response(RawJSON(content), status=status.HTTP_200_OK)
+        return set_validator_headers(response, etag, last_modified)
     except Exception as e:
         logger.error(f"Error in fetch_issue_details: {e}")
         return Response(
@@ -44,6 +280,7 @@ def fetch_issue_details(request, issue_key):
 
 @api_view(['POST'])
 @csrf_exempt
+@with_deadline("LONG_REQUEST_DEADLINE")
 def create_automation_workflow(request):
     """Create automated workflow from requirement"""
     try:
@@ -54,14 +291,21 @@ def create_automation_workflow(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Run the automation workflow
-        result = automation_service.create_automated_workflow(requirement)
+        # Run the automation workflow (resumes an unfinished run for the same requirement)
+        restart = bool(request.data.get('restart', False))
+        reuse_existing = bool(request.data.get('reuse_existing', True))
+        # Workflow calls queue behind dashboard reads in the outbound scheduler
+        with outbound_priority(BATCH):
+            result = automation_service.create_automated_workflow(
+                requirement, restart=restart, reuse_existing=reuse_existing
+            )
         
         # Check if there were any errors
         if result.get("errors"):
             return Response(result, status=status.HTTP_207_MULTI_STATUS)
         
-        return Response(result, status=status.HTTP_201_CREATED)
+        # A resumed run finishes an earlier request's workflow rather than creating a new one
+        return Response(result, status=status.HTTP_200_OK if result["resumed"] else status.HTTP_201_CREATED)
         
     except Exception as e:
         logger.error(f"Error in create_automation_workflow: {e}")
@@ -73,6 +317,7 @@ def create_automation_workflow(request):
 
 @api_view(['POST'])
 @csrf_exempt
+@with_deadline("LONG_REQUEST_DEADLINE")
 def generate_dev_tasks(request):
     """Generate development tasks for a requirement"""
     try:
@@ -102,6 +347,7 @@ def generate_dev_tasks(request):
 
 @api_view(['POST'])
 @csrf_exempt
+@with_deadline("LONG_REQUEST_DEADLINE")
 def generate_test_cases(request):
     """Generate test cases for a task"""
     try:
@@ -129,40 +375,253 @@ def generate_test_cases(request):
         )
 
 
+def _event_stream(events, operation):
+    """SSE response that flushes each event as soon as it is produced"""
+    try:
+        # Wait for the first event so failures before any output still get a proper status code
+        first_event = next(events, None)
+    except Exception as e:
+        logger.error(f"Error in {operation}: {e}")
+        return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # The rest of the stream is produced after the view returns, still under its deadline
+    events = deadline.iterate(itertools.chain([first_event] if first_event else [], events))
+    
+    response = StreamingHttpResponse(sse_stream(events), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _json_body(request):
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+@csrf_exempt
+@require_POST
+@with_deadline("LONG_REQUEST_DEADLINE")
+def stream_dev_tasks(request):
+    """Streaming variant of generate-tasks: Server-Sent Events with the raw text and each task as it completes"""
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+    requirement = body.get('requirement')
+    if not requirement:
+        return JsonResponse({"error": "Requirement is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return _event_stream(automation_service.stream_development_tasks(requirement), 'stream_dev_tasks')
+
+
+@csrf_exempt
+@require_POST
+@with_deadline("LONG_REQUEST_DEADLINE")
+def stream_test_cases(request):
+    """Streaming variant of generate-tests: Server-Sent Events with the raw text and each test case as it completes"""
+    body = _json_body(request)
+    if body is None:
+        return JsonResponse({"error": "Request body must be a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+    task_description = body.get('task_description')
+    if not task_description:
+        return JsonResponse({"error": "Task description is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return _event_stream(automation_service.stream_test_cases(task_description), 'stream_test_cases')
+
+
 @api_view(['GET'])
+@with_deadline()
 def get_workflow_status(request):
-    """Get status of ongoing workflows (placeholder for future websocket implementation)"""
+    """Get status of a checkpointed workflow run, or of the service when no run is given"""
+    workflow_id = request.query_params.get('workflow_id')
+    if not workflow_id:
+        return Response({
+            "message": "Workflow status endpoint - pass ?workflow_id= to inspect a run",
+            "status": "ready"
+        }, status=status.HTTP_200_OK)
+    
+    run = WorkflowRun.objects.filter(pk=workflow_id).first() if workflow_id.isdigit() else None
+    if run is None:
+        return Response(
+            {"error": f"Workflow {workflow_id} not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    outbox = dict(run.outbox_entries.values_list("status").annotate(n=Count("id")))
     return Response({
-        "message": "Workflow status endpoint - to be implemented with WebSockets",
-        "status": "ready"
+        "workflow_id": run.pk,
+        "requirement": run.requirement,
+        "status": run.status,
+        "steps": [
+            {"name": step.name, "status": step.status, "error": step.error}
+            for step in run.steps.all()
+        ],
+        "outbox": outbox or None,
+        "result": run.result,
     }, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
-def test_jira_connection(request):
-    """Test Jira API connection and get basic info"""
+def _plan_payload(plan):
+    """Serialize a WorkflowPlan for the API"""
+    return {
+        "plan_id": plan.pk,
+        "requirement": plan.requirement,
+        "status": plan.status,
+        "revision": plan.revision,
+        "editable": plan.editable,
+        "workflow_id": plan.run_id,
+        "plan": plan.tree,
+        "last_result": plan.last_result,
+        "created_at": plan.created_at,
+        "updated_at": plan.updated_at,
+    }
+
+
+@api_view(['GET', 'POST'])
+@csrf_exempt
+@with_deadline("LONG_REQUEST_DEADLINE")
+def workflow_plans(request):
+    """List recent plans, or generate and save a plan for a requirement without touching Jira"""
+    if request.method == 'GET':
+        return Response({
+            "plans": [{
+                "plan_id": plan.pk,
+                "requirement": plan.requirement,
+                "status": plan.status,
+                "revision": plan.revision,
+                "created_at": plan.created_at,
+            } for plan in WorkflowPlan.objects.all()[:20]]
+        }, status=status.HTTP_200_OK)
+    
     try:
-        # Test basic connection by getting user info
-        url = f"{jira_service.base_url}/rest/api/3/myself"
-        import requests
-        response = requests.get(url, headers=jira_service.headers, auth=jira_service.auth)
-        response.raise_for_status()
-        user_info = response.json()
+        requirement = request.data.get('requirement')
+        if not requirement:
+            return Response(
+                {"error": "Requirement is required"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Get available projects
-        projects_url = f"{jira_service.base_url}/rest/api/3/project"
-        projects_response = requests.get(projects_url, headers=jira_service.headers, auth=jira_service.auth)
-        projects_response.raise_for_status()
-        projects = projects_response.json()
+        tree = automation_service.plan_workflow(requirement)
+        plan = WorkflowPlan.objects.create(requirement=requirement, tree=tree)
+        return Response(_plan_payload(plan), status=status.HTTP_201_CREATED)
+        
+    except Exception as e:
+        logger.error(f"Error in workflow_plans: {e}")
+        return Response(
+            {"error": str(e)}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET', 'PUT'])
+@csrf_exempt
+@with_deadline()
+def workflow_plan(request, plan_id):
+    """Get a saved plan, or replace its task/test tree before it is committed"""
+    plan = WorkflowPlan.objects.filter(pk=plan_id).first()
+    if plan is None:
+        return Response({"error": f"Plan {plan_id} not found"}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == 'GET':
+        return Response(_plan_payload(plan), status=status.HTTP_200_OK)
+    
+    if not plan.editable:
+        return Response(
+            {"error": f"Plan {plan_id} has already been committed to Jira; create a new plan instead"},
+            status=status.HTTP_409_CONFLICT
+        )
+    try:
+        tree = WorkflowPlan.validate_tree(request.data.get('plan'))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    plan.tree = tree
+    plan.revision += 1
+    plan.last_result = None
+    plan.save(update_fields=["tree", "revision", "last_result", "updated_at"])
+    return Response(_plan_payload(plan), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@csrf_exempt
+@with_deadline("LONG_REQUEST_DEADLINE")
+def commit_workflow_plan(request, plan_id):
+    """Create a saved plan's tickets in Jira (or preview them with dry_run)"""
+    plan = WorkflowPlan.objects.filter(pk=plan_id).first()
+    if plan is None:
+        return Response({"error": f"Plan {plan_id} not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        dry_run = bool(request.data.get('dry_run', False))
+        reuse_existing = bool(request.data.get('reuse_existing', True))
+        with outbound_priority(BATCH):
+            result = automation_service.commit_plan(plan, dry_run=dry_run, reuse_existing=reuse_existing)
+        
+        if result.get("errors"):
+            return Response(result, status=status.HTTP_207_MULTI_STATUS)
+        return Response(result, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
         
-        return Response({
-            "connection": "success",
-            "user": user_info.get('displayName', 'Unknown'),
-            "email": user_info.get('emailAddress', 'Unknown'),
-            "jira_url": jira_service.base_url,
-            "configured_project": jira_service.project_key,
-            "available_projects": [{"key": p["key"], "name": p["name"]} for p in projects[:10]]
-        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error in commit_workflow_plan: {e}")
+        return Response(
+            {"error": str(e)}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@with_deadline("LONG_REQUEST_DEADLINE")
+def fetch_analytics(request, metric=None):
+    """Project aggregates (status, throughput, cycle-time, assignees) from the local issue store.
+    
+    Query params: project (defaults to the configured project), weeks for the
+    throughput window, and refresh=full to resync the store from scratch.
+    """
+    if metric is not None and metric not in METRICS:
+        return Response(
+            {"error": f"Unknown metric {metric}. Available: {', '.join(METRICS)}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    project_key = request.query_params.get('project', jira_service.project_key)
+    if not PROJECT_KEY_PATTERN.match(project_key):
+        return Response({"error": f"Invalid project key: {project_key}"}, status=status.HTTP_400_BAD_REQUEST)
+    if not known_project(project_key):
+        return Response({"error": f"Unknown project key: {project_key}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        weeks = max(1, min(int(request.query_params.get('weeks', 12)), 104))
+    except ValueError:
+        return Response({"error": "weeks must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        store = get_issue_store(project_key)
+        project_jira = jira_service.for_project(project_key)
+        if request.query_params.get('refresh') == 'full':
+            with store.lock:
+                store.sync(project_jira, full=True)
+        else:
+            store.ensure_fresh(project_jira)
+        
+        if metric is None:
+            # Encoded once per store version and served as bytes until the store changes
+            return Response(RawJSON(project_analytics_json(store, weeks)), status=status.HTTP_200_OK)
+        result = project_analytics(store, weeks)
+        result = {"project": result["project"], "issue_count": result["issue_count"],
+                  "last_sync": result["last_sync"], metric: result[metric]}
+        return Response(result, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error in fetch_analytics: {e}")
+        return Response(
+            {"error": str(e)}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@with_deadline()
+def test_jira_connection(request):
+    """Test Jira API connection and get basic info (use /api/health/ for frequent checks)"""
+    try:
+        return Response({"connection": "success", **jira_service.connection_info()}, status=status.HTTP_200_OK)
     except Exception as e:
         logger.error(f"Error testing Jira connection: {e}")
         return Response({
@@ -170,4 +629,42 @@ def test_jira_connection(request):
             "error": str(e),
             "jira_url": jira_service.base_url,
             "configured_project": jira_service.project_key,
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+def health(request):
+    """Jira and Gemini health from the background prober, without calling either.
+    
+    Answers 503 only when Jira is unreachable. ?details=1 adds the
+    connection info of /api/test/, itself cached for HEALTH_DETAILS_TTL.
+    """
+    result = get_prober().get()
+    if result is None:
+        result = {"status": STATUS_STARTING, "checked_at": None, "checks": {}}
+    result = dict(result, age_seconds=round(time.time() - result["checked_at"], 1) if result["checked_at"] else None)
+    
+    if request.GET.get('details'):
+        try:
+            result["details"] = health_cache.get_or_set("details", jira_service.connection_info,
+                                                        settings.HEALTH_DETAILS_TTL)
+        except Exception as e:
+            logger.error(f"Error fetching connection details: {e}")
+            result["details"] = {"error": str(e)}
+    
+    code = status.HTTP_503_SERVICE_UNAVAILABLE if result["status"] == STATUS_DOWN else status.HTTP_200_OK
+    response = JsonResponse(result, status=code)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@api_view(['GET'])
+def service_metrics(request):
+    """Counters and latencies for outbound calls (requests, retries, queueing, hedges) of this worker process"""
+    snapshot = metrics.snapshot()
+    snapshot["hedging"] = get_hedger().stats() if settings.GEMINI_HEDGING else None
+    snapshot["jira_scheduler"] = get_scheduler().stats()
+    snapshot["jira_outbox"] = outbox_stats() if settings.JIRA_WRITE_BEHIND else None
+    cache_snapshot = get_snapshot()
+    snapshot["cache_snapshot"] = cache_snapshot.stats() if cache_snapshot is not None else None
+    return Response(snapshot, status=status.HTTP_200_OK)
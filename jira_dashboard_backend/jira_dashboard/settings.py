@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'jira_api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,7 +71,7 @@ WSGI_APPLICATION = 'jira_dashboard.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -127,6 +128,16 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',
+    'if-modified-since',
+    'x-profile',
+    'x-profile-format',
+]
+
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
+    'x-profile-id',
 ]
 
 # REST Framework settings
@@ -135,20 +146,194 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'jira_api.fastjson.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'jira_api.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# JSON encoding/decoding for API responses and Jira bodies: 'auto' uses orjson when it is
+# installed (optional, pip install orjson), 'stdlib' always uses the json module
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
 # Jira Configuration
 JIRA_URL = os.getenv('JIRA_URL')
 JIRA_BASE_URL = JIRA_URL  # Alias for compatibility
 JIRA_EMAIL = os.getenv('JIRA_EMAIL')
 JIRA_API_TOKEN = os.getenv('JIRA_API_TOKEN')
 JIRA_PROJECT_KEY = os.getenv('PROJECT_KEY', 'SAM1')  # Updated to use existing project
+# Other projects the issue endpoints may be asked for with ?projects=A,B (comma-separated). Each one
+# gets its own JiraService, issue index and store in every process, so no other key is accepted.
+JIRA_PROJECTS = [key.strip() for key in os.getenv('JIRA_PROJECTS', '').split(',') if key.strip()]
+# Issue endpoints accept ?projects=A,B: at most this many projects per request, searched in parallel
+JIRA_MAX_PROJECTS_PER_REQUEST = int(os.getenv('JIRA_MAX_PROJECTS_PER_REQUEST', '20'))
+JIRA_PROJECT_FETCH_WORKERS = int(os.getenv('JIRA_PROJECT_FETCH_WORKERS', '10'))
+
+# Issue links are created by a background pipeline stage (0 workers = inline)
+JIRA_LINK_WORKERS = int(os.getenv('JIRA_LINK_WORKERS', '4'))
+JIRA_LINK_RETRIES = int(os.getenv('JIRA_LINK_RETRIES', '2'))
+JIRA_LINK_RETRY_DELAY = float(os.getenv('JIRA_LINK_RETRY_DELAY', '1.0'))
+
+# Jira transport: per-attempt read and connect timeouts, retries for transient failures
+# (429/5xx/connection errors) with exponential backoff and full jitter, and the total time
+# one call may take (never past the request deadline)
+JIRA_REQUEST_TIMEOUT = float(os.getenv('JIRA_REQUEST_TIMEOUT', '30'))
+JIRA_CONNECT_TIMEOUT = float(os.getenv('JIRA_CONNECT_TIMEOUT', '5'))
+JIRA_RETRY_MAX = int(os.getenv('JIRA_RETRY_MAX', '3'))
+JIRA_RETRY_BASE_DELAY = float(os.getenv('JIRA_RETRY_BASE_DELAY', '0.5'))
+JIRA_RETRY_MAX_DELAY = float(os.getenv('JIRA_RETRY_MAX_DELAY', '20'))
+JIRA_RETRY_BUDGET = float(os.getenv('JIRA_RETRY_BUDGET', '60'))
+# Tag created issues with a unique idem-* label so a retried create can detect that it already went
+# through. Opt-in: the labels stay on the issues. Projects whose create screen has no Labels field
+# fall back to unlabelled creates, which are only resent when nothing can have been applied.
+JIRA_IDEMPOTENCY_LABELS = os.getenv('JIRA_IDEMPOTENCY_LABELS', 'False') == 'True'
+
+# Outbound Jira scheduler shared by every request in the process: at most JIRA_MAX_CONCURRENCY
+# requests in flight, JIRA_RATE_LIMIT requests/second (0 = unlimited) with bursts of
+# JIRA_RATE_BURST. Waiting requests are served by weighted fair queuing between the priority
+# classes (interactive dashboard reads vs batch automation work), and give up after
+# JIRA_QUEUE_TIMEOUT seconds.
+JIRA_MAX_CONCURRENCY = int(os.getenv('JIRA_MAX_CONCURRENCY', '8'))
+JIRA_RATE_LIMIT = float(os.getenv('JIRA_RATE_LIMIT', '0'))
+JIRA_RATE_BURST = int(os.getenv('JIRA_RATE_BURST', '10'))
+JIRA_PRIORITY_WEIGHTS = os.getenv('JIRA_PRIORITY_WEIGHTS', 'interactive=16,batch=1')
+JIRA_QUEUE_TIMEOUT = float(os.getenv('JIRA_QUEUE_TIMEOUT', '30'))
+
+# Time budget per API request: REQUEST_DEADLINE seconds for dashboard reads,
+# LONG_REQUEST_DEADLINE for AI generation, workflows and store syncs. Every Jira and Gemini
+# call made for the request times out by then, and work not started is skipped (workflows
+# return what they completed, resumable). Clients may ask for less with X-Request-Timeout.
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', '30'))
+LONG_REQUEST_DEADLINE = float(os.getenv('LONG_REQUEST_DEADLINE', '600'))
+
+# Seconds a served ETag stays trusted for 304s without re-checking Jira (0 = always re-check)
+ISSUE_VALIDATOR_TTL = int(os.getenv('ISSUE_VALIDATOR_TTL', '15'))
+
+# Cursor pagination for /api/issues/ (Jira caps search pages at 100)
+ISSUES_PAGE_SIZE = int(os.getenv('ISSUES_PAGE_SIZE', '50'))
+ISSUES_MAX_PAGE_SIZE = int(os.getenv('ISSUES_MAX_PAGE_SIZE', '100'))
+
+# /api/issues/changes/: change tokens stay valid (and Jira-reported deletions are kept) for
+# ISSUE_CHANGES_MAX_AGE seconds; above ISSUE_CHANGES_LIMIT changed issues the client is told to
+# reload instead. Jira webhooks (POST /api/webhooks/jira/) must be signed with JIRA_WEBHOOK_SECRET
+# (X-Hub-Signature); while it is empty the webhook endpoint is disabled and answers 404.
+ISSUE_CHANGES_MAX_AGE = int(os.getenv('ISSUE_CHANGES_MAX_AGE', str(7 * 24 * 3600)))
+ISSUE_CHANGES_LIMIT = int(os.getenv('ISSUE_CHANGES_LIMIT', '500'))
+JIRA_WEBHOOK_SECRET = os.getenv('JIRA_WEBHOOK_SECRET', '')
 
 # Gemini API Configuration
 GEMINI_API_KEY1 = os.getenv('GEMINI_API_KEY1')
 GEMINI_API_KEY2 = os.getenv('GEMINI_API_KEY2')
+# Additional keys, comma-separated; calls are spread across every configured key
+GEMINI_API_KEYS = os.getenv('GEMINI_API_KEYS', '')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+# Concurrent calls per key, and how long a failing key is skipped (doubling per
+# consecutive failure, up to GEMINI_MAX_COOLDOWN seconds)
+GEMINI_KEY_CONCURRENCY = int(os.getenv('GEMINI_KEY_CONCURRENCY', '4'))
+GEMINI_QUOTA_COOLDOWN = float(os.getenv('GEMINI_QUOTA_COOLDOWN', '10'))
+GEMINI_ERROR_COOLDOWN = float(os.getenv('GEMINI_ERROR_COOLDOWN', '1'))
+GEMINI_MAX_COOLDOWN = float(os.getenv('GEMINI_MAX_COOLDOWN', '60'))
+# Seconds one Gemini call may take (less when the request deadline is closer)
+GEMINI_REQUEST_TIMEOUT = float(os.getenv('GEMINI_REQUEST_TIMEOUT', '120'))
+
+# Hedged Gemini calls: once a call runs past the GEMINI_HEDGE_PERCENTILE latency of recent calls
+# (never sooner than GEMINI_HEDGE_MIN_DELAY; GEMINI_HEDGE_INITIAL_DELAY until there are
+# GEMINI_HEDGE_MIN_SAMPLES of them) a duplicate goes to another key, or to GEMINI_HEDGE_MODEL.
+# At most GEMINI_HEDGE_BUDGET of calls are hedged, and at most GEMINI_HEDGE_WORKERS hedges run at
+# once. GEMINI_HEDGE_HOLDOUT of calls are never hedged: the p99 gain on /api/metrics/ compares them
+# with the hedged calls.
+GEMINI_HEDGING = os.getenv('GEMINI_HEDGING', 'False') == 'True'
+GEMINI_HEDGE_MODEL = os.getenv('GEMINI_HEDGE_MODEL', '')
+GEMINI_HEDGE_PERCENTILE = float(os.getenv('GEMINI_HEDGE_PERCENTILE', '95'))
+GEMINI_HEDGE_BUDGET = float(os.getenv('GEMINI_HEDGE_BUDGET', '0.1'))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv('GEMINI_HEDGE_MIN_DELAY', '1.0'))
+GEMINI_HEDGE_INITIAL_DELAY = float(os.getenv('GEMINI_HEDGE_INITIAL_DELAY', '8.0'))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv('GEMINI_HEDGE_MIN_SAMPLES', '20'))
+GEMINI_HEDGE_WORKERS = int(os.getenv('GEMINI_HEDGE_WORKERS', '4'))
+GEMINI_HEDGE_HOLDOUT = float(os.getenv('GEMINI_HEDGE_HOLDOUT', '0.05'))
+
+# 'google' calls the Gemini API; 'stub' returns canned JSON (used by the load test harness)
+GEMINI_BACKEND = os.getenv('GEMINI_BACKEND', 'google')
+GEMINI_STUB_LATENCY = float(os.getenv('GEMINI_STUB_LATENCY', '0.5'))
+
+# Service-layer cache shared by JiraService / GeminiService.
+# BACKEND: 'memory' (per process), 'sqlite' (one file shared by all workers
+# on this host) or 'django' (the Django cache alias named in ALIAS).
+SERVICE_CACHE = {
+    'BACKEND': os.getenv('SERVICE_CACHE_BACKEND', 'sqlite'),
+    'LOCATION': os.getenv('SERVICE_CACHE_LOCATION', str(BASE_DIR / 'service_cache.sqlite3')),
+    'ALIAS': os.getenv('SERVICE_CACHE_ALIAS', 'default'),
+    'DEFAULT_TTL': int(os.getenv('SERVICE_CACHE_TTL', '300')),
+    'MAX_ENTRIES': int(os.getenv('SERVICE_CACHE_MAX_ENTRIES', '10000')),
+    'MAX_VALUE_SIZE': int(os.getenv('SERVICE_CACHE_MAX_VALUE_SIZE', str(1024 * 1024))),
+}
+
+# Seconds to keep Gemini responses for identical prompts, and Jira metadata
+GEMINI_CACHE_TTL = int(os.getenv('GEMINI_CACHE_TTL', '86400'))
+JIRA_METADATA_CACHE_TTL = int(os.getenv('JIRA_METADATA_CACHE_TTL', '3600'))
+
+# Multiplier for the workflow's rate-limit sleeps (0 disables them, e.g. against stubs)
+AUTOMATION_PACING_SCALE = float(os.getenv('AUTOMATION_PACING_SCALE', '1'))
+
+# Parallel Gemini calls while planning a workflow, and issues per Jira bulk create (Jira allows 50)
+AUTOMATION_PLAN_WORKERS = int(os.getenv('AUTOMATION_PLAN_WORKERS', '4'))
+JIRA_BULK_CREATE_SIZE = int(os.getenv('JIRA_BULK_CREATE_SIZE', '50'))
+
+# Write-behind for workflows and plan commits: Jira creates and links are recorded in the database
+# outbox and answered with placeholder keys, and a background flusher in each server process (the
+# WSGI/ASGI entry points) sends them as soon as work is queued, and every JIRA_OUTBOX_FLUSH_INTERVAL
+# seconds; elsewhere run manage.py flush_outbox. Failed sends are retried with backoff from
+# JIRA_OUTBOX_RETRY_BASE_DELAY up to JIRA_OUTBOX_RETRY_MAX_DELAY seconds until Jira accepts them,
+# for at most JIRA_OUTBOX_MAX_ATTEMPTS sends (0: no limit); client errors other than 408 and 429
+# fail at once. An entry being sent is leased to one flusher for JIRA_OUTBOX_LEASE seconds.
+JIRA_WRITE_BEHIND = os.getenv('JIRA_WRITE_BEHIND', 'False') == 'True'
+JIRA_OUTBOX_FLUSH_INTERVAL = float(os.getenv('JIRA_OUTBOX_FLUSH_INTERVAL', '5'))
+JIRA_OUTBOX_RETRY_BASE_DELAY = float(os.getenv('JIRA_OUTBOX_RETRY_BASE_DELAY', '2'))
+JIRA_OUTBOX_RETRY_MAX_DELAY = float(os.getenv('JIRA_OUTBOX_RETRY_MAX_DELAY', '300'))
+JIRA_OUTBOX_LEASE = float(os.getenv('JIRA_OUTBOX_LEASE', '300'))
+JIRA_OUTBOX_MAX_ATTEMPTS = int(os.getenv('JIRA_OUTBOX_MAX_ATTEMPTS', '20'))
+
+# Cosine similarity above which generated tasks / test cases count as duplicates (>1 disables)
+AUTOMATION_DEDUP_THRESHOLD = float(os.getenv('AUTOMATION_DEDUP_THRESHOLD', '0.8'))
+
+# Similarity above which a generated ticket is treated as an existing project issue (>1 disables),
+# and how many search pages of existing issues to index before the first workflow
+DUPLICATE_TICKET_THRESHOLD = float(os.getenv('DUPLICATE_TICKET_THRESHOLD', '0.9'))
+DUPLICATE_INDEX_WARM_PAGES = int(os.getenv('DUPLICATE_INDEX_WARM_PAGES', '20'))
+
+# Seconds before /api/analytics/ pulls recent changes into the local issue store
+ANALYTICS_SYNC_INTERVAL = int(os.getenv('ANALYTICS_SYNC_INTERVAL', '60'))
+
+# Per-request profiling: requests carrying this token in X-Profile (or ?profile=)
+# are profiled into PROFILE_DIR. Unset disables the middleware entirely. Profiles are
+# sampled folded stacks of the request and the threads it starts, every
+# PROFILE_SAMPLE_INTERVAL seconds; X-Profile-Format: pstats gives cProfile output
+# instead, which only covers the request thread (not Jira/Gemini thread pools).
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+
+# /api/health/: Jira and Gemini are probed in the background every HEALTH_CHECK_INTERVAL
+# seconds (HEALTH_CHECK_TIMEOUT per probe); ?details=1 connection info is cached for
+# HEALTH_DETAILS_TTL seconds
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '30'))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '5'))
+HEALTH_DETAILS_TTL = int(os.getenv('HEALTH_DETAILS_TTL', '300'))
+
+# Warm restarts: the in-process caches (the memory service-cache backend, analytics issue
+# stores, duplicate-detection indexes) are saved to CACHE_SNAPSHOT_PATH every
+# CACHE_SNAPSHOT_INTERVAL seconds (0: only at exit) and restored at startup unless older than
+# CACHE_SNAPSHOT_MAX_AGE seconds. Only server processes (the WSGI/ASGI entry points, so also
+# runserver) use snapshots; an empty path disables them. Snapshots hold pickles: they are
+# signed with SECRET_KEY and created owner-only, and the path must not be in a directory
+# other users can write to.
+CACHE_SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH', str(BASE_DIR / 'cache_snapshot.bin'))
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv('CACHE_SNAPSHOT_INTERVAL', '300'))
+CACHE_SNAPSHOT_MAX_AGE = float(os.getenv('CACHE_SNAPSHOT_MAX_AGE', '3600'))
 
 # Logging configuration
 LOGGING = {
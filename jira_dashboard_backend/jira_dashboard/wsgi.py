@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jira_dashboard.settings')
 
 application = get_wsgi_application()
+
+# Server processes only: restore the caches saved before the last restart (without
+# delaying startup) and keep snapshotting them, and resume sending whatever earlier
+# processes left in the Jira outbox
+from jira_api import outbox, snapshot  # noqa: E402
+
+snapshot.start()
+outbox.start()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Loader2, Bug, ClipboardList, BookOpen, Rocket, 
   PlusCircle, CheckCircle, XCircle, AlertCircle,
@@ -7,6 +7,9 @@ import {
 } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 
+// Issue keys end in an increasing number: the list is shown newest (highest) first
+const issueNumber = (key) => parseInt(key.split('-').pop(), 10);
+
 const JiraAutomationPortal = () => {
   // State management
   const [issues, setIssues] = useState([]);
@@ -20,6 +23,8 @@ const JiraAutomationPortal = () => {
   const [automationLoading, setAutomationLoading] = useState(false);
   const [automationResult, setAutomationResult] = useState(null);
   const [expandedTasks, setExpandedTasks] = useState({});
+  // Where the next /api/issues/changes/ call continues from
+  const changesToken = useRef(null);
 
   useEffect(() => {
     fetchIssues();
@@ -29,6 +34,9 @@ const JiraAutomationPortal = () => {
     try {
       setLoading(true);
       setError(null);
+      // Take the change token first, so nothing changed while the list loads is missed
+      const tokenResponse = await fetch('http://localhost:8000/api/issues/changes/');
+      changesToken.current = tokenResponse.ok ? (await tokenResponse.json()).next_since : null;
       const response = await fetch('http://localhost:8000/api/issues/');
       if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
       const data = await response.json();
@@ -40,6 +48,35 @@ const JiraAutomationPortal = () => {
     }
   };
 
+  // Apply only what changed since the last load instead of refetching the whole list
+  const fetchIssueChanges = async () => {
+    if (!changesToken.current) return fetchIssues();
+    try {
+      const response = await fetch(
+        `http://localhost:8000/api/issues/changes/?since=${encodeURIComponent(changesToken.current)}`
+      );
+      // 410: the token expired
+      if (response.status === 410) return fetchIssues();
+      if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
+      const data = await response.json();
+      if (data.truncated) return fetchIssues();
+      changesToken.current = data.next_since;
+
+      setIssues(previous => {
+        const byKey = new Map(previous.map(issue => [issue.key, issue]));
+        data.issues.forEach(issue => byKey.set(issue.key, issue));
+        data.deleted.forEach(key => byKey.delete(key));
+        // Keep to the loaded page: changed issues older than it are not shown
+        const oldest = previous.length ? issueNumber(previous[previous.length - 1].key) : -Infinity;
+        return [...byKey.values()]
+          .filter(issue => issueNumber(issue.key) >= oldest)
+          .sort((a, b) => issueNumber(b.key) - issueNumber(a.key));
+      });
+    } catch (err) {
+      setError(`Failed to refresh issues: ${err.message}`);
+    }
+  };
+
   const fetchIssueDetails = async (issueKey) => {
     try {
       const response = await fetch(`http://localhost:8000/api/issues/${issueKey}/`);
@@ -75,8 +112,8 @@ const JiraAutomationPortal = () => {
       const result = await response.json();
       setAutomationResult(result);
       
-      // Refresh issues list to show new tickets
-      setTimeout(fetchIssues, 2000);
+      // Add the new tickets to the list (after a moment, so Jira's search index has them)
+      setTimeout(fetchIssueChanges, 2000);
       
     } catch (err) {
       setError(`Automation failed: ${err.message}`);